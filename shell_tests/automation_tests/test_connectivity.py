@@ -38,12 +38,9 @@ class TestConnectivity(BaseResourceServiceTestCase):
     LOCK = Lock()
 
     def get_other_device_for_connectivity(self):
-        sandbox_resources_handlers = [
-            handler
-            for handler in self.handler_storage.resource_handlers
-            if handler.conf.name in self.handler.sandbox_handler.conf.resource_names
-        ]
-        for resource_handler in sandbox_resources_handlers:
+        sandbox_name = self.handler.sandbox_handler.conf.name
+        registry = self.handler_storage.registry
+        for resource_handler in registry.get_resources_by_sandbox(sandbox_name):
             if self.handler != resource_handler:
                 other_resource = resource_handler
                 return other_resource
@@ -22,7 +22,9 @@ class TestRestoreConfig(BaseResourceServiceTestCase):
         try:
             self.handler.restore(config_file_path, "running", "append")
         finally:
-            self.handler_storage.ftp_handler.delete_file(file_name)
+            self.handler_storage.cleanup_queue.add(
+                self.handler_storage.ftp_handler, file_name
+            )
 
     def test_restore_startup_config_append(self):
         file_name = self.handler.save(self.ftp_path, "startup")
@@ -30,7 +32,9 @@ class TestRestoreConfig(BaseResourceServiceTestCase):
         try:
             self.handler.restore(config_file_path, "startup", "append")
         finally:
-            self.handler_storage.ftp_handler.delete_file(file_name)
+            self.handler_storage.cleanup_queue.add(
+                self.handler_storage.ftp_handler, file_name
+            )
 
     def test_restore_running_config_override(self):
         file_name = self.handler.save(self.ftp_path, "running")
@@ -38,7 +42,9 @@ class TestRestoreConfig(BaseResourceServiceTestCase):
         try:
             self.handler.restore(config_file_path, "running", "override")
         finally:
-            self.handler_storage.ftp_handler.delete_file(file_name)
+            self.handler_storage.cleanup_queue.add(
+                self.handler_storage.ftp_handler, file_name
+            )
 
     def test_restore_startup_config_override(self):
         file_name = self.handler.save(self.ftp_path, "startup")
@@ -46,7 +52,9 @@ class TestRestoreConfig(BaseResourceServiceTestCase):
         try:
             self.handler.restore(config_file_path, "startup", "override")
         finally:
-            self.handler_storage.ftp_handler.delete_file(file_name)
+            self.handler_storage.cleanup_queue.add(
+                self.handler_storage.ftp_handler, file_name
+            )
 
     def test_orchestration_restore(self):
         custom_params = {"custom_params": {"folder_path": self.ftp_path}}
@@ -60,7 +68,9 @@ class TestRestoreConfig(BaseResourceServiceTestCase):
                 "saved_artifact"
             ]["identifier"]
             file_name = get_file_name(path)
-            self.handler_storage.ftp_handler.delete_file(file_name)
+            self.handler_storage.cleanup_queue.add(
+                self.handler_storage.ftp_handler, file_name
+            )
 
 
 class OptionalTestRestoreFtpConfig(OptionalTestCase):
@@ -85,7 +95,9 @@ class TestRestoreConfigFromScp(BaseResourceServiceTestCase):
         try:
             self.handler.restore(config_file_path, "running", "append")
         finally:
-            self.handler_storage.scp_handler.delete_file(file_name)
+            self.handler_storage.cleanup_queue.add(
+                self.handler_storage.scp_handler, file_name
+            )
 
     def test_restore_startup_config_append(self):
         file_name = self.handler.save(self.scp_path, "startup")
@@ -93,7 +105,9 @@ class TestRestoreConfigFromScp(BaseResourceServiceTestCase):
         try:
             self.handler.restore(config_file_path, "startup", "append")
         finally:
-            self.handler_storage.scp_handler.delete_file(file_name)
+            self.handler_storage.cleanup_queue.add(
+                self.handler_storage.scp_handler, file_name
+            )
 
     def test_restore_running_config_override(self):
         file_name = self.handler.save(self.scp_path, "running")
@@ -101,7 +115,9 @@ class TestRestoreConfigFromScp(BaseResourceServiceTestCase):
         try:
             self.handler.restore(config_file_path, "running", "override")
         finally:
-            self.handler_storage.scp_handler.delete_file(file_name)
+            self.handler_storage.cleanup_queue.add(
+                self.handler_storage.scp_handler, file_name
+            )
 
     def test_restore_startup_config_override(self):
         file_name = self.handler.save(self.scp_path, "startup")
@@ -109,7 +125,9 @@ class TestRestoreConfigFromScp(BaseResourceServiceTestCase):
         try:
             self.handler.restore(config_file_path, "startup", "override")
         finally:
-            self.handler_storage.scp_handler.delete_file(file_name)
+            self.handler_storage.cleanup_queue.add(
+                self.handler_storage.scp_handler, file_name
+            )
 
     def test_orchestration_restore(self):
         custom_params = {"custom_params": {"folder_path": self.scp_path}}
@@ -123,7 +141,9 @@ class TestRestoreConfigFromScp(BaseResourceServiceTestCase):
                 "saved_artifact"
             ]["identifier"]
             file_name = get_file_name(path)
-            self.handler_storage.scp_handler.delete_file(file_name)
+            self.handler_storage.cleanup_queue.add(
+                self.handler_storage.scp_handler, file_name
+            )
 
 
 class OptionalTestRestoreScpConfig(OptionalTestCase):
@@ -147,7 +167,9 @@ class TestRestoreConfigFromTftp(BaseResourceServiceTestCase):
         try:
             self.handler.restore(config_file_path, "running", "append")
         finally:
-            self.handler_storage.tftp_handler.delete_file(file_name)
+            self.handler_storage.cleanup_queue.add(
+                self.handler_storage.tftp_handler, file_name
+            )
 
     def test_restore_startup_config_append(self):
         file_name = self.handler.save(self.tftp_path, "startup")
@@ -155,7 +177,9 @@ class TestRestoreConfigFromTftp(BaseResourceServiceTestCase):
         try:
             self.handler.restore(config_file_path, "startup", "append")
         finally:
-            self.handler_storage.tftp_handler.delete_file(file_name)
+            self.handler_storage.cleanup_queue.add(
+                self.handler_storage.tftp_handler, file_name
+            )
 
     def test_restore_running_config_override(self):
         file_name = self.handler.save(self.tftp_path, "running")
@@ -163,7 +187,9 @@ class TestRestoreConfigFromTftp(BaseResourceServiceTestCase):
         try:
             self.handler.restore(config_file_path, "running", "override")
         finally:
-            self.handler_storage.tftp_handler.delete_file(file_name)
+            self.handler_storage.cleanup_queue.add(
+                self.handler_storage.tftp_handler, file_name
+            )
 
     def test_restore_startup_config_override(self):
         file_name = self.handler.save(self.tftp_path, "startup")
@@ -171,7 +197,9 @@ class TestRestoreConfigFromTftp(BaseResourceServiceTestCase):
         try:
             self.handler.restore(config_file_path, "startup", "override")
         finally:
-            self.handler_storage.tftp_handler.delete_file(file_name)
+            self.handler_storage.cleanup_queue.add(
+                self.handler_storage.tftp_handler, file_name
+            )
 
     def test_orchestration_restore(self):
         custom_params = {"custom_params": {"folder_path": self.tftp_path}}
@@ -185,7 +213,9 @@ class TestRestoreConfigFromTftp(BaseResourceServiceTestCase):
                 "saved_artifact"
             ]["identifier"]
             file_name = get_file_name(path)
-            self.handler_storage.tftp_handler.delete_file(file_name)
+            self.handler_storage.cleanup_queue.add(
+                self.handler_storage.tftp_handler, file_name
+            )
 
 
 class OptionalTestRestoreTftpConfig(OptionalTestCase):
@@ -18,13 +18,17 @@ class TestSaveConfig(BaseResourceServiceTestCase):
 
     def test_save_running_config(self):
         file_name = self.handler.save(self.ftp_path, "running")
-        self.assertTrue(self.handler_storage.ftp_handler.read_file(file_name))
-        self.handler_storage.ftp_handler.delete_file(file_name)
+        self.assertTrue(self.handler_storage.ftp_handler.get_file_size(file_name))
+        self.handler_storage.cleanup_queue.add(
+            self.handler_storage.ftp_handler, file_name
+        )
 
     def test_save_startup_config(self):
         file_name = self.handler.save(self.ftp_path, "startup")
-        self.assertTrue(self.handler_storage.ftp_handler.read_file(file_name))
-        self.handler_storage.ftp_handler.delete_file(file_name)
+        self.assertTrue(self.handler_storage.ftp_handler.get_file_size(file_name))
+        self.handler_storage.cleanup_queue.add(
+            self.handler_storage.ftp_handler, file_name
+        )
 
     def test_orchestration_save_shallow(self):
         custom_params = {"custom_params": {"folder_path": self.ftp_path}}
@@ -36,8 +40,10 @@ class TestSaveConfig(BaseResourceServiceTestCase):
             "saved_artifact"
         ]["identifier"]
         file_name = get_file_name(path)
-        self.assertTrue(self.handler_storage.ftp_handler.read_file(file_name))
-        self.handler_storage.ftp_handler.delete_file(file_name)
+        self.assertTrue(self.handler_storage.ftp_handler.get_file_size(file_name))
+        self.handler_storage.cleanup_queue.add(
+            self.handler_storage.ftp_handler, file_name
+        )
 
     def test_orchestration_save_deep(self):
         custom_params = {"custom_params": {"folder_path": self.ftp_path}}
@@ -49,8 +55,10 @@ class TestSaveConfig(BaseResourceServiceTestCase):
             "saved_artifact"
         ]["identifier"]
         file_name = get_file_name(path)
-        self.assertTrue(self.handler_storage.ftp_handler.read_file(file_name))
-        self.handler_storage.ftp_handler.delete_file(file_name)
+        self.assertTrue(self.handler_storage.ftp_handler.get_file_size(file_name))
+        self.handler_storage.cleanup_queue.add(
+            self.handler_storage.ftp_handler, file_name
+        )
 
 
 class OptionalTestSaveFtpConfig(OptionalTestCase):
@@ -71,13 +79,17 @@ class TestSaveConfigFromScp(BaseResourceServiceTestCase):
 
     def test_save_running_config(self):
         file_name = self.handler.save(self.scp_path, "running")
-        self.assertTrue(self.handler_storage.scp_handler.read_file(file_name))
-        self.handler_storage.scp_handler.delete_file(file_name)
+        self.assertTrue(self.handler_storage.scp_handler.get_file_size(file_name))
+        self.handler_storage.cleanup_queue.add(
+            self.handler_storage.scp_handler, file_name
+        )
 
     def test_save_startup_config(self):
         file_name = self.handler.save(self.scp_path, "startup")
-        self.assertTrue(self.handler_storage.scp_handler.read_file(file_name))
-        self.handler_storage.scp_handler.delete_file(file_name)
+        self.assertTrue(self.handler_storage.scp_handler.get_file_size(file_name))
+        self.handler_storage.cleanup_queue.add(
+            self.handler_storage.scp_handler, file_name
+        )
 
     def test_orchestration_save_shallow(self):
         custom_params = {"custom_params": {"folder_path": self.scp_path}}
@@ -92,8 +104,10 @@ class TestSaveConfigFromScp(BaseResourceServiceTestCase):
         ]["identifier"]
         file_name = get_file_name(path)
 
-        self.assertTrue(self.handler_storage.scp_handler.read_file(file_name))
-        self.handler_storage.scp_handler.delete_file(file_name)
+        self.assertTrue(self.handler_storage.scp_handler.get_file_size(file_name))
+        self.handler_storage.cleanup_queue.add(
+            self.handler_storage.scp_handler, file_name
+        )
 
     def test_orchestration_save_deep(self):
         custom_params = {"custom_params": {"folder_path": self.scp_path}}
@@ -108,8 +122,10 @@ class TestSaveConfigFromScp(BaseResourceServiceTestCase):
         ]["identifier"]
         file_name = get_file_name(path)
 
-        self.assertTrue(self.handler_storage.scp_handler.read_file(file_name))
-        self.handler_storage.scp_handler.delete_file(file_name)
+        self.assertTrue(self.handler_storage.scp_handler.get_file_size(file_name))
+        self.handler_storage.cleanup_queue.add(
+            self.handler_storage.scp_handler, file_name
+        )
 
 
 class OptionalTestSaveScpConfig(OptionalTestCase):
@@ -129,13 +145,17 @@ class TestSaveConfigFromTftp(BaseResourceServiceTestCase):
 
     def test_save_running_config(self):
         file_name = self.handler.save(self.tftp_path, "running")
-        self.assertTrue(self.handler_storage.tftp_handler.read_file(file_name))
-        self.handler_storage.tftp_handler.delete_file(file_name)
+        self.assertTrue(self.handler_storage.tftp_handler.get_file_size(file_name))
+        self.handler_storage.cleanup_queue.add(
+            self.handler_storage.tftp_handler, file_name
+        )
 
     def test_save_startup_config(self):
         file_name = self.handler.save(self.tftp_path, "startup")
-        self.assertTrue(self.handler_storage.tftp_handler.read_file(file_name))
-        self.handler_storage.tftp_handler.delete_file(file_name)
+        self.assertTrue(self.handler_storage.tftp_handler.get_file_size(file_name))
+        self.handler_storage.cleanup_queue.add(
+            self.handler_storage.tftp_handler, file_name
+        )
 
     def test_orchestration_save_shallow(self):
         custom_params = {"custom_params": {"folder_path": self.tftp_path}}
@@ -150,8 +170,10 @@ class TestSaveConfigFromTftp(BaseResourceServiceTestCase):
         ]["identifier"]
         file_name = get_file_name(path)
 
-        self.assertTrue(self.handler_storage.tftp_handler.read_file(file_name))
-        self.handler_storage.tftp_handler.delete_file(file_name)
+        self.assertTrue(self.handler_storage.tftp_handler.get_file_size(file_name))
+        self.handler_storage.cleanup_queue.add(
+            self.handler_storage.tftp_handler, file_name
+        )
 
     def test_orchestration_save_deep(self):
         custom_params = {"custom_params": {"folder_path": self.tftp_path}}
@@ -166,8 +188,10 @@ class TestSaveConfigFromTftp(BaseResourceServiceTestCase):
         ]["identifier"]
         file_name = get_file_name(path)
 
-        self.assertTrue(self.handler_storage.tftp_handler.read_file(file_name))
-        self.handler_storage.tftp_handler.delete_file(file_name)
+        self.assertTrue(self.handler_storage.tftp_handler.get_file_size(file_name))
+        self.handler_storage.cleanup_queue.add(
+            self.handler_storage.tftp_handler, file_name
+        )
 
 
 class OptionalTestSaveTftpConfig(OptionalTestCase):
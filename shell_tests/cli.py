@@ -4,6 +4,7 @@ import click
 
 from shell_tests import oop_shellfoundry
 from shell_tests.configs import MainConfig
+from shell_tests.helpers.archive_helpers import ArchiveFormat
 from shell_tests.helpers.cli_helpers import PathPath
 from shell_tests.helpers.logger import logger
 from shell_tests.prepare_env import AutomatedPrepareEnv
@@ -22,10 +23,27 @@ def cli():
     "first_shell_dependencies_path",
     type=PathPath(exists=True, dir_okay=False),
 )
-def run_tests(test_conf: Path, first_shell_dependencies_path: Path):
-    conf = MainConfig.from_yaml(test_conf)
+@click.option(
+    "--cache-config",
+    is_flag=True,
+    help="Reuse the validated config if the YAML file wasn't changed",
+)
+@click.option(
+    "--logs-archive",
+    "logs_archive",
+    type=click.Choice([f.value for f in ArchiveFormat]),
+    help="Stream CS logs into the archive instead of the cs_logs dir",
+)
+def run_tests(
+    test_conf: Path,
+    first_shell_dependencies_path: Path,
+    cache_config: bool,
+    logs_archive: str | None,
+):
+    conf = MainConfig.from_yaml(test_conf, cache_config)
     conf.update_from_cli_params(first_shell_dependencies_path)
-    report = AutomatedTestsRunner(conf).run()
+    logs_archive_format = ArchiveFormat(logs_archive) if logs_archive else None
+    report = AutomatedTestsRunner(conf, logs_archive_format).run()
     logger.info(f"\n\nTest results:\n{report}")
     return report.is_success, report
 
@@ -44,8 +62,15 @@ def check_shellfoundry_templates(template_path: str, test_conf: Path):
     "first_shell_dependencies_path",
     type=PathPath(exists=True, dir_okay=False),
 )
-def prepare_env(test_conf: Path, first_shell_dependencies_path: Path):
-    conf = MainConfig.from_yaml(test_conf)
+@click.option(
+    "--cache-config",
+    is_flag=True,
+    help="Reuse the validated config if the YAML file wasn't changed",
+)
+def prepare_env(
+    test_conf: Path, first_shell_dependencies_path: Path, cache_config: bool
+):
+    conf = MainConfig.from_yaml(test_conf, cache_config)
     conf.update_from_cli_params(first_shell_dependencies_path)
     AutomatedPrepareEnv(conf).run()
 
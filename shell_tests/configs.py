@@ -1,14 +1,25 @@
+import hashlib
+import string
+from collections.abc import Iterator
 from enum import Enum
+from ipaddress import IPv4Address
 from pathlib import Path
 
 import yaml
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, parse_obj_as, root_validator, validator
 
-from shell_tests.helpers.config_helpers import str_version_to_tuple
-from shell_tests.helpers.download_files_helper import DownloadFile
+from shell_tests.helpers.config_helpers import (
+    ConfigCache,
+    get_cache_dir,
+    str_version_to_tuple,
+)
+from shell_tests.helpers.download_files_helper import DownloadFile, prefetch_files
+from shell_tests.helpers.logger import logger
 
 MIN_COMPATIBLE_CONF_VER = "0.13"
-MAX_COMPATIBLE_CONF_VER = "0.16"
+MAX_COMPATIBLE_CONF_VER = "0.17"
+# libyaml is much faster than the pure-Python loader
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
 class CloudShellConfig(BaseModel):
@@ -121,11 +132,21 @@ class ServiceConfig(BaseModel):
 
 class HostConfig(BaseModel):
     host: str = Field(..., alias="Host")
+    file_wait_timeout: float = Field(30, alias="File Wait Timeout")
 
     @property
     def netloc(self) -> str:
         return self.host.split("/", 1)[0]
 
+    @property
+    def hostname(self) -> str:
+        return self.netloc.split(":", 1)[0]
+
+    @property
+    def port(self) -> int | None:
+        _, _, port = self.netloc.partition(":")
+        return int(port) if port else None
+
     @property
     def path(self) -> str:
         path = self.host.removeprefix(self.netloc)
@@ -139,11 +160,19 @@ class HostWithUserConfig(HostConfig):
     password: str | None = Field(None, alias="Password")
 
 
+class TftpConfig(HostConfig):
+    block_size: int | None = Field(1468, alias="Block Size")
+    window_size: int | None = Field(8, alias="Window Size")
+    transfer_size: bool = Field(True, alias="Transfer Size")
+    timeout: float = Field(5, alias="Timeout")
+
+
 class ShellConfig(BaseModel):
     name: str = Field(..., alias="Name")
     path: Path = Field(..., alias="Path")
     dependencies_path: Path | None = Field(None, alias="Dependencies Path")
     extra_standards_paths: list[Path] = Field([], alias="Extra CS Standards")
+    keep_installed: bool = Field(False, alias="Keep Installed")
     tests_conf: TestsConfig = Field(TestsConfig(), alias="Tests")
 
     @validator(
@@ -163,6 +192,111 @@ class SandboxConfig(BaseModel):
     tests_conf: TestsConfig = Field(TestsConfig, alias="Tests")
 
 
+class IpRangeConfig(BaseModel):
+    start: IPv4Address = Field(..., alias="Start")
+    count: int = Field(..., alias="Count", gt=0)
+
+
+def _get_name_fields(template: dict, allowed: set[str]) -> set[str]:
+    """Get the fields of the template Name, only allowed ones can be used."""
+    name = template.get("Name")
+    if not isinstance(name, str):
+        raise ValueError("Name of the template is required")
+    fields = {field for _, field, _, _ in string.Formatter().parse(name)}
+    fields.discard(None)
+    if not_allowed := fields - allowed:
+        allowed_str = ", ".join(f"{{{field}}}" for field in sorted(allowed))
+        raise ValueError(
+            f"Name of the template can contain only {allowed_str}, "
+            f"got {sorted(not_allowed)}"
+        )
+    return fields
+
+
+class ResourceMatrixConfig(BaseModel):
+    """Resources created from the template for every device IP.
+
+    {index} and {ip} in the template Name are replaced. If Sandbox Size is set
+    the resources are split into sandboxes of this size, {index} in the
+    sandbox template Name is replaced. Configs are created only on iteration.
+    """
+
+    template: dict = Field(..., alias="Template")
+    device_ips: list[str] = Field([], alias="Device IPs")
+    device_ip_range: IpRangeConfig | None = Field(None, alias="Device IP Range")
+    sandbox_size: int | None = Field(None, alias="Sandbox Size", gt=0)
+    sandbox_template: dict = Field({"Name": "sandbox-{index}"}, alias="Sandbox")
+
+    @validator("template")
+    def _validate_template(cls, template: dict):
+        if not _get_name_fields(template, {"index", "ip"}):
+            raise ValueError("Name of the template should contain {index} or {ip}")
+        if "Networking App" in template:
+            # the Device IP is set by the matrix
+            raise ValueError("Networking App cannot be used in the template")
+        ResourceConfig.parse_obj(template)
+        return template
+
+    @validator("device_ip_range", always=True)
+    def _check_device_ips(cls, device_ip_range, values: dict):
+        if bool(values.get("device_ips")) == bool(device_ip_range):
+            raise ValueError("either Device IPs or Device IP Range is required")
+        return device_ip_range
+
+    @validator("sandbox_template")
+    def _validate_sandbox_template(cls, sandbox_template: dict, values: dict):
+        fields = _get_name_fields(sandbox_template, {"index"})
+        sandbox_size = values.get("sandbox_size")
+        if device_ip_range := values.get("device_ip_range"):
+            resources_count = device_ip_range.count
+        else:
+            resources_count = len(values.get("device_ips") or [])
+        if sandbox_size and resources_count > sandbox_size and not fields:
+            raise ValueError(
+                "Name of the sandbox template should contain {index}, "
+                "there is more than one sandbox"
+            )
+        SandboxConfig.parse_obj(sandbox_template)
+        return sandbox_template
+
+    def __len__(self) -> int:
+        if self.device_ip_range:
+            return self.device_ip_range.count
+        return len(self.device_ips)
+
+    def _get_device_ip(self, i: int) -> str:
+        if self.device_ip_range:
+            return str(self.device_ip_range.start + i)
+        return self.device_ips[i]
+
+    def _get_resource_name(self, i: int) -> str:
+        ip = self._get_device_ip(i)
+        return self.template["Name"].format(index=i + 1, ip=ip)
+
+    def iter_resources_conf(self) -> Iterator[ResourceConfig]:
+        for i in range(len(self)):
+            yield ResourceConfig.parse_obj(
+                {
+                    **self.template,
+                    "Name": self._get_resource_name(i),
+                    "Device IP": self._get_device_ip(i),
+                }
+            )
+
+    def iter_sandboxes_conf(self) -> Iterator[SandboxConfig]:
+        if not self.sandbox_size:
+            return
+        for num, start in enumerate(range(0, len(self), self.sandbox_size), 1):
+            end = min(start + self.sandbox_size, len(self))
+            yield SandboxConfig.parse_obj(
+                {
+                    **self.sandbox_template,
+                    "Name": self.sandbox_template["Name"].format(index=num),
+                    "Resources": list(map(self._get_resource_name, range(start, end))),
+                }
+            )
+
+
 class BlueprintConfig(BaseModel):
     name: str = Field(..., alias="Name")
     app_names: list[str] = Field([], alias="Apps")
@@ -174,12 +308,28 @@ class VcenterConfig(BaseModel):
     password: str = Field(..., alias="Password")
 
 
+def _get_shells_conf_dict(shells_conf: list[ShellConfig]) -> dict[str, ShellConfig]:
+    shells_conf_dict = {}
+    for shell_conf in shells_conf:
+        shells_conf_dict.setdefault(shell_conf.name, shell_conf)
+    return shells_conf_dict
+
+
+def _merge_shell_tests_config(conf, shells_conf: dict[str, ShellConfig]):
+    shell_conf = shells_conf.get(getattr(conf, "shell_name", None))
+    if shell_conf is not None:
+        conf.tests_conf += shell_conf.tests_conf
+
+
 class MainConfig(BaseModel):
     version: str = Field(..., alias="Version")
     do_conf: DoConfig | None = Field(None, alias="Do")
     cs_conf: CloudShellConfig | None = Field(None, alias="CloudShell")
     shells_conf: list[ShellConfig] = Field(..., alias="Shells")
-    resources_conf: list[ResourceConfig] = Field(..., alias="Resources")
+    resources_conf: list[ResourceConfig] = Field([], alias="Resources")
+    resource_matrices_conf: list[ResourceMatrixConfig] = Field(
+        [], alias="Resource Matrix"
+    )
     deployment_resources_conf: list[DeploymentResourceConfig] = Field(
         [], alias="Deployment Resources"
     )
@@ -187,7 +337,7 @@ class MainConfig(BaseModel):
     services_conf: list[ServiceConfig] = Field([], alias="Services")
     ftp_conf: HostWithUserConfig | None = Field(None, alias="FTP")
     scp_conf: HostWithUserConfig | None = Field(None, alias="SCP")
-    tftp_conf: HostConfig | None = Field(None, alias="TFTP")
+    tftp_conf: TftpConfig | None = Field(None, alias="TFTP")
     sandboxes_conf: list[SandboxConfig] = Field([], alias="Sandboxes")
     blueprints_conf: list[BlueprintConfig] = Field([], alias="Blueprints")
     vcenter_conf: VcenterConfig | None = Field(None, alias="vCenter")
@@ -212,21 +362,69 @@ class MainConfig(BaseModel):
             raise ValueError("either CS on Do config or CloudShell config is required")
         return cs_conf
 
-    @validator(
-        "resources_conf", "services_conf", "deployment_resources_conf", each_item=True
-    )
-    def _merge_tests_config(cls, conf, values: dict):
-        for shell_conf in values.get("shells_conf", []):
-            if shell_conf.name == conf.shell_name:
-                conf.tests_conf += shell_conf.tests_conf
-                break
+    @root_validator(skip_on_failure=True)
+    def _merge_tests_config(cls, values: dict):
+        shells_conf = _get_shells_conf_dict(values["shells_conf"])
+        for key in ("resources_conf", "services_conf", "deployment_resources_conf"):
+            for conf in values[key]:
+                _merge_shell_tests_config(conf, shells_conf)
+        return values
+
+    def iter_resources_conf(self) -> Iterator[ResourceConfig]:
+        """Resources from the config and from the matrices, created lazily."""
+        yield from self.resources_conf
+        shells_conf = _get_shells_conf_dict(self.shells_conf)
+        for matrix_conf in self.resource_matrices_conf:
+            for conf in matrix_conf.iter_resources_conf():
+                _merge_shell_tests_config(conf, shells_conf)
+                yield conf
+
+    def iter_sandboxes_conf(self) -> Iterator[SandboxConfig]:
+        """Sandboxes from the config and from the matrices, created lazily."""
+        yield from self.sandboxes_conf
+        for matrix_conf in self.resource_matrices_conf:
+            yield from matrix_conf.iter_sandboxes_conf()
+
+    @staticmethod
+    def _get_shells_files(data: dict) -> Iterator[str]:
+        for shell_data in data.get("Shells") or []:
+            yield from filter(None, [shell_data.get("Path")])
+            yield from filter(None, [shell_data.get("Dependencies Path")])
+            yield from shell_data.get("Extra CS Standards") or []
+
+    @staticmethod
+    def _get_cache_key(yaml_data: bytes) -> str:
+        # models are changed with the code, so the module is a part of the key
+        return hashlib.sha256(Path(__file__).read_bytes() + yaml_data).hexdigest()
+
+    @classmethod
+    def _load_from_cache(cls, cache: ConfigCache, key: str) -> "MainConfig | None":
+        cached = cache.load(key)
+        if cached is None:
+            return None
+        conf, shells_data = cached
+        # shell files can be changed or be URLs, so they are always resolved
+        prefetch_files(cls._get_shells_files({"Shells": shells_data}))
+        conf.shells_conf = parse_obj_as(list[ShellConfig], shells_data)
+        logger.info("Using the cached config")
         return conf
 
     @classmethod
-    def from_yaml(cls, file_path: Path) -> "MainConfig":
-        with file_path.open() as f:
-            data = yaml.safe_load(f)
-        return cls.parse_obj(data)
+    def from_yaml(cls, file_path: Path, use_cache: bool = False) -> "MainConfig":
+        """Load the config, validated configs can be cached by the YAML hash."""
+        yaml_data = file_path.read_bytes()
+        cache = ConfigCache(get_cache_dir("configs"))
+        key = cls._get_cache_key(yaml_data)
+        if use_cache and (conf := cls._load_from_cache(cache, key)):
+            return conf
+
+        data = yaml.load(yaml_data, Loader=YAML_LOADER)
+        # download all the files concurrently, validators wait for them
+        prefetch_files(cls._get_shells_files(data))
+        conf = cls.parse_obj(data)
+        if use_cache:
+            cache.save(key, (conf, data.get("Shells") or []))
+        return conf
 
     def update_from_cli_params(self, first_shell_dependencies_path: Path) -> None:
         if first_shell_dependencies_path:
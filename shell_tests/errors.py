@@ -10,6 +10,10 @@ class CSIsNotAliveError(ResourceIsNotAliveError):
     """Can't connect to CS."""
 
 
+class DeviceIsNotReachableError(ResourceIsNotAliveError):
+    """Device became unreachable during the run."""
+
+
 class DeploymentResourceNotFoundError(BaseAutomationException):
     """Could not find a deployment resource."""
 
@@ -1,9 +1,53 @@
+import hashlib
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+from io import BytesIO
+from typing import BinaryIO, TypeVar
 
 from shell_tests.configs import HostConfig
+from shell_tests.helpers.logger import logger
+
+T = TypeVar("T")
+
+
+class HashingWriter:
+    """Calculates SHA-256 of the written data and passes it to the file object."""
+
+    def __init__(self, file_obj: BinaryIO | None = None):
+        self._file_obj = file_obj
+        self._start = None
+        if file_obj is not None and file_obj.seekable():
+            self._start = file_obj.tell()
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def reset(self):
+        """Start over, the data already written to the file object is truncated."""
+        if self.size and self._file_obj is not None:
+            if self._start is None:
+                raise OSError("Cannot rewrite the data, file object is not seekable")
+            self._file_obj.seek(self._start)
+            self._file_obj.truncate()
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self._hash.update(data)
+        self.size += len(data)
+        if self._file_obj is not None:
+            self._file_obj.write(data)
+        return len(data)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
 
 
 class AbcRemoteFileHandler(ABC):
+    FILE_NOT_FOUND_ERROR: type[Exception] = FileNotFoundError
+    WAIT_FILE_FIRST_DELAY = 0.1
+    WAIT_FILE_MAX_DELAY = 3
+
     def __init__(self, conf: HostConfig):
         self.conf = conf
 
@@ -12,6 +56,9 @@ class AbcRemoteFileHandler(ABC):
     def session(self):
         raise NotImplementedError()
 
+    def finish(self):
+        """Close the sessions."""
+
     def _get_file_path(self, file_name: str) -> str:
         if self.conf.path:
             file_path = f"{self.conf.path}/{file_name}"
@@ -19,13 +66,90 @@ class AbcRemoteFileHandler(ABC):
             file_path = file_name
         return file_path
 
+    def _is_file_exists(self, file_path: str) -> bool:
+        try:
+            self._get_file_size(file_path)
+        except self.FILE_NOT_FOUND_ERROR:
+            return False
+        return True
+
+    def _get_existing_file_paths(self, file_paths: set[str]) -> set[str]:
+        """Check which files exist, handlers can check them all at once."""
+        return set(filter(self._is_file_exists, file_paths))
+
+    def _wait_for_file_paths(self, file_paths: Iterable[str], timeout: float):
+        """Wait for the files with exponential backoff."""
+        pending = set(file_paths)
+        deadline = time.monotonic() + timeout
+        delay = self.WAIT_FILE_FIRST_DELAY
+        while True:
+            pending -= self._get_existing_file_paths(pending)
+            if not pending:
+                return
+            left = deadline - time.monotonic()
+            if left <= 0:
+                raise self.FILE_NOT_FOUND_ERROR(", ".join(sorted(pending)))
+            logger.debug(f"Waiting {delay:.1f}s for files {sorted(pending)}")
+            time.sleep(min(delay, left))
+            delay = min(delay * 2, self.WAIT_FILE_MAX_DELAY)
+
+    def wait_for_files(self, file_names: Iterable[str], timeout: float | None = None):
+        """Wait until all files appear, timeout defaults to the config one."""
+        if timeout is None:
+            timeout = self.conf.file_wait_timeout
+        self._wait_for_file_paths(map(self._get_file_path, file_names), timeout)
+
+    def wait_for_file(self, file_name: str, timeout: float | None = None):
+        self.wait_for_files([file_name], timeout)
+
+    def _call_waiting_for_file(
+        self, func: Callable[..., T], file_path: str, *args
+    ) -> T:
+        """Call the func, if there is no file wait for it and call once more."""
+        try:
+            return func(file_path, *args)
+        except self.FILE_NOT_FOUND_ERROR:
+            self._wait_for_file_paths([file_path], self.conf.file_wait_timeout)
+        return func(file_path, *args)
+
     @abstractmethod
-    def _read_file(self, file_path: str) -> bytes:
+    def _download_file(self, file_path: str, file_obj: BinaryIO):
+        """Write the file to the file object chunk by chunk."""
         raise NotImplementedError()
 
+    def download_file(self, file_name: str, file_obj: BinaryIO | None) -> str:
+        """Stream the file to the file object, returns SHA-256 of the file.
+
+        If the file object is None the file is only hashed.
+        """
+        file_path = self._get_file_path(file_name)
+        writer = HashingWriter(file_obj)
+
+        def download(path: str):
+            # a failed attempt could write a part of the file
+            writer.reset()
+            self._download_file(path, writer)
+
+        self._call_waiting_for_file(download, file_path)
+        return writer.hexdigest()
+
     def read_file(self, file_name: str) -> bytes:
+        b_io = BytesIO()
+        self.download_file(file_name, b_io)
+        return b_io.getvalue()
+
+    @abstractmethod
+    def _get_file_size(self, file_path: str) -> int:
+        """Get the file size, raises FILE_NOT_FOUND_ERROR if there is no file."""
+        raise NotImplementedError()
+
+    def get_file_size(self, file_name: str) -> int:
+        """Get the file size without reading it, waits for the file to appear."""
         file_path = self._get_file_path(file_name)
-        return self._read_file(file_path)
+        return self._call_waiting_for_file(self._get_file_size, file_path)
+
+    def exists(self, file_name: str) -> bool:
+        return self._is_file_exists(self._get_file_path(file_name))
 
     @abstractmethod
     def _delete_file(self, file_path: str):
@@ -33,4 +157,16 @@ class AbcRemoteFileHandler(ABC):
 
     def delete_file(self, file_name: str):
         file_path = self._get_file_path(file_name)
-        return self._delete_file(file_path)
+        return self._call_waiting_for_file(self._delete_file, file_path)
+
+    def _delete_files(self, file_paths: list[str]):
+        """Delete the files that exist, handlers can do it in one session."""
+        for file_path in file_paths:
+            try:
+                self._delete_file(file_path)
+            except self.FILE_NOT_FOUND_ERROR:
+                logger.warning(f"File {file_path} is already deleted")
+
+    def delete_files(self, file_names: Iterable[str]):
+        """Delete the files without waiting for them."""
+        self._delete_files(list(map(self._get_file_path, file_names)))
@@ -18,6 +18,7 @@ from cloudshell.api.cloudshell_api import (
 )
 from cloudshell.api.common_cloudshell_api import CloudShellAPIError
 from cloudshell.rest.api import PackagingRestApiClient
+from cloudshell.rest.exceptions import FeatureUnavailable, ShellNotFoundException
 from retrying import retry
 from urllib3.exceptions import MaxRetryError
 
@@ -31,6 +32,7 @@ from shell_tests.errors import (
 from shell_tests.helpers.cs_helpers import generate_new_resource_name
 from shell_tests.helpers.cs_http import get_reservation_errors
 from shell_tests.helpers.logger import logger
+from shell_tests.helpers.shell_helpers import ShellPackage, installed_shells
 
 ReservationId = TypeVar("ReservationId", bound=str)
 
@@ -73,13 +75,32 @@ class CloudShellHandler:
             logger.warning(f"CloudShell {self.conf.host} is not alive")
             raise CSIsNotAliveError
 
+    def is_shell_recorded(self, package: ShellPackage) -> bool:
+        """Check that the Shell zip was recorded as installed on the CloudShell."""
+        zip_hash = installed_shells.get(self.conf.host, package.template_name)
+        return zip_hash == package.zip_hash
+
+    def _is_shell_installed(self, package: ShellPackage) -> bool:
+        """Check that the same Shell zip is still installed on the CloudShell."""
+        if not self.is_shell_recorded(package):
+            return False
+        try:
+            info = self._rest_api.get_shell(package.template_name)
+        except (ShellNotFoundException, FeatureUnavailable):
+            return False
+        return str(info.get("Version", package.version)) == package.version
+
     @retry(
         wait_exponential_multiplier=1000,
         stop_max_attempt_number=7,
         retry_on_exception=_retry_on_invalid_driver,
     )
-    def install_shell(self, shell_path: Path):
+    def install_shell(self, shell_path: Path, package: ShellPackage):
         shell_name = shell_path.name
+        if self._is_shell_installed(package):
+            logger.info(f"The Shell {shell_name} is already installed, skipping")
+            return
+
         shell_path = str(shell_path)
         logger.info(f"Installing the Shell {shell_name}")
         try:
@@ -96,10 +117,16 @@ class CloudShellHandler:
 
             self._rest_api.update_shell(shell_path, shell_name)
             logger.debug(f"Updated {shell_name} Shell")
+        installed_shells.record(self.conf.host, package.template_name, package.zip_hash)
 
     def remove_shell(self, shell_name: str):
         logger.info(f"Deleting the Shell {shell_name}")
-        self._rest_api.delete_shell(shell_name)
+        try:
+            self._rest_api.delete_shell(shell_name)
+        except ShellNotFoundException:
+            installed_shells.remove(self.conf.host, shell_name)
+            raise
+        installed_shells.remove(self.conf.host, shell_name)
         logger.debug(f"The Shell {shell_name} is deleted")
 
     def import_package(self, package_path: Path):
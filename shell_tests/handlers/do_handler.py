@@ -67,7 +67,7 @@ class DoHandler:
         try:
             conf = next(
                 c
-                for c in self._conf.resources_conf
+                for c in self._conf.iter_resources_conf()
                 if c.networking_app_name == handler.conf.name
             )
         except StopIteration:
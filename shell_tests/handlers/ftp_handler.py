@@ -1,12 +1,13 @@
 import ftplib
-import socket
-from io import BytesIO
-
-from retrying import retry
+import posixpath
+from collections import defaultdict
+from functools import cached_property
+from typing import BinaryIO
 
 from shell_tests.configs import HostWithUserConfig
 from shell_tests.handlers.abc_remote_file_handler import AbcRemoteFileHandler
 from shell_tests.helpers.logger import logger
+from shell_tests.helpers.session_pool import SessionPool
 
 
 class FtpError(Exception):
@@ -23,64 +24,142 @@ class FtpFileNotFoundError(FtpError):
         return f"File not found - {self.file_name}"
 
 
-def _retry_on_file_not_found(exception: Exception) -> bool:
-    return isinstance(exception, FtpFileNotFoundError)
-
-
 def _is_session_alive(session: ftplib.FTP) -> bool:
     try:
-        session.retrlines("LIST")
-    except (ftplib.Error, OSError, socket.timeout):
+        session.voidcmd("NOOP")
+    except (ftplib.Error, OSError, EOFError):
         return False
     else:
         return True
 
 
+def _close_session(session: ftplib.FTP):
+    try:
+        session.quit()
+    except (ftplib.Error, OSError, EOFError):
+        session.close()
+
+
+# errors after which the session cannot be used, 5xx replies are fine
+_BROKEN_SESSION_EXCEPTIONS = (
+    OSError,
+    EOFError,
+    ftplib.error_temp,
+    ftplib.error_reply,
+    ftplib.error_proto,
+)
+
+
 class FTPHandler(AbcRemoteFileHandler):
-    RETRY_STOP_MAX_ATTEMPT_NUM = 10
-    RETRY_WAIT_FIXED = 3000
-    IS_RETRY_FUNC = _retry_on_file_not_found
+    FILE_NOT_FOUND_ERROR = FtpFileNotFoundError
+    POOL_SIZE = 5
+    IDLE_TIMEOUT = 30
 
     def __init__(self, conf: HostWithUserConfig):
         super().__init__(conf)
         self.conf = conf
-        self._session = None
+
+    def _create_session(self) -> ftplib.FTP:
+        logger.info("Connecting to FTP")
+        session = ftplib.FTP(timeout=30)
+        session.connect(self.conf.hostname, self.conf.port or 21)
+        if self.conf.user and self.conf.password:
+            session.login(self.conf.user, self.conf.password)
+        return session
+
+    @cached_property
+    def _pool(self) -> SessionPool[ftplib.FTP]:
+        return SessionPool(
+            self._create_session,
+            _is_session_alive,
+            _close_session,
+            self.POOL_SIZE,
+            self.IDLE_TIMEOUT,
+            _BROKEN_SESSION_EXCEPTIONS,
+        )
 
     @property
     def session(self):
-        if self._session is None or not _is_session_alive(self._session):
-            self._session = ftplib.FTP(self.conf.host, timeout=30)
-            logger.info("Connecting to FTP")
-            if self.conf.user and self.conf.password:
-                self._session.login(self.conf.user, self.conf.password)
-        return self._session
-
-    @retry(
-        stop_max_attempt_number=RETRY_STOP_MAX_ATTEMPT_NUM,
-        wait_fixed=RETRY_WAIT_FIXED,
-        retry_on_exception=IS_RETRY_FUNC,
-    )
-    def _read_file(self, file_path: str) -> bytes:
+        """Logged-in session from the pool, use it as a context manager."""
+        return self._pool.get()
+
+    def finish(self):
+        self._pool.close()
+
+    def _download_file(self, file_path: str, file_obj: BinaryIO):
         logger.info(f"Reading file {file_path} from FTP")
-        b_io = BytesIO()
         try:
-            self.session.retrbinary(f"RETR {file_path}", b_io.write)
+            with self.session as session:
+                session.retrbinary(f"RETR {file_path}", file_obj.write)
         except ftplib.Error as e:
             if str(e).startswith("550 No such file"):
                 raise FtpFileNotFoundError(file_path)
             raise e
-        return b_io.getvalue()
 
-    @retry(
-        stop_max_attempt_number=RETRY_STOP_MAX_ATTEMPT_NUM,
-        wait_fixed=RETRY_WAIT_FIXED,
-        retry_on_exception=IS_RETRY_FUNC,
-    )
+    @staticmethod
+    def _get_size_from_mlst(session: ftplib.FTP, file_path: str) -> int:
+        resp = session.sendcmd(f"MLST {file_path}")
+        facts = resp.splitlines()[1].strip().split(" ", 1)[0]
+        for fact in facts.split(";"):
+            name, _, value = fact.partition("=")
+            if name.lower() == "size":
+                return int(value)
+        raise FtpError(f"Cannot get size of the file {file_path} - {resp}")
+
+    def _get_file_size(self, file_path: str) -> int:
+        logger.info(f"Getting size of the file {file_path} from FTP")
+        try:
+            with self.session as session:
+                try:
+                    session.voidcmd("TYPE I")
+                    size = session.size(file_path)
+                except ftplib.error_perm as e:
+                    # SIZE is not implemented
+                    if not str(e).startswith(("500", "502")):
+                        raise
+                    size = self._get_size_from_mlst(session, file_path)
+        except ftplib.error_perm as e:
+            if str(e).startswith("550"):
+                raise FtpFileNotFoundError(file_path)
+            raise e
+        return size
+
+    def _get_existing_file_paths(self, file_paths: set[str]) -> set[str]:
+        """Check all the files in a directory with one NLST."""
+        names_by_dir = defaultdict(set)
+        for file_path in file_paths:
+            dir_path, name = posixpath.split(file_path)
+            names_by_dir[dir_path].add(name)
+
+        existing = set()
+        with self.session as session:
+            for dir_path, names in names_by_dir.items():
+                try:
+                    listing = session.nlst(*filter(None, [dir_path]))
+                except (ftplib.error_perm, ftplib.error_temp):
+                    # some servers answer 450/550 for an empty directory
+                    listing = []
+                found = names.intersection(map(posixpath.basename, listing))
+                existing.update(posixpath.join(dir_path, name) for name in found)
+        return existing
+
     def _delete_file(self, file_path: str):
         logger.info(f"Deleting file {file_path}")
         try:
-            self.session.delete(file_path)
+            with self.session as session:
+                session.delete(file_path)
         except ftplib.Error as e:
             if str(e).startswith("550 No such file"):
                 raise FtpFileNotFoundError(file_path)
             raise e
+
+    def _delete_files(self, file_paths: list[str]):
+        logger.info(f"Deleting files {file_paths}")
+        with self.session as session:
+            for file_path in file_paths:
+                try:
+                    session.delete(file_path)
+                except ftplib.error_perm as e:
+                    if not str(e).startswith("550"):
+                        raise e
+                    logger.warning(f"File {file_path} is already deleted")
@@ -1,3 +1,4 @@
+from datetime import datetime
 from enum import Enum
 from functools import cached_property
 from threading import Event, Lock
@@ -13,7 +14,11 @@ from shell_tests.configs import (
     ResourceConfig,
     ServiceConfig,
 )
-from shell_tests.errors import BaseAutomationException, DependenciesBrokenError
+from shell_tests.errors import (
+    BaseAutomationException,
+    DependenciesBrokenError,
+    DeviceIsNotReachableError,
+)
 from shell_tests.helpers.logger import logger
 from shell_tests.helpers.threads_helper import set_thread_name_with_suffix
 
@@ -31,6 +36,8 @@ class DeviceType(Enum):
 
 
 class ResourceHandler:
+    UNREACHABLE_WAIT = 60
+
     def __init__(
         self,
         conf: ResourceConfig,
@@ -50,6 +57,9 @@ class ResourceHandler:
         self._autoload_started = Event()
         self.autoload_finished = Event()
         self.is_autoload_success: bool | None = None
+        self._is_reachable = Event()
+        self._is_reachable.set()
+        self.reachability_timeline: list[tuple[datetime, bool]] = []
 
     @classmethod
     def create(
@@ -94,6 +104,10 @@ class ResourceHandler:
     def model(self) -> str:
         return self._shell_handler.model
 
+    @property
+    def driver_hash(self) -> str | None:
+        return self._shell_handler.package.driver_hash
+
     def _create_resource(self):
         ip = self.conf.device_ip or "127.0.0.1"  # if we don't have a real device
         self.name = self._cs_handler.create_resource(self.name, self.model, ip)
@@ -127,7 +141,30 @@ class ResourceHandler:
             child_info.Name, namespace, {attribute_name: attribute_value}
         )
 
+    def set_reachable(self, is_reachable: bool):
+        """Set by the device monitor when the device goes down or up."""
+        if is_reachable is self._is_reachable.is_set():
+            return
+        self.reachability_timeline.append((datetime.now(), is_reachable))
+        if is_reachable:
+            logger.info(f"The device {self.conf.device_ip} of {self.name} is up")
+            self._is_reachable.set()
+        else:
+            logger.warning(f"The device {self.conf.device_ip} of {self.name} is down")
+            self._is_reachable.clear()
+
+    def wait_device_is_reachable(self):
+        """Wait for the device to come back or fail fast."""
+        if self._is_reachable.is_set():
+            return
+        logger.info(f"Waiting for the device {self.conf.device_ip} of {self.name}")
+        if not self._is_reachable.wait(self.UNREACHABLE_WAIT):
+            raise DeviceIsNotReachableError(
+                f"The device {self.conf.device_ip} of {self.name} is not reachable"
+            )
+
     def _autoload(self):
+        self.wait_device_is_reachable()
         try:
             self._cs_handler.resource_autoload(self.name)
         except CloudShellAPIError as e:
@@ -175,6 +212,7 @@ class ResourceHandler:
 
     def execute_command(self, command_name: str, command_kwargs: dict[str, str]) -> str:
         """Execute the command for the resource."""
+        self.wait_device_is_reachable()
         try:
             output = self.sandbox_handler.execute_resource_command(
                 self.name, command_name, command_kwargs
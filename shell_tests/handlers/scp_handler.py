@@ -1,11 +1,15 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
 from functools import cached_property
+from threading import Lock
+from typing import BinaryIO
 
 import paramiko
-from retrying import retry
 
 from shell_tests.configs import HostWithUserConfig
 from shell_tests.handlers.abc_remote_file_handler import AbcRemoteFileHandler
 from shell_tests.helpers.logger import logger
+from shell_tests.helpers.session_pool import SessionPool
 
 
 class ScpError(Exception):
@@ -22,56 +26,88 @@ class ScpFileNotFoundError(ScpError):
         return f"File not found - {self.file_name}"
 
 
-def _retry_on_file_not_found(exception: Exception) -> bool:
-    return isinstance(exception, ScpFileNotFoundError)
+def _is_channel_alive(sftp: paramiko.SFTPClient) -> bool:
+    channel = sftp.get_channel()
+    return not channel.closed and channel.get_transport().is_active()
+
+
+# errors after which the channel cannot be used, file errors are mapped before
+_BROKEN_CHANNEL_EXCEPTIONS = (paramiko.SSHException, OSError, EOFError)
 
 
 class SCPHandler(AbcRemoteFileHandler):
-    RETRY_STOP_MAX_ATTEMPT_NUM = 10
-    RETRY_WAIT_FIXED = 3000
-    IS_RETRY_FUNC = _retry_on_file_not_found
+    FILE_NOT_FOUND_ERROR = ScpFileNotFoundError
+    POOL_SIZE = 5
+    # checking a channel is local and cheap, so check it every time
+    IDLE_TIMEOUT = 0
 
     def __init__(self, conf: HostWithUserConfig):
         super().__init__(conf)
         self.conf = conf
+        self._transport: paramiko.Transport | None = None
+        self._transport_lock = Lock()
+
+    def _get_transport(self) -> paramiko.Transport:
+        with self._transport_lock:
+            if self._transport is None or not self._transport.is_active():
+                if self._transport is not None:
+                    logger.info("SCP connection is lost, reconnecting")
+                    self._transport.close()
+                logger.info("Connecting to SCP")
+                transport = paramiko.Transport(self.conf.netloc)
+                transport.connect(None, self.conf.user, self.conf.password)
+                self._transport = transport
+            return self._transport
+
+    def _open_channel(self) -> paramiko.SFTPClient:
+        return paramiko.SFTPClient.from_transport(self._get_transport())
 
     @cached_property
+    def _pool(self) -> SessionPool[paramiko.SFTPClient]:
+        return SessionPool(
+            self._open_channel,
+            _is_channel_alive,
+            paramiko.SFTPClient.close,
+            self.POOL_SIZE,
+            self.IDLE_TIMEOUT,
+            _BROKEN_CHANNEL_EXCEPTIONS,
+        )
+
+    @property
     def session(self):
-        transport = paramiko.Transport(self.conf.netloc)
-        logger.info("Connecting to SCP")
-        transport.connect(None, self.conf.user, self.conf.password)
-        return paramiko.SFTPClient.from_transport(transport)
-
-    @retry(
-        stop_max_attempt_number=RETRY_STOP_MAX_ATTEMPT_NUM,
-        wait_fixed=RETRY_WAIT_FIXED,
-        retry_on_exception=IS_RETRY_FUNC,
-    )
-    def _read_file(self, file_path: str) -> bytes:
-        logger.info(f"Reading file {file_path} from SCP")
-        try:
-            resp = self.session.open(file_path)
-            data = resp.read()
-        except FileNotFoundError:
-            raise ScpFileNotFoundError(file_path)
-        except Exception as e:
-            if "No such file" in str(e):
+        """SFTP channel from the pool, use it as a context manager."""
+        return self._pool.get()
+
+    @contextmanager
+    def _channel(self, file_path: str) -> Iterator[paramiko.SFTPClient]:
+        with self.session as sftp:
+            try:
+                yield sftp
+            except FileNotFoundError:
                 raise ScpFileNotFoundError(file_path)
-            raise e
-        return data
-
-    @retry(
-        stop_max_attempt_number=RETRY_STOP_MAX_ATTEMPT_NUM,
-        wait_fixed=RETRY_WAIT_FIXED,
-        retry_on_exception=IS_RETRY_FUNC,
-    )
+            except Exception as e:
+                if "No such file" in str(e):
+                    raise ScpFileNotFoundError(file_path)
+                raise e
+
+    def finish(self):
+        self._pool.close()
+        with self._transport_lock:
+            if self._transport is not None:
+                self._transport.close()
+                self._transport = None
+
+    def _download_file(self, file_path: str, file_obj: BinaryIO):
+        logger.info(f"Reading file {file_path} from SCP")
+        with self._channel(file_path) as sftp:
+            sftp.getfo(file_path, file_obj)
+
+    def _get_file_size(self, file_path: str) -> int:
+        logger.info(f"Getting size of the file {file_path} from SCP")
+        with self._channel(file_path) as sftp:
+            return sftp.stat(file_path).st_size
+
     def _delete_file(self, file_path: str):
         logger.info(f"Deleting file {file_path}")
-        try:
-            self.session.remove(file_path)
-        except FileNotFoundError:
-            raise ScpFileNotFoundError(file_path)
-        except Exception as e:
-            if "No such file" in str(e):
-                raise ScpFileNotFoundError(file_path)
-            raise e
+        with self._channel(file_path) as sftp:
+            sftp.remove(file_path)
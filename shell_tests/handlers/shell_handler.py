@@ -4,10 +4,7 @@ from shell_tests.configs import ShellConfig
 from shell_tests.handlers.cs_handler import CloudShellHandler
 from shell_tests.handlers.smb_handler import CloudShellSmbHandler
 from shell_tests.helpers.logger import logger
-from shell_tests.helpers.shell_helpers import (
-    get_resource_model_from_shell_definition,
-    get_shell_name_from_shell_definition,
-)
+from shell_tests.helpers.shell_helpers import ShellPackage
 from shell_tests.helpers.threads_helper import set_thread_name_with_suffix
 
 
@@ -19,8 +16,9 @@ class ShellHandler:
         cs_smb_handler: CloudShellSmbHandler | None,
     ):
         self.conf = conf
-        self.model = get_resource_model_from_shell_definition(self.conf.path)
-        self.cs_shell_name = get_shell_name_from_shell_definition(self.conf.path)
+        self.package = ShellPackage.from_zip(self.conf.path)
+        self.model = self.package.model
+        self.cs_shell_name = self.package.template_name
         self._cs_handler = cs_handler
         self._cs_smb_handler = cs_smb_handler
 
@@ -38,7 +36,7 @@ class ShellHandler:
 
     def install_shell(self):
         """Install the Shell."""
-        self._cs_handler.install_shell(self.conf.path)
+        self._cs_handler.install_shell(self.conf.path, self.package)
 
     def _store_extra_files(self):
         err_msg_smb_tmpl = (
@@ -46,7 +44,7 @@ class ShellHandler:
         )
         if self._cs_smb_handler and self.conf.dependencies_path:
             self._cs_smb_handler.add_dependencies_to_offline_pypi(
-                self.conf.dependencies_path
+                self.conf.dependencies_path, self.conf.name
             )
         elif not self._cs_smb_handler and self.conf.dependencies_path:
             logger.warning(err_msg_smb_tmpl.format("dependecies file"))
@@ -65,8 +63,12 @@ class ShellHandler:
             raise e
         logger.debug("The Shell prepared")
 
-    def finish(self):
-        """Delete the Shell and clear Offline PyPI."""
+    def _remove_shell(self):
+        if self.conf.keep_installed and self._cs_handler.is_shell_recorded(
+            self.package
+        ):
+            logger.debug(f"Keeping the Shell {self.cs_shell_name} installed")
+            return
         try:
             self._cs_handler.remove_shell(self.cs_shell_name)
         except ShellNotFoundException:
@@ -74,7 +76,14 @@ class ShellHandler:
         except Exception as e:
             if "This shell is used" not in str(e):
                 raise e
+
+    def finish(self):
+        """Delete the Shell and packages that only this Shell added to PyPI.
+
+        The installed Shell is kept if "Keep Installed" is set, so the next run
+        doesn't upload it again if the zip wasn't changed.
+        """
+        self._remove_shell()
         if self.conf.dependencies_path and self._cs_smb_handler:
-            # todo remove only added packages
             # todo remove added standards
-            self._cs_smb_handler.clear_offline_pypi()
+            self._cs_smb_handler.release_offline_pypi_packages(self.conf.name)
@@ -4,22 +4,27 @@ import shutil
 import socket
 import zipfile
 from collections.abc import Callable, Iterator
-from contextlib import suppress
+from concurrent import futures as ft
+from contextlib import contextmanager, suppress
 from datetime import datetime
 from io import BytesIO
 from pathlib import Path
+from queue import Empty, SimpleQueue
 from threading import Lock
 from typing import BinaryIO
 
+import xmltodict
 from retrying import retry
 from smb.base import NotConnectedError, NotReadyError, SharedFile, SMBTimeout
 from smb.SMBConnection import OperationFailure, SMBConnection
 
 from shell_tests.configs import CloudShellConfig
+from shell_tests.helpers.archive_helpers import Archive, ArchiveFormat, open_archive
 from shell_tests.helpers.logger import logger
 from shell_tests.helpers.smb_helpers import (
     FilterByFileNameInIterable,
     FilterByLastWriteTime,
+    ListingCache,
 )
 
 
@@ -33,7 +38,13 @@ class SmbHandler:
     RETRY_FUNC = _retry_on
 
     def __init__(
-        self, username: str, password: str, ip: str, server_name: str, share: str
+        self,
+        username: str,
+        password: str,
+        ip: str,
+        server_name: str,
+        share: str,
+        listing_cache: ListingCache | None = None,
     ):
         # split username if it contains a domain
         self._domain, self._username = (
@@ -46,6 +57,7 @@ class SmbHandler:
         self._server_name = server_name
         self._share = share
         self._session = None
+        self.listing_cache = listing_cache or ListingCache()
 
     @property
     def session(self) -> SMBConnection:
@@ -80,15 +92,23 @@ class SmbHandler:
         wait_fixed=RETRY_WAIT_FIXED,
         retry_on_exception=RETRY_FUNC,
     )
-    def ls(self, r_dir_path: str) -> Iterator[SharedFile]:
-        try:
-            smb_files = self.session.listPath(self._share, r_dir_path)
-        except OperationFailure as e:
-            if "Unable to open directory" not in e.message:
-                raise
-            smb_files = []
+    def ls(self, r_dir_path: str, use_cache: bool = True) -> Iterator[SharedFile]:
+        """List the dir, use_cache=False for dirs changed by someone else."""
+        smb_files = (
+            self.listing_cache.get(self._share, r_dir_path) if use_cache else None
+        )
+        if smb_files is None:
+            generation = self.listing_cache.generation
+            try:
+                smb_files = self.session.listPath(self._share, r_dir_path)
+            except OperationFailure as e:
+                if "Unable to open directory" not in e.message:
+                    raise
+                smb_files = []
+            smb_files = [f for f in smb_files if f.filename not in (".", "..")]
+            self.listing_cache.set(self._share, r_dir_path, smb_files, generation)
 
-        return filter(lambda smb_file: smb_file.filename not in (".", ".."), smb_files)
+        return iter(smb_files)
 
     @staticmethod
     def get_dir_path(path: str) -> str:
@@ -114,6 +134,9 @@ class SmbHandler:
                 self.session.createDirectory(self._share, r_dir_path)
             else:
                 raise e
+        finally:
+            # after the change, so the listing taken before it isn't cached
+            self.listing_cache.invalidate(self._share, r_dir_path)
 
     @retry(
         stop_max_attempt_number=RETRY_STOP_MAX_ATTEMPT_NUM,
@@ -132,6 +155,8 @@ class SmbHandler:
                 self.session.storeFile(self._share, r_file_path, file_obj)
             else:
                 raise e
+        finally:
+            self.listing_cache.invalidate(self._share, r_file_path)
 
     def put_file_path(
         self, r_file_path: str, l_file_path: Path | str, create_dirs: bool = False
@@ -145,7 +170,10 @@ class SmbHandler:
         retry_on_exception=RETRY_FUNC,
     )
     def remove_file(self, r_file_path: str):
-        self.session.deleteFiles(self._share, r_file_path)
+        try:
+            self.session.deleteFiles(self._share, r_file_path)
+        finally:
+            self.listing_cache.invalidate(self._share, r_file_path)
 
     @retry(
         stop_max_attempt_number=RETRY_STOP_MAX_ATTEMPT_NUM,
@@ -159,6 +187,18 @@ class SmbHandler:
         buffer.close()
         return data
 
+    def retrieve_r_file(
+        self, r_file_path: str, file_obj: BinaryIO, max_length: int = -1
+    ) -> int:
+        """Stream the remote file into the file object, without retries.
+
+        Retrying could write the same data to the stream twice.
+        """
+        _, size = self.session.retrieveFileFromOffset(
+            self._share, r_file_path, file_obj, max_length=max_length
+        )
+        return size
+
     def download_r_file(self, r_file_path: str, l_file_path: Path | str):
         with open(l_file_path, "wb") as file_obj:
             file_obj.write(self.get_r_file(r_file_path))
@@ -180,6 +220,33 @@ class SmbHandler:
                 else:
                     self.download_r_file(r_file_path, new_l_file_path)
 
+    def download_r_dir_to_archive(
+        self,
+        r_dir_path: str,
+        archive: Archive,
+        arc_dir_path: str,
+        filter_fn: Callable[[SharedFile], bool] = None,
+    ):
+        for smb_file in self.ls(r_dir_path):
+            if not filter_fn or filter_fn(smb_file):
+                arc_path = f"{arc_dir_path}/{smb_file.filename}"
+                r_file_path = os.path.join(r_dir_path, smb_file.filename)
+                if smb_file.isDirectory:
+                    archive.add_dir(arc_path, smb_file.last_write_time)
+                    self.download_r_dir_to_archive(r_file_path, archive, arc_path)
+                else:
+                    with archive.open_member(
+                        arc_path, smb_file.file_size, smb_file.last_write_time
+                    ) as file_obj:
+                        self.retrieve_r_file(r_file_path, file_obj, smb_file.file_size)
+
+
+class AddedPackage:
+    def __init__(self, crc: int, owners: set[str]):
+        self.crc = crc
+        self.owners = owners
+        self.future: ft.Future | None = None
+
 
 class CloudShellSmbHandler:
     _CS_SERVER_NAME = "User-PC"
@@ -192,54 +259,193 @@ class CloudShellSmbHandler:
     _CS_LOGS_INSTALLATION_DIR = (
         rf"{_QS_PATH}TestShell\\ExecutionServer\\Logs\\QsPythonDriverHost"
     )
+    _CUSTOMER_CONFIG_PATH = rf"{_QS_PATH}TestShell\\ExecutionServer\\customer.config"
+    _PYTHON_ENV_VARS_KEY = "DefaultPythonEnvrionmentVariables"
     _VENV_DIR = r"ProgramData\QualiSystems\venv"
     _QS_CONFIG_PATH = (
         rf"{_VENV_DIR}\{{}}\Lib\site-packages\cloudshell\logging\qs_config.ini"
     )
+    _OFFLINE_PYPI_EXCLUDED = (".", "..", "PlaceHolder.txt")
+    WORKERS = 5
 
     def __init__(self, conf: CloudShellConfig):
         self.conf = conf
         self._lock = Lock()
-        self._smb_handler = SmbHandler(
-            conf.os_user,
-            conf.os_password,
-            conf.host,
+        self._listing_cache = ListingCache()
+        self._smb_handler = self._create_smb_handler()
+        self._smb_handlers_pool: SimpleQueue[SmbHandler] = SimpleQueue()
+        self._offline_pypi_sizes: dict[str, int] | None = None
+        # packages that were in offline PyPI before the run, they are never removed
+        self._offline_pypi_existing: frozenset[str] = frozenset()
+        # packages added to offline PyPI during this run
+        self._offline_pypi_ledger: dict[str, AddedPackage] = {}
+        # packages that are being removed, an upload waits for the removal
+        self._offline_pypi_removals: dict[str, ft.Future] = {}
+
+    def _create_smb_handler(self) -> SmbHandler:
+        return SmbHandler(
+            self.conf.os_user,
+            self.conf.os_password,
+            self.conf.host,
             self._CS_SERVER_NAME,
             self._CS_SHARE,
+            self._listing_cache,
         )
 
+    @property
+    def listing_cache_stats(self) -> dict[str, int]:
+        return self._listing_cache.stats
+
+    @contextmanager
+    def _pooled_smb_handler(self) -> Iterator[SmbHandler]:
+        """SMB connection is not thread safe, so every thread takes its own."""
+        try:
+            smb_handler = self._smb_handlers_pool.get_nowait()
+        except Empty:
+            smb_handler = self._create_smb_handler()
+        try:
+            yield smb_handler
+        finally:
+            self._smb_handlers_pool.put(smb_handler)
+
     def add_file_obj_to_offline_pypi(self, file_obj: BinaryIO, file_name: str):
         r_file_path = f"{self._CS_PYPI_PATH}{file_name}"
         logger.debug(f"Adding a file {file_name} to offline PyPI")
+        with self._pooled_smb_handler() as smb_handler:
+            smb_handler.put_file_obj(r_file_path, file_obj)
+
+    def _add_zip_member_to_offline_pypi(
+        self,
+        zip_file: zipfile.ZipFile,
+        zip_info: zipfile.ZipInfo,
+        package: AddedPackage,
+        removal: ft.Future | None = None,
+    ):
+        name = zip_info.filename
+        if removal is not None:
+            ft.wait([removal])
+        try:
+            with zip_file.open(zip_info) as file_obj:
+                self.add_file_obj_to_offline_pypi(file_obj, name)
+        except Exception:
+            with self._lock:
+                self._get_offline_pypi_sizes().pop(name, None)
+                if self._offline_pypi_ledger.get(name) is package:
+                    del self._offline_pypi_ledger[name]
+            raise
+
+    def _get_offline_pypi_sizes(self) -> dict[str, int]:
+        """Offline PyPI is listed once and then updated by the handler."""
+        if self._offline_pypi_sizes is None:
+            logger.debug("Getting packages from offline PyPI")
+            with self._pooled_smb_handler() as smb_handler:
+                self._offline_pypi_sizes = {
+                    f.filename: f.file_size
+                    for f in smb_handler.ls(self._CS_PYPI_PATH)
+                    if f.filename not in self._OFFLINE_PYPI_EXCLUDED
+                }
+            self._offline_pypi_existing = frozenset(self._offline_pypi_sizes)
+        return self._offline_pypi_sizes
+
+    def _submit_zip_member(
+        self,
+        executor: ft.Executor,
+        zip_file: zipfile.ZipFile,
+        zip_info: zipfile.ZipInfo,
+        owner: str,
+    ) -> ft.Future | None:
+        """Upload the package if neither the run nor the server has it."""
+        name = zip_info.filename
         with self._lock:
-            self._smb_handler.put_file_obj(r_file_path, file_obj)
+            sizes = self._get_offline_pypi_sizes()
+            package = self._offline_pypi_ledger.get(name)
+            if package is not None and package.crc == zip_info.CRC:
+                logger.debug(f"{name} is already added to offline PyPI in this run")
+                package.owners.add(owner)
+                return package.future
+            elif package is not None:
+                logger.warning(f"{name} is added to offline PyPI with other content")
+            elif sizes.get(name) == zip_info.file_size:
+                logger.debug(f"{name} with the same size is already in offline PyPI")
+                return None
+            elif name in self._offline_pypi_existing:
+                logger.warning(f"{name} in offline PyPI has other size, replacing it")
+
+            owners = package.owners if package is not None else set()
+            owners.add(owner)
+            package = AddedPackage(zip_info.CRC, owners)
+            package.future = executor.submit(
+                self._add_zip_member_to_offline_pypi,
+                zip_file,
+                zip_info,
+                package,
+                self._offline_pypi_removals.get(name),
+            )
+            self._offline_pypi_ledger[name] = package
+            sizes[name] = zip_info.file_size
+        return package.future
 
-    def add_dependencies_to_offline_pypi(self, file: BinaryIO | Path):
+    def add_dependencies_to_offline_pypi(self, file: BinaryIO | Path, owner: str):
+        """Add packages to offline PyPI, the owner is used to remove them later."""
         logger.info("Putting dependencies to offline PyPI")
-        with zipfile.ZipFile(file) as zip_file:
-            for file_obj in map(zip_file.open, zip_file.filelist):
-                package_name = file_obj.name
-                self.add_file_obj_to_offline_pypi(file_obj, package_name)
-
-    def get_file_names_from_offline_pypi(self) -> list[str]:
-        logger.debug("Getting packages names from offline PyPI")
-        excluded = (".", "..", "PlaceHolder.txt")
-        names = [
-            f.filename
-            for f in self._smb_handler.ls(self._CS_PYPI_PATH)
-            if f.filename not in excluded
-        ]
-        logger.debug(f"Got packages names {names}")
-        return names
+        with zipfile.ZipFile(file) as zip_file, ft.ThreadPoolExecutor(
+            self.WORKERS, thread_name_prefix="[Offline PyPI upload]"
+        ) as executor:
+            futures = [
+                self._submit_zip_member(executor, zip_file, zip_info, owner)
+                for zip_info in zip_file.infolist()
+                if not zip_info.is_dir()
+            ]
+            futures = list(filter(None, futures))
+            ft.wait(futures)
+            for future in futures:
+                future.result()
 
     def remove_file_from_offline_pypi(self, filename: str):
         file_path = f"{self._CS_PYPI_PATH}{filename}"
         logger.debug(f"Removing a file {filename} from offline PyPI")
-        self._smb_handler.remove_file(file_path)
+        with self._pooled_smb_handler() as smb_handler:
+            try:
+                smb_handler.remove_file(file_path)
+            except OperationFailure:
+                files = smb_handler.ls(self._CS_PYPI_PATH, use_cache=False)
+                if filename in {f.filename for f in files}:
+                    raise
+                logger.debug(f"{filename} is already removed from offline PyPI")
+
+    def release_offline_pypi_packages(self, owner: str):
+        """Remove packages added by the owner if no other owner uses them.
+
+        Packages that were in offline PyPI before the run are kept even if
+        the run replaced them, other runs could depend on them.
+        """
+        with ft.ThreadPoolExecutor(
+            self.WORKERS, thread_name_prefix="[Offline PyPI cleanup]"
+        ) as executor:
+            with self._lock:
+                removals = {}
+                for filename, package in list(self._offline_pypi_ledger.items()):
+                    package.owners.discard(owner)
+                    if package.owners or filename in self._offline_pypi_existing:
+                        continue
+                    # forget the package before removing it, so a shell that
+                    # adds it meanwhile uploads it again after the removal
+                    del self._offline_pypi_ledger[filename]
+                    self._offline_pypi_sizes.pop(filename, None)
+                    removals[filename] = executor.submit(
+                        self.remove_file_from_offline_pypi, filename
+                    )
+                self._offline_pypi_removals.update(removals)
+            if removals:
+                logger.info(f"Removing {len(removals)} packages from offline PyPI")
+            ft.wait(removals.values())
 
-    def clear_offline_pypi(self):
-        for package_name in self.get_file_names_from_offline_pypi():
-            self.remove_file_from_offline_pypi(package_name)
+        with self._lock:
+            for filename, future in removals.items():
+                if self._offline_pypi_removals.get(filename) is future:
+                    del self._offline_pypi_removals[filename]
+        for future in removals.values():
+            future.result()
 
     def _add_cs_standard_file_path(self, standard_path: Path):
         r_file_path = f"{self._CS_STANDARDS_PATH}{standard_path.name}"
@@ -260,51 +466,108 @@ class CloudShellSmbHandler:
             if standard.name not in installed_standards:
                 self._add_cs_standard_file_path(standard)
 
-    def download_logs(
-        self, path_to_save: Path, start_time: datetime, reservation_ids: set[str]
-    ):
-        logger.info("Downloading CS logs")
-        try:
-            with suppress(FileNotFoundError):
-                shutil.rmtree(path_to_save)
-            path_to_save.mkdir()
-
-            shell_logs_path = path_to_save / "shell_logs"
-            installation_logs_path = path_to_save / "installation_logs"
-            autoload_logs_path = shell_logs_path / "inventory"
-            shell_logs_path.mkdir()
-            installation_logs_path.mkdir()
-            autoload_logs_path.mkdir()
-
-            self._smb_handler.download_r_dir(
+    def _get_logs_dirs(
+        self, start_time: datetime, reservation_ids: set[str]
+    ) -> list[tuple[str, str, Callable[[SharedFile], bool]]]:
+        """Remote log dirs with relative local paths and filters."""
+        return [
+            (
                 self._CS_LOGS_INSTALLATION_DIR,
-                installation_logs_path,
+                "installation_logs",
                 FilterByLastWriteTime(start_time),
-            )
-            self._smb_handler.download_r_dir(
+            ),
+            (
                 self._CS_LOGS_SHELL_DIR,
-                shell_logs_path,
+                "shell_logs",
                 FilterByFileNameInIterable(reservation_ids),
-            )
-            self._smb_handler.download_r_dir(
+            ),
+            (
                 self._CS_LOGS_AUTOLOAD_DIR,
-                autoload_logs_path,
+                "shell_logs/inventory",
                 FilterByLastWriteTime(start_time),
+            ),
+        ]
+
+    def _download_logs_to_dir(
+        self, path_to_save: Path, start_time: datetime, reservation_ids: set[str]
+    ):
+        with suppress(FileNotFoundError):
+            shutil.rmtree(path_to_save)
+        path_to_save.mkdir()
+
+        logs_dirs = self._get_logs_dirs(start_time, reservation_ids)
+        for _, l_dir_path, _ in logs_dirs:
+            (path_to_save / l_dir_path).mkdir(parents=True)
+        for r_dir_path, l_dir_path, filter_fn in logs_dirs:
+            self._smb_handler.download_r_dir(
+                r_dir_path, path_to_save / l_dir_path, filter_fn
             )
+
+    def _download_logs_to_archive(
+        self,
+        path_to_save: Path,
+        start_time: datetime,
+        reservation_ids: set[str],
+        archive_format: ArchiveFormat,
+    ):
+        logs_dirs = self._get_logs_dirs(start_time, reservation_ids)
+        with open_archive(path_to_save, archive_format) as archive:
+            for _, arc_dir_path, _ in logs_dirs:
+                archive.add_dir(f"{path_to_save.name}/{arc_dir_path}")
+            for r_dir_path, arc_dir_path, filter_fn in logs_dirs:
+                self._smb_handler.download_r_dir_to_archive(
+                    r_dir_path,
+                    archive,
+                    f"{path_to_save.name}/{arc_dir_path}",
+                    filter_fn,
+                )
+        logger.debug(f"CS logs are saved to {archive.path}")
+
+    def download_logs(
+        self,
+        path_to_save: Path,
+        start_time: datetime,
+        reservation_ids: set[str],
+        archive_format: ArchiveFormat | None = None,
+    ):
+        """Download CS logs to the dir or stream them into the archive."""
+        logger.info("Downloading CS logs")
+        try:
+            if archive_format:
+                self._download_logs_to_archive(
+                    path_to_save, start_time, reservation_ids, archive_format
+                )
+            else:
+                self._download_logs_to_dir(path_to_save, start_time, reservation_ids)
         except Exception as e:
             if "path not found" in str(e).lower():
                 logger.info("Cannot find log dir")
             else:
                 logger.warning(f"Cannot download logs, error: {e}")
         logger.debug("CS logs downloaded")
+        logger.debug(f"SMB listing cache stats: {self.listing_cache_stats}")
 
     def get_venv_names(self) -> list[str]:
-        return [venv.filename for venv in self._smb_handler.ls(self._VENV_DIR)]
+        # venvs are created by the Execution Server, so the cache could be stale
+        venvs = self._smb_handler.ls(self._VENV_DIR, use_cache=False)
+        return [venv.filename for venv in venvs]
 
     def get_qs_config(self, venv_name: str) -> bytes:
-        return self._smb_handler.get_r_file(self._QS_CONFIG_PATH.format(venv_name))
+        with self._pooled_smb_handler() as smb_handler:
+            return smb_handler.get_r_file(self._QS_CONFIG_PATH.format(venv_name))
 
     def put_qs_config(self, venv_name: str, config: bytes):
-        self._smb_handler.put_file_obj(
-            self._QS_CONFIG_PATH.format(venv_name), BytesIO(config)
-        )
+        with self._pooled_smb_handler() as smb_handler:
+            smb_handler.put_file_obj(
+                self._QS_CONFIG_PATH.format(venv_name), BytesIO(config)
+            )
+
+    def get_execution_server_log_level(self) -> str | None:
+        """Get LOG_LEVEL that the Execution Server sets for Python drivers."""
+        data = self._smb_handler.get_r_file(self._CUSTOMER_CONFIG_PATH)
+        settings = xmltodict.parse(data, force_list=("add",))["appSettings"] or {}
+        for setting in settings.get("add", []):
+            if setting.get("@key") == self._PYTHON_ENV_VARS_KEY:
+                match = re.search(r"\bLOG_LEVEL=(\w+)", setting.get("@value", ""))
+                return match.group(1) if match else None
+        return None
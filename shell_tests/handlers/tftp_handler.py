@@ -1,11 +1,14 @@
 from functools import cached_property
-from io import BytesIO
-
-import tftpy
-from retrying import retry
+from typing import BinaryIO
 
+from shell_tests.configs import TftpConfig
 from shell_tests.handlers.abc_remote_file_handler import AbcRemoteFileHandler
 from shell_tests.helpers.logger import logger
+from shell_tests.helpers.tftp_client import (
+    FILE_NOT_FOUND_CODE,
+    TftpClient,
+    TftpServerError,
+)
 
 
 class TftpError(Exception):
@@ -22,41 +25,52 @@ class TftpFileNotFoundError(TftpError):
         return f"File not found - {self.file_name}"
 
 
-def _retry_on_file_not_found(exception: Exception) -> bool:
-    return isinstance(exception, TftpFileNotFoundError)
+def _is_file_not_found(e: TftpServerError) -> bool:
+    return e.code == FILE_NOT_FOUND_CODE or e.message.startswith("No such file")
 
 
 class TFTPHandler(AbcRemoteFileHandler):
-    RETRY_STOP_MAX_ATTEMPT_NUM = 10
-    RETRY_WAIT_FIXED = 3000
-    IS_RETRY_FUNC = _retry_on_file_not_found
+    FILE_NOT_FOUND_ERROR = TftpFileNotFoundError
+
+    def __init__(self, conf: TftpConfig):
+        super().__init__(conf)
+        self.conf = conf
 
     @cached_property
-    def session(self):
-        logger.info("Connecting to TFTP")
-        return tftpy.TftpClient(self.conf.host)
-
-    @retry(
-        stop_max_attempt_number=RETRY_STOP_MAX_ATTEMPT_NUM,
-        wait_fixed=RETRY_WAIT_FIXED,
-        retry_on_exception=IS_RETRY_FUNC,
-    )
-    def _read_file(self, file_path: str) -> bytes:
+    def session(self) -> TftpClient:
+        return TftpClient(
+            self.conf.hostname,
+            self.conf.port or 69,
+            blksize=self.conf.block_size,
+            windowsize=self.conf.window_size,
+            tsize=self.conf.transfer_size,
+            timeout=self.conf.timeout,
+        )
+
+    def _download_file(self, file_path: str, file_obj: BinaryIO):
         logger.info(f"Reading file {file_path} from TFTP")
-        bio = BytesIO()
         try:
-            self.session.download(file_path, bio)
-        except Exception as e:
-            if str(e).startswith("No such file"):
+            info = self.session.download(file_path, file_obj)
+        except TftpServerError as e:
+            if _is_file_not_found(e):
+                raise TftpFileNotFoundError(file_path)
+            raise e
+        logger.debug(f"Read file {file_path} from TFTP, {info}")
+
+    def _get_file_size(self, file_path: str) -> int:
+        """Get the size from tsize if the server supports it.
+
+        Otherwise, returns size of the first block. So it's 0 for an empty file
+        and more than 0 for other files.
+        """
+        logger.info(f"Getting size of the file {file_path} from TFTP")
+        try:
+            return self.session.get_file_size(file_path)
+        except TftpServerError as e:
+            if _is_file_not_found(e):
                 raise TftpFileNotFoundError(file_path)
             raise e
-        return bio.getvalue()
 
-    @retry(
-        stop_max_attempt_number=RETRY_STOP_MAX_ATTEMPT_NUM,
-        wait_fixed=RETRY_WAIT_FIXED,
-        retry_on_exception=IS_RETRY_FUNC,
-    )
     def _delete_file(self, file_path: str):
         # todo find ability to delete file after TFTP
         logger.warning("We cannot delete files from TFTP server.")
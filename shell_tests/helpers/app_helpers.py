@@ -14,19 +14,16 @@ def _get_app_models(conf: MainConfig, handler_storage: HandlerStorage) -> list[A
     return apps
 
 
-def create_apps(conf: MainConfig, handler_storage: HandlerStorage):
-    apps = _get_app_models(conf, handler_storage)
-    with PackageApi.create_package() as package:
-        for app in apps:
-            package.add_app(app)
-        handler_storage.cs_handler.import_package(package.zip_path)
-
-
-def create_blueprints(conf: MainConfig, handler_storage: HandlerStorage):
+def create_apps_and_blueprints(conf: MainConfig, handler_storage: HandlerStorage):
+    """Import apps and blueprints to the CloudShell with one package."""
+    if not conf.apps_conf and not conf.blueprints_conf:
+        return
     apps_dict = {app.name: app for app in _get_app_models(conf, handler_storage)}
     with PackageApi.create_package() as package:
+        for app in apps_dict.values():
+            package.add_app(app)
         for blueprint_conf in conf.blueprints_conf:
             bp_apps = list(map(apps_dict.__getitem__, blueprint_conf.app_names))
             bp = Blueprint(blueprint_conf.name, bp_apps)
             package.add_blueprint(bp)
-        handler_storage.cs_handler.import_package(package.zip_path)
+        handler_storage.cs_handler.import_package(package.save())
@@ -0,0 +1,167 @@
+import gzip
+import tarfile
+import zipfile
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import BinaryIO
+
+from shell_tests.helpers.logger import logger
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class ArchiveFormat(Enum):
+    TAR_GZ = "tar.gz"
+    TAR_ZST = "tar.zst"
+    ZIP = "zip"
+
+
+class _BoundedWriter:
+    """Writes at most limit bytes to the stream and counts them."""
+
+    def __init__(self, stream: BinaryIO, limit: int):
+        self._stream = stream
+        self._limit = limit
+        self.written = 0
+
+    def write(self, data: bytes) -> int:
+        data = data[: self._limit - self.written]
+        self._stream.write(data)
+        self.written += len(data)
+        return len(data)
+
+
+class Archive(ABC):
+    def __init__(self, path: Path):
+        self.path = path
+
+    @abstractmethod
+    def add_dir(self, name: str, mtime: float | None = None):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def open_member(
+        self, name: str, size: int, mtime: float | None = None
+    ) -> Iterator[BinaryIO]:
+        """Open a writable stream for the new member, extra bytes are dropped."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def close(self):
+        raise NotImplementedError()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+class TarArchive(Archive):
+    """Tar archive that is written straight into a compressed stream."""
+
+    def __init__(self, path: Path, stream: BinaryIO):
+        super().__init__(path)
+        self._stream = stream
+        self._offset = 0
+
+    def _write(self, data: bytes):
+        self._stream.write(data)
+        self._offset += len(data)
+
+    def _pad_to(self, block_size: int):
+        remainder = self._offset % block_size
+        if remainder:
+            self._write(tarfile.NUL * (block_size - remainder))
+
+    def add_dir(self, name: str, mtime: float | None = None):
+        info = tarfile.TarInfo(name)
+        info.type = tarfile.DIRTYPE
+        info.mode = 0o755
+        info.mtime = mtime or datetime.now().timestamp()
+        self._write(info.tobuf(tarfile.PAX_FORMAT))
+
+    @contextmanager
+    def open_member(
+        self, name: str, size: int, mtime: float | None = None
+    ) -> Iterator[BinaryIO]:
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mode = 0o644
+        info.mtime = mtime or datetime.now().timestamp()
+        self._write(info.tobuf(tarfile.PAX_FORMAT))
+
+        writer = _BoundedWriter(self._stream, size)
+        try:
+            yield writer
+        finally:
+            self._offset += writer.written
+            if writer.written < size:
+                # the file was truncated while we were reading it
+                logger.debug(f"{name} is shorter than expected, padding it")
+                self._write(tarfile.NUL * (size - writer.written))
+            self._pad_to(tarfile.BLOCKSIZE)
+
+    def close(self):
+        # end-of-archive marker is two empty blocks
+        self._write(tarfile.NUL * tarfile.BLOCKSIZE * 2)
+        self._pad_to(tarfile.RECORDSIZE)
+        self._stream.close()
+
+
+class ZipArchive(Archive):
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self._zip_file = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+
+    @staticmethod
+    def _get_date_time(mtime: float | None) -> tuple[int, ...]:
+        date_time = datetime.fromtimestamp(mtime) if mtime else datetime.now()
+        return date_time.timetuple()[:6]
+
+    def add_dir(self, name: str, mtime: float | None = None):
+        info = zipfile.ZipInfo(f"{name.rstrip('/')}/", self._get_date_time(mtime))
+        self._zip_file.writestr(info, b"")
+
+    @contextmanager
+    def open_member(
+        self, name: str, size: int, mtime: float | None = None
+    ) -> Iterator[BinaryIO]:
+        info = zipfile.ZipInfo(name, self._get_date_time(mtime))
+        info.compress_type = zipfile.ZIP_DEFLATED
+        force_zip64 = size > zipfile.ZIP64_LIMIT
+        with self._zip_file.open(info, "w", force_zip64=force_zip64) as file_obj:
+            yield _BoundedWriter(file_obj, size)
+
+    def close(self):
+        self._zip_file.close()
+
+
+def get_archive_path(path: Path, archive_format: ArchiveFormat) -> Path:
+    return path.with_name(f"{path.name}.{archive_format.value}")
+
+
+def open_archive(path: Path, archive_format: ArchiveFormat) -> Archive:
+    """Create a new archive, path is used without extension."""
+    if archive_format is ArchiveFormat.TAR_ZST and zstandard is None:
+        logger.warning("zstandard is not installed, using tar.gz instead of tar.zst")
+        archive_format = ArchiveFormat.TAR_GZ
+
+    archive_path = get_archive_path(path, archive_format)
+    archive_path.unlink(missing_ok=True)
+    if archive_format is ArchiveFormat.ZIP:
+        archive = ZipArchive(archive_path)
+    elif archive_format is ArchiveFormat.TAR_ZST:
+        stream = zstandard.ZstdCompressor().stream_writer(archive_path.open("wb"))
+        archive = TarArchive(archive_path, stream)
+    else:
+        archive = TarArchive(archive_path, gzip.open(archive_path, "wb"))
+    return archive
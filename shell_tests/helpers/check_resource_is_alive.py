@@ -1,37 +1,217 @@
 import platform
+import socket
 import subprocess
+import time
+from collections.abc import Callable
+from concurrent import futures as ft
 
-from shell_tests.configs import MainConfig
+from shell_tests.configs import MainConfig, ResourceConfig
 from shell_tests.errors import ResourceIsNotAliveError
+from shell_tests.helpers.logger import logger
+from shell_tests.helpers.tftp_client import TftpClient, TftpServerError
 
+DEVICE_PORTS = (22, 23)
+CLI_PORT_ATTRIBUTE = "CLI TCP Port"
+CS_PORTS = (8029, 9000)
+CS_SMB_PORT = 445
+PROBE_TIMEOUT = 5
+MAX_WORKERS = 64
 
-def _is_host_alive(host: str) -> bool:
-    ping_count_str = "n" if platform.system().lower() == "windows" else "c"
-    cmd = f"ping -{ping_count_str} 1 {host}"
+
+def get_device_ports(resource: ResourceConfig) -> tuple[int, ...]:
+    """The CLI TCP Port of the resource if it's set, else SSH and Telnet ports."""
+    try:
+        port = int(resource.attributes.get(CLI_PORT_ATTRIBUTE) or 0)
+    except ValueError:
+        port = 0
+    return (port,) if port > 0 else DEVICE_PORTS
+
+
+def check_icmp(host: str, timeout: float) -> float:
+    """Send ICMP echo with the system ping, returns latency in seconds."""
+    count_flag = "-n" if platform.system().lower() == "windows" else "-c"
+    start_time = time.monotonic()
     try:
-        _ = subprocess.check_output(cmd, shell=True)
+        subprocess.run(
+            ["ping", count_flag, "1", host],
+            capture_output=True,
+            check=True,
+            timeout=timeout,
+        )
     except subprocess.CalledProcessError:
-        return False
-    return True
+        raise OSError("no ICMP echo reply") from None
+    except subprocess.TimeoutExpired:
+        raise OSError("ICMP echo timed out") from None
+    return time.monotonic() - start_time
+
+
+def check_tcp_port(host: str, port: int, timeout: float) -> float:
+    """Open TCP connection, returns connect latency in seconds."""
+    start_time = time.monotonic()
+    with socket.create_connection((host, port), timeout=timeout):
+        return time.monotonic() - start_time
+
+
+def check_tftp_port(host: str, port: int, timeout: float) -> float:
+    """Request a missing file, an error reply means the server is alive."""
+    start_time = time.monotonic()
+    try:
+        TftpClient(host, port, timeout=timeout, retries=0).get_file_size(
+            "shell-tests-probe"
+        )
+    except TftpServerError:
+        pass
+    except Exception as e:
+        raise OSError(f"no TFTP reply, {e}") from None
+    return time.monotonic() - start_time
+
+
+class HostProbe:
+    """Host with the checks that show that it's usable for tests.
+
+    ICMP is checked but only reported if there are port checks, as ICMP is
+    often filtered. With icmp=False it's checked only if there are no port
+    checks. If all_ports is False one open port is enough.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        host: str,
+        ports: dict[str, Callable[[float], float]],
+        all_ports: bool = False,
+        icmp: bool = True,
+    ):
+        self.name = name
+        self.host = host
+        self.ports = ports
+        self.all_ports = all_ports
+        self.icmp = icmp
 
+    @classmethod
+    def tcp(
+        cls,
+        name: str,
+        host: str,
+        ports: tuple[int, ...],
+        all_ports: bool = False,
+        icmp: bool = True,
+    ) -> "HostProbe":
+        checks = {
+            f"TCP {port}": (
+                lambda timeout, port=port: check_tcp_port(host, port, timeout)
+            )
+            for port in ports
+        }
+        return cls(name, host, checks, all_ports, icmp)
 
-def check_all_resources_is_alive(conf: MainConfig):
-    resources_to_check = {
-        resource.name: resource.device_ip
-        for resource in conf.resources_conf
+    def get_checks(self) -> dict[str, Callable[[float], float]]:
+        if not self.icmp and self.ports:
+            return dict(self.ports)
+        return {"ICMP": lambda timeout: check_icmp(self.host, timeout), **self.ports}
+
+
+class ProbeResult:
+    def __init__(self, probe: HostProbe):
+        self.probe = probe
+        self.latencies: dict[str, float] = {}
+        self.errors: dict[str, str] = {}
+
+    @property
+    def is_alive(self) -> bool:
+        if not self.probe.ports:
+            return "ICMP" in self.latencies
+        ports_ok = [name in self.latencies for name in self.probe.ports]
+        return all(ports_ok) if self.probe.all_ports else any(ports_ok)
+
+    @property
+    def latency(self) -> float | None:
+        names = self.probe.ports or ("ICMP",)
+        latencies = [self.latencies[name] for name in names if name in self.latencies]
+        return min(latencies, default=None)
+
+    def __str__(self):
+        checks = [
+            f"{name} {self.latencies[name] * 1000:.0f}ms"
+            if name in self.latencies
+            else f"{name} failed: {self.errors[name]}"
+            for name in self.probe.get_checks()
+        ]
+        state = "alive" if self.is_alive else "not alive"
+        return f"{self.probe.name} ({self.probe.host}) is {state}: {', '.join(checks)}"
+
+
+def probe_hosts(
+    probes: list[HostProbe], timeout: float = PROBE_TIMEOUT
+) -> list[ProbeResult]:
+    """Run the checks of all the hosts concurrently.
+
+    The timeout of a check starts when a worker runs it, so with more checks
+    than workers the queued ones are not cut short.
+    """
+    results = [ProbeResult(probe) for probe in probes]
+    checks = [
+        (result, name, check)
+        for result in results
+        for name, check in result.probe.get_checks().items()
+    ]
+    if not checks:
+        return results
+    workers = min(len(checks), MAX_WORKERS)
+    with ft.ThreadPoolExecutor(workers, thread_name_prefix="[probe]") as executor:
+        futures = {
+            executor.submit(check, timeout): (result, name)
+            for result, name, check in checks
+        }
+        for future in ft.as_completed(futures):
+            result, name = futures[future]
+            try:
+                result.latencies[name] = future.result()
+            except Exception as e:
+                result.errors[name] = str(e) or type(e).__name__
+    return results
+
+
+def _get_probes(conf: MainConfig) -> list[HostProbe]:
+    probes = [
+        HostProbe.tcp(resource.name, resource.device_ip, get_device_ports(resource))
+        for resource in conf.iter_resources_conf()
         if resource.device_ip
-    }
+    ]
     if conf.ftp_conf:
-        resources_to_check["FTP"] = conf.ftp_conf.netloc
+        probes.append(
+            HostProbe.tcp("FTP", conf.ftp_conf.hostname, (conf.ftp_conf.port or 21,))
+        )
     if conf.scp_conf:
-        resources_to_check["SCP"] = conf.scp_conf.netloc
+        probes.append(
+            HostProbe.tcp("SCP", conf.scp_conf.hostname, (conf.scp_conf.port or 22,))
+        )
     if conf.tftp_conf:
-        resources_to_check["TFTP"] = conf.tftp_conf.netloc
+        host, port = conf.tftp_conf.hostname, conf.tftp_conf.port or 69
+        probes.append(
+            HostProbe(
+                "TFTP",
+                host,
+                {f"UDP {port}": lambda timeout: check_tftp_port(host, port, timeout)},
+            )
+        )
     if conf.do_conf:
-        resources_to_check["Do"] = conf.do_conf.host
+        probes.append(HostProbe.tcp("Do", conf.do_conf.host, CS_PORTS, True))
     else:
-        resources_to_check["CloudShell"] = conf.cs_conf.host
+        cs_ports = CS_PORTS
+        if conf.cs_conf.os_user and conf.cs_conf.os_password:
+            cs_ports = (*CS_PORTS, CS_SMB_PORT)
+        probes.append(HostProbe.tcp("CloudShell", conf.cs_conf.host, cs_ports, True))
+    return probes
+
+
+def check_all_resources_is_alive(conf: MainConfig, timeout: float = PROBE_TIMEOUT):
+    logger.info("Checking that the devices and servers are alive")
+    results = probe_hosts(_get_probes(conf), timeout)
+    for result in results:
+        logger.info(str(result))
 
-    for name, host in resources_to_check.items():
-        if not _is_host_alive(host):
-            raise ResourceIsNotAliveError(f"{name} ({host}) is not alive, check it")
+    failed = [result for result in results if not result.is_alive]
+    if failed:
+        failed_str = "\n".join(map(str, failed))
+        raise ResourceIsNotAliveError(f"Hosts are not alive, check them:\n{failed_str}")
@@ -0,0 +1,82 @@
+from collections import defaultdict
+from queue import Empty, SimpleQueue
+from threading import Lock, Thread
+
+from shell_tests.handlers.abc_remote_file_handler import AbcRemoteFileHandler
+from shell_tests.helpers.logger import logger
+
+_STOP = object()
+
+
+class CleanupQueue:
+    """Deletes saved artifacts in the background.
+
+    The worker waits until the tests stop adding files for BATCH_DELAY
+    seconds, so it doesn't compete with the tests for the servers, and
+    deletes the files in batches, one batch per handler.
+    """
+
+    BATCH_DELAY = 5
+    MAX_BATCH_SIZE = 100
+
+    def __init__(self):
+        self._queue = SimpleQueue()
+        self._lock = Lock()
+        self._thread: Thread | None = None
+        self.deleted = 0
+
+    def add(self, handler: AbcRemoteFileHandler, file_name: str):
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(
+                    target=self._run,
+                    args=(self._queue,),
+                    name="[cleanup-queue]",
+                    daemon=True,
+                )
+                self._thread.start()
+            self._queue.put((handler, file_name))
+
+    def _get_batch(
+        self, queue: SimpleQueue
+    ) -> tuple[list[tuple[AbcRemoteFileHandler, str]], bool]:
+        batch = []
+        item = queue.get()
+        while item is not _STOP:
+            batch.append(item)
+            if len(batch) >= self.MAX_BATCH_SIZE:
+                return batch, False
+            try:
+                item = queue.get(timeout=self.BATCH_DELAY)
+            except Empty:
+                return batch, False
+        return batch, True
+
+    def _delete(self, batch: list[tuple[AbcRemoteFileHandler, str]]):
+        files_by_handler = defaultdict(list)
+        for handler, file_name in batch:
+            files_by_handler[handler].append(file_name)
+        for handler, file_names in files_by_handler.items():
+            try:
+                handler.delete_files(file_names)
+            except Exception:
+                logger.exception(f"Failed to delete files {file_names}")
+            else:
+                self.deleted += len(file_names)
+
+    def _run(self, queue: SimpleQueue):
+        stopped = False
+        while not stopped:
+            batch, stopped = self._get_batch(queue)
+            self._delete(batch)
+
+    def flush(self):
+        """Delete all the queued files and stop the worker."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._queue.put(_STOP)
+            self._queue = SimpleQueue()
+        thread.join()
+        logger.info(f"Cleanup queue deleted {self.deleted} files")
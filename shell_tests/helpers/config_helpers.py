@@ -1,2 +1,89 @@
+import os
+import pickle
+import tempfile
+from collections.abc import Callable
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from shell_tests.helpers.logger import logger
+
+
 def str_version_to_tuple(version: str) -> tuple[int]:
     return tuple(map(int, version.split(".")))
+
+
+def get_cache_dir(name: str) -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "shell_tests" / name
+
+
+def replace_file(path: Path, write_func: Callable[[BinaryIO], Any]):
+    """Write to a unique temp file near the path and replace the path with it.
+
+    Every writer has its own temp file, so concurrent runs writing the same
+    path don't break each other, the last replace wins.
+    """
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as tmp_fo:
+        try:
+            write_func(tmp_fo)
+        except BaseException:
+            tmp_fo.close()
+            os.unlink(tmp_fo.name)
+            raise
+    try:
+        os.replace(tmp_fo.name, path)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(tmp_fo.name)
+        raise
+
+
+def remove_old_files(dir_path: Path, pattern: str, max_files: int):
+    """Keep only max_files of the last used files, others could remove them too."""
+    mtimes = {}
+    for path in dir_path.glob(pattern):
+        with suppress(FileNotFoundError):
+            mtimes[path] = path.stat().st_mtime
+    for path in sorted(mtimes, key=mtimes.get)[:-max_files]:
+        path.unlink(missing_ok=True)
+
+
+class ConfigCache:
+    """Pickled validated configs, only the last MAX_FILES are kept.
+
+    The cache is shared by concurrent runs and could be read-only, so
+    errors are logged and the config is parsed again.
+    """
+
+    MAX_FILES = 20
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+
+    def _get_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pickle"
+
+    def load(self, key: str) -> Any | None:
+        path = self._get_path(key)
+        try:
+            with path.open("rb") as f:
+                obj = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Cannot load cached config {path.name}, {e}")
+            return None
+        try:
+            path.touch()
+        except OSError as e:
+            logger.debug(f"Cannot touch cached config {path.name}, {e}")
+        return obj
+
+    def save(self, key: str, obj: Any):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            replace_file(self._get_path(key), lambda f: pickle.dump(obj, f))
+            remove_old_files(self.cache_dir, "*.pickle", self.MAX_FILES)
+        except OSError as e:
+            logger.warning(f"Cannot cache config {key}, {e}")
@@ -1,16 +1,21 @@
 import concurrent.futures as ft
 import re
+import time
 from typing import TYPE_CHECKING
 
 from shell_tests.configs import SandboxConfig
-from shell_tests.errors import BaseAutomationException
+from shell_tests.errors import BaseAutomationException, DependenciesBrokenError
 from shell_tests.handlers.sandbox_handler import SandboxHandler
 from shell_tests.helpers.dependencies_helpers import patch_dependencies
 from shell_tests.helpers.logger import logger
 from shell_tests.helpers.package_api import BP_SCRIPT_PATH
+from shell_tests.helpers.threads_helper import set_thread_name_with_suffix
+from shell_tests.report_result import VenvReport
 
 if TYPE_CHECKING:
+    from shell_tests.handlers.cs_handler import CloudShellHandler
     from shell_tests.handlers.resource_handler import ResourceHandler
+    from shell_tests.handlers.smb_handler import CloudShellSmbHandler
     from shell_tests.helpers.handler_storage import HandlerStorage
 
 
@@ -26,20 +31,56 @@ def generate_new_resource_name(name: str) -> str:
     return f"{name}-{version + 1}"
 
 
-def _set_debug_log_level_for_resource(
-    resource: "ResourceHandler",
-    sandbox: SandboxHandler,
-    handler_storage: "HandlerStorage",
-):
+def _create_venv_for_resource(
+    resource: "ResourceHandler", sandbox: SandboxHandler
+) -> VenvReport:
+    set_thread_name_with_suffix(resource.model)
     sandbox.add_resource_to_reservation(resource)
+    is_success, error = True, ""
+    start_time = time.monotonic()
+    try:
+        # run some command for creating venv
+        resource.health_check()
+    except DependenciesBrokenError as e:
+        is_success, error = False, f"Dependencies are broken {e}"
+    except Exception as e:
+        # the venv is created even if the device isn't reachable
+        logger.warning(f"Health check for the {resource.name} failed, {e}")
+    build_time = time.monotonic() - start_time
+    sandbox.remove_resource_from_reservation(resource)
+    logger.info(f"venv for the {resource.model} is built in {build_time:.1f}s")
+    return VenvReport(
+        resource.conf.shell_name, resource.model, build_time, is_success, error
+    )
+
 
-    # run some command for creating venv
-    resource.health_check()
+def prewarm_venvs(handler_storage: "HandlerStorage") -> list[VenvReport]:
+    """Create driver venvs on the execution server before running tests.
+
+    The first command for a model builds its venv, so it's run for one
+    resource of each model and driver in a temp sandbox and the build time
+    isn't counted in the tests.
+    """
+    resources = {
+        (rh.model, rh.driver_hash): rh for rh in handler_storage.resource_handlers
+    }
+    if not resources:
+        return []
+    logger.info(f"Creating venvs for {len(resources)} drivers")
+    sandbox_conf = SandboxConfig(Name="venv-prewarm", Resources=[])
+    temp_sandbox = SandboxHandler.create(sandbox_conf, handler_storage.cs_handler)
+    try:
+        return _run_in_pool(
+            _create_venv_for_resource,
+            [(rh, temp_sandbox) for rh in resources.values()],
+            "[venv-prewarm]",
+        )
+    finally:
+        temp_sandbox.finish(wait=False)
 
-    # find venv
 
+def _find_venv_name(resource: "ResourceHandler", venv_names: list[str]) -> str:
     prefix_venv_name = f"{resource.model.replace(' ', '_')}_"
-    venv_names = handler_storage.cs_smb_handler.get_venv_names()
     suitable_venv_names = [
         venv_name for venv_name in venv_names if venv_name.startswith(prefix_venv_name)
     ]
@@ -47,50 +88,91 @@ def _set_debug_log_level_for_resource(
         raise BaseAutomationException(
             f"venv for the {resource.name} is not found. venv names are {venv_names}"
         )
-    venv_name = max(
+    return max(
         suitable_venv_names,
         key=lambda name: int(name.replace(prefix_venv_name, "").split("_")[0]),
     )
 
-    # change qs_config.ini
+
+def _set_debug_log_level_for_venv(venv_name: str, handler_storage: "HandlerStorage"):
     data = handler_storage.cs_smb_handler.get_qs_config(venv_name)
-    data = data.replace(b"LOG_LEVEL='INFO'", b"LOG_LEVEL='DEBUG'")
-    handler_storage.cs_smb_handler.put_qs_config(venv_name, data)
+    new_data = data.replace(b"LOG_LEVEL='INFO'", b"LOG_LEVEL='DEBUG'")
+    if new_data == data:
+        logger.debug(f"Log level for the venv {venv_name} is not changed")
+        return
+    handler_storage.cs_smb_handler.put_qs_config(venv_name, new_data)
 
 
-def _set_log_level_via_sandbox(handler_storage: "HandlerStorage"):
+def _run_in_pool(
+    func, args_list: list[tuple], thread_name_prefix: str = "[set-debug-level]"
+) -> list:
+    with ft.ThreadPoolExecutor(5, thread_name_prefix=thread_name_prefix) as executor:
+        futures = [executor.submit(func, *args) for args in args_list]
+        ft.wait(futures)
+        return [future.result() for future in futures]
+
+
+def _set_log_level_via_sandbox(
+    handler_storage: "HandlerStorage", venv_reports: list[VenvReport] | None
+):
     logger.info(
         "Setting debug log level via creating virtualenv and changing qs_config.ini"
     )
-    sandbox_conf = SandboxConfig(Name="tmp-sandbox", Resources=[])
-    temp_sandbox = SandboxHandler.create(sandbox_conf, handler_storage.cs_handler)
+    if venv_reports is None:
+        venv_reports = prewarm_venvs(handler_storage)
+    built_models = {report.model for report in venv_reports if report.is_success}
+    # resources of the same model share the venv
+    resources = {
+        rh.model: rh
+        for rh in handler_storage.resource_handlers
+        if rh.model in built_models
+    }
+    venv_names = handler_storage.cs_smb_handler.get_venv_names()
+    suitable_venv_names = {_find_venv_name(rh, venv_names) for rh in resources.values()}
+    _run_in_pool(
+        _set_debug_log_level_for_venv,
+        [(venv_name, handler_storage) for venv_name in suitable_venv_names],
+    )
 
-    try:
-        with ft.ThreadPoolExecutor(
-            5, thread_name_prefix="[set-debug-level]"
-        ) as executor:
-            futures = {
-                executor.submit(
-                    _set_debug_log_level_for_resource, rh, temp_sandbox, handler_storage
-                )
-                for rh in handler_storage.resource_handlers
-            }
-            ft.wait(futures)
-            for future in futures:
-                future.result()
-    finally:
-        temp_sandbox.finish(wait=False)
 
+def set_debug_log_level(
+    handler_storage: "HandlerStorage", venv_reports: list[VenvReport] | None = None
+):
+    """Set debug log level for the drivers.
 
-def set_debug_log_level(handler_storage: "HandlerStorage"):
+    venv_reports are the reports of prewarm_venvs, if they are passed the
+    venvs aren't created again.
+    """
     if any(conf.dependencies_path for conf in handler_storage.conf.shells_conf):
         for conf in handler_storage.conf.shells_conf:
             patch_dependencies(conf.dependencies_path)
     else:
-        _set_log_level_via_sandbox(handler_storage)
+        _set_log_level_via_sandbox(handler_storage, venv_reports)
 
 
-def set_debug_level_via_blueprint(cs):
+def _is_execution_server_in_debug(cs_smb_handler: "CloudShellSmbHandler") -> bool:
+    try:
+        log_level = cs_smb_handler.get_execution_server_log_level()
+    except Exception as e:
+        logger.warning(f"Cannot get the Execution Server log level, {e}")
+        return False
+    logger.debug(f"The Execution Server log level is {log_level}")
+    return log_level == "DEBUG"
+
+
+def set_debug_level_via_blueprint(
+    cs: "CloudShellHandler", cs_smb_handler: "CloudShellSmbHandler | None" = None
+):
+    """Set debug log level for the Execution Server, it restarts the server.
+
+    Skipped if the log level is already DEBUG, it's checked via SMB.
+    """
+    if cs_smb_handler and _is_execution_server_in_debug(cs_smb_handler):
+        logger.info("The Execution Server log level is already DEBUG")
+        return
     cs.import_package(BP_SCRIPT_PATH)
     rid = cs.create_topology_reservation("scripts", topology_name="scripts")
-    cs.execute_reservation_command(rid, "set_debug_logs")
+    try:
+        cs.execute_reservation_command(rid, "set_debug_logs")
+    finally:
+        cs.end_reservation(rid, "scripts", wait=False)
@@ -1,29 +1,94 @@
+import copy
 import re
+import shutil
+import struct
+import warnings
+import zipfile
 from io import BytesIO
 from pathlib import Path
-from zipfile import ZipFile
+from typing import BinaryIO
+from zipfile import ZipFile, ZipInfo
 
+from shell_tests.helpers.config_helpers import (
+    get_cache_dir,
+    remove_old_files,
+    replace_file,
+)
 from shell_tests.helpers.logger import logger
+from shell_tests.helpers.shell_helpers import get_file_sha256
 
 LOGGING_PATTERN = re.compile(r"^cloudshell[-_]logging-", flags=re.IGNORECASE)
+CHUNK_SIZE = 1024 * 1024
+CACHE_MAX_FILES = 5
+# zipfile doesn't export these, so they are defined from the zip spec
+_DATA_DESCRIPTOR_FLAG = 0x08
+_ZIP64_EXTRA_ID = 1
+_EXTRA_HEADER = struct.Struct("<HH")
 
 
-def gen_new_zip_with_replacement(
-    zip_file: ZipFile, replacements: dict[str, bytes]
-) -> bytes:
-    buffer = BytesIO()
-    with ZipFile(buffer, mode="w") as new_zip:
-        for file_name in zip_file.namelist():
-            if file_name in replacements:
-                if replacements[file_name] is None:
-                    continue  # do not add this file; "remove it"
-                else:
-                    data = replacements[file_name]
-            else:
-                data = zip_file.read(file_name)
-            new_zip.writestr(file_name, data)
-    buffer.seek(0)
-    return buffer.read()
+def _strip_zip64_extra(extra: bytes) -> bytes:
+    """Remove the zip64 extra field, FileHeader adds it again if it's needed."""
+    fields = []
+    i = 0
+    while i + _EXTRA_HEADER.size <= len(extra):
+        field_id, size = _EXTRA_HEADER.unpack_from(extra, i)
+        end = i + _EXTRA_HEADER.size + size
+        if field_id != _ZIP64_EXTRA_ID:
+            fields.append(extra[i:end])
+        i = end
+    return b"".join(fields)
+
+
+def _copy_raw_member(src_zip: ZipFile, dst_zip: ZipFile, info: ZipInfo):
+    """Copy the compressed member data without decompressing it.
+
+    ZipFile doesn't have an API for this, so it depends on CPython zipfile
+    internals: ZipFile.fp, filelist, NameToInfo, start_dir and
+    ZipInfo.FileHeader. ZipFile._writecheck is skipped, so duplicate names
+    are checked here. Zip64 is allowed, dst_zip is opened with the default
+    allowZip64=True.
+    """
+    if info.filename in dst_zip.NameToInfo:
+        warnings.warn(f"Duplicate name: {info.filename!r}", stacklevel=2)
+    src_zip.fp.seek(info.header_offset)
+    fheader = struct.unpack(
+        zipfile.structFileHeader, src_zip.fp.read(zipfile.sizeFileHeader)
+    )
+    # the file name and the extra field lengths are the last fields
+    src_zip.fp.seek(fheader[-2] + fheader[-1], 1)
+
+    new_info = copy.copy(info)
+    # sizes are known, so the data descriptor isn't needed
+    new_info.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+    new_info.extra = _strip_zip64_extra(info.extra)
+    zip64 = max(info.file_size, info.compress_size) > zipfile.ZIP64_LIMIT
+    new_info.header_offset = dst_zip.fp.tell()
+    dst_zip.fp.write(new_info.FileHeader(zip64))
+    left = info.compress_size
+    while left:
+        chunk = src_zip.fp.read(min(left, CHUNK_SIZE))
+        dst_zip.fp.write(chunk)
+        left -= len(chunk)
+    dst_zip.filelist.append(new_info)
+    dst_zip.NameToInfo[new_info.filename] = new_info
+    dst_zip.start_dir = dst_zip.fp.tell()
+
+
+def copy_zip_with_replacement(
+    zip_file: ZipFile, dst_fo: BinaryIO, replacements: dict[str, bytes | None]
+):
+    """Copy the zip, only replaced members are compressed again.
+
+    None in replacements removes the member.
+    """
+    with ZipFile(dst_fo, mode="w") as new_zip:
+        for info in zip_file.infolist():
+            if info.filename not in replacements:
+                _copy_raw_member(zip_file, new_zip, info)
+            elif replacements[info.filename] is not None:
+                new_info = copy.copy(info)
+                new_info.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+                new_zip.writestr(new_info, replacements[info.filename])
 
 
 def get_new_config_and_path(zip_file: ZipFile) -> tuple[bytes, str]:
@@ -44,20 +109,60 @@ def get_new_config_and_path(zip_file: ZipFile) -> tuple[bytes, str]:
     return data, config_path
 
 
+def _patch_logging_package(dep_zip: ZipFile, package_name: str) -> bytes:
+    # the logging package is small, it's patched in memory
+    with ZipFile(BytesIO(dep_zip.read(package_name))) as logging_zip:
+        logging_zip.filename = package_name
+        config_data, config_path = get_new_config_and_path(logging_zip)
+        buffer = BytesIO()
+        copy_zip_with_replacement(logging_zip, buffer, {config_path: config_data})
+    return buffer.getvalue()
+
+
+def _save_to_cache(cache_dir: Path, key: str, path: Path):
+    """Save the patched zip, the cache is best-effort so errors are logged."""
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with path.open("rb") as src_fo:
+            replace_file(
+                cache_dir / f"{key}.zip", lambda fo: shutil.copyfileobj(src_fo, fo)
+            )
+        remove_old_files(cache_dir, "*.zip", CACHE_MAX_FILES)
+    except OSError as e:
+        logger.warning(f"Cannot cache patched dependencies {path.name}, {e}")
+
+
+def _open_cached(cached_path: Path) -> BinaryIO | None:
+    try:
+        cached_fo = cached_path.open("rb")
+    except OSError:
+        return None
+    try:
+        cached_path.touch()
+    except OSError as e:
+        logger.debug(f"Cannot touch cached dependencies {cached_path.name}, {e}")
+    return cached_fo
+
+
 def patch_dependencies(path: Path):
     msg = f"Changing log level to debug via changing dependencies {path.name}"
     logger.info(msg)
-    replacements = {}
+    cache_dir = get_cache_dir("dependencies")
+    input_hash = get_file_sha256(path)
+    cached_fo = _open_cached(cache_dir / f"{input_hash}.zip")
+    if cached_fo is not None:
+        logger.debug(f"Using cached patched dependencies for {path.name}")
+        with cached_fo:
+            replace_file(path, lambda fo: shutil.copyfileobj(cached_fo, fo))
+        return
+
     with ZipFile(path) as dep_zip:
-        for package_name in dep_zip.namelist():
-            if LOGGING_PATTERN.search(package_name):
-                with ZipFile(dep_zip.open(package_name)) as logging_zip:
-                    config_data, config_path = get_new_config_and_path(logging_zip)
-                    new_logging = gen_new_zip_with_replacement(
-                        logging_zip, {config_path: config_data}
-                    )
-                replacements[package_name] = new_logging
-        new_dependencies = gen_new_zip_with_replacement(dep_zip, replacements)
-
-    with path.open("wb") as dep_zip_fo:
-        dep_zip_fo.write(new_dependencies)
+        replacements = {
+            package_name: _patch_logging_package(dep_zip, package_name)
+            for package_name in dep_zip.namelist()
+            if LOGGING_PATTERN.search(package_name)
+        }
+        replace_file(
+            path, lambda fo: copy_zip_with_replacement(dep_zip, fo, replacements)
+        )
+    _save_to_cache(cache_dir, input_hash, path)
@@ -0,0 +1,76 @@
+from collections import defaultdict
+from threading import Event, Thread
+
+from shell_tests.handlers.resource_handler import ResourceHandler
+from shell_tests.helpers.check_resource_is_alive import (
+    HostProbe,
+    get_device_ports,
+    probe_hosts,
+)
+from shell_tests.helpers.logger import logger
+
+
+class DeviceMonitor:
+    """Probes the devices in the background during the run.
+
+    A device is marked down after FAILURES_TO_DOWN failed probes in a row,
+    so commands for its resources wait for it instead of failing after the
+    session timeout. It's marked up after the first successful probe.
+    """
+
+    INTERVAL = 10
+    PROBE_TIMEOUT = 3
+    FAILURES_TO_DOWN = 2
+
+    def __init__(self, resource_handlers: list[ResourceHandler]):
+        self._handlers_by_ip: dict[str, list[ResourceHandler]] = defaultdict(list)
+        # resources of the device could use different CLI ports
+        self._ports_by_ip: dict[str, set[int]] = defaultdict(set)
+        for handler in resource_handlers:
+            if handler.conf.device_ip:
+                self._handlers_by_ip[handler.conf.device_ip].append(handler)
+                self._ports_by_ip[handler.conf.device_ip].update(
+                    get_device_ports(handler.conf)
+                )
+        self._failures = dict.fromkeys(self._handlers_by_ip, 0)
+        self._stopped = Event()
+        self._thread: Thread | None = None
+
+    def probe(self):
+        probes = [
+            # ping is a subprocess per device, so it's only used without ports
+            HostProbe.tcp(ip, ip, tuple(sorted(ports)), icmp=False)
+            for ip, ports in self._ports_by_ip.items()
+        ]
+        for result in probe_hosts(probes, self.PROBE_TIMEOUT):
+            ip = result.probe.host
+            if result.is_alive:
+                self._failures[ip] = 0
+            else:
+                self._failures[ip] += 1
+                logger.debug(str(result))
+            is_reachable = self._failures[ip] < self.FAILURES_TO_DOWN
+            for handler in self._handlers_by_ip[ip]:
+                handler.set_reachable(is_reachable)
+
+    def _run(self):
+        while not self._stopped.wait(self.INTERVAL):
+            try:
+                self.probe()
+            except Exception:
+                logger.exception("Device monitor failed to probe the devices")
+
+    def start(self):
+        if self._handlers_by_ip and self._thread is None:
+            logger.info(f"Start monitoring {len(self._handlers_by_ip)} devices")
+            self._stopped.clear()
+            self._thread = Thread(
+                target=self._run, name="[device-monitor]", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
@@ -1,50 +1,206 @@
 import atexit
+import hashlib
+import json
+import shutil
 import tempfile
-from contextlib import suppress
-from functools import cached_property
+import time
+from collections.abc import Iterable
+from concurrent import futures as ft
+from functools import cache, cached_property
 from pathlib import Path
+from threading import Lock
+from urllib.error import HTTPError
 from urllib.parse import urlparse
-from urllib.request import urlretrieve
+from urllib.request import Request, urlopen
 
+from shell_tests.helpers.config_helpers import get_cache_dir, replace_file
 from shell_tests.helpers.logger import logger
 
+CHUNK_SIZE = 1024 * 1024
+
 
 def get_file_name(url: str) -> str:
     return Path(urlparse(url).path).name
 
 
-class DownloadFile:
-    downloaded_files: list["DownloadFile"] = []
+class DownloadCache:
+    """Persistent content-addressed cache of downloaded files.
 
-    def __init__(self, path_str: str):
-        self.original_path = path_str
+    Files are stored as <sha256>/<file name>, the index maps URLs to them
+    with ETag and Last-Modified that are used for conditional GETs.
+    Least recently used files are evicted when the cache is bigger than
+    max_size. Each URL is downloaded once per process, downloads run in a
+    pool so all the files can be prefetched.
+    """
+
+    INDEX_NAME = "index.json"
+    WORKERS = 4
+
+    def __init__(self, cache_dir: Path, max_size: int = 2 * 1024**3):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._lock = Lock()
+        self._futures: dict[str, ft.Future] = {}
+        self._executor = ft.ThreadPoolExecutor(
+            self.WORKERS, thread_name_prefix="[download]"
+        )
 
     @cached_property
-    def tmp_dir(self) -> Path:
-        path = Path(tempfile.gettempdir()) / "shell_tests"
-        path.mkdir(exist_ok=True)
-        return path
+    def _index_path(self) -> Path:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        return self.cache_dir / self.INDEX_NAME
+
+    def _load_index(self) -> dict[str, dict]:
+        try:
+            return json.loads(self._index_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index: dict[str, dict]):
+        data = json.dumps(index, indent=2).encode()
+        try:
+            replace_file(self._index_path, lambda f: f.write(data))
+        except OSError as e:
+            # the file is downloaded, it's only not cached for the next runs
+            logger.warning(f"Cannot save the download cache index, {e}")
+
+    def _get_entry_path(self, entry: dict) -> Path:
+        return self.cache_dir / entry["sha256"] / entry["name"]
+
+    def _get_cached_entry(self, url: str) -> dict | None:
+        with self._lock:
+            entry = self._load_index().get(url)
+        if entry and self._get_entry_path(entry).is_file():
+            return entry
+        return None
+
+    def _update_entry(self, url: str, entry: dict):
+        entry["last_used"] = time.time()
+        with self._lock:
+            index = self._load_index()
+            index[url] = entry
+            self._evict(index)
+            self._save_index(index)
+
+    def _evict(self, index: dict[str, dict]):
+        """Remove least recently used files that aren't used by this run."""
+        in_use = set(self._futures)
+        sizes = {entry["sha256"]: entry["size"] for entry in index.values()}
+        cache_size = sum(sizes.values())
+        for url, entry in sorted(index.items(), key=lambda i: i[1]["last_used"]):
+            if cache_size <= self.max_size:
+                break
+            if url in in_use:
+                continue
+            del index[url]
+            sha256 = entry["sha256"]
+            if all(e["sha256"] != sha256 for e in index.values()):
+                logger.debug(f"Evicting {entry['name']} from the download cache")
+                shutil.rmtree(self.cache_dir / sha256, ignore_errors=True)
+                cache_size -= sizes[sha256]
 
     @staticmethod
-    def _is_url(url: str) -> bool:
-        return urlparse(url).scheme in ("http", "https", "ftp", "ftps", "tftp")
+    def _get_conditional_headers(entry: dict | None) -> dict[str, str]:
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
 
-    @cached_property
-    def path(self) -> Path:
-        if not self._is_url(self.original_path):
-            return Path(self.original_path)
+    def _download(self, url: str) -> Path:
+        entry = self._get_cached_entry(url)
+        is_http = urlparse(url).scheme in ("http", "https")
+        headers = self._get_conditional_headers(entry) if is_http else {}
+        name = get_file_name(url)
+        try:
+            resp = urlopen(Request(url, headers=headers))
+        except HTTPError as e:
+            if e.code != 304:
+                raise
+            logger.info(f"File {name} is not modified, using the cached one")
+            self._update_entry(url, entry)
+            return self._get_entry_path(entry)
 
-        path = self.tmp_dir / get_file_name(self.original_path)
-        logger.info(f"Downloading a file {path.name}")
-        urlretrieve(self.original_path, path)
-        self.downloaded_files.append(self)
+        logger.info(f"Downloading a file {name}")
+        sha256 = hashlib.sha256()
+        size = 0
+        with resp, tempfile.NamedTemporaryFile(dir=self.cache_dir, delete=False) as f:
+            try:
+                while chunk := resp.read(CHUNK_SIZE):
+                    f.write(chunk)
+                    sha256.update(chunk)
+                    size += len(chunk)
+            except BaseException:
+                Path(f.name).unlink()
+                raise
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+
+        new_entry = {
+            "sha256": sha256.hexdigest(),
+            "name": name,
+            "size": size,
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+        path = self._get_entry_path(new_entry)
+        path.parent.mkdir(exist_ok=True)
+        Path(f.name).replace(path)
+        self._update_entry(url, new_entry)
         return path
 
+    def _get_future(self, url: str) -> ft.Future:
+        with self._lock:
+            future = self._futures.get(url)
+            if future is None:
+                future = self._executor.submit(self._download, url)
+                self._futures[url] = future
+        return future
+
+    def prefetch(self, urls: Iterable[str]):
+        """Start downloading the files in background."""
+        for url in urls:
+            self._get_future(url)
 
-def remove_downloaded_files():
-    for path in DownloadFile.downloaded_files:
-        with suppress(PermissionError):
-            path.path.unlink(missing_ok=True)
+    def get(self, url: str) -> Path:
+        return self._get_future(url).result()
 
 
-atexit.register(remove_downloaded_files)
+download_cache = DownloadCache(get_cache_dir("downloads"))
+
+
+@cache
+def get_run_dir() -> Path:
+    """Temp dir of the run, it's removed at exit."""
+    path = Path(tempfile.mkdtemp(prefix="shell_tests-"))
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+def is_url(url: str) -> bool:
+    return urlparse(url).scheme in ("http", "https", "ftp", "ftps", "tftp")
+
+
+def prefetch_files(paths: Iterable[str]):
+    download_cache.prefetch(filter(is_url, paths))
+
+
+class DownloadFile:
+    """Local file or the file downloaded from the URL.
+
+    The downloaded file is a copy of the cached one in the run dir, so it
+    can be changed by the run without breaking the cache.
+    """
+
+    def __init__(self, path_str: str):
+        self.original_path = path_str
+
+    @cached_property
+    def path(self) -> Path:
+        if not is_url(self.original_path):
+            return Path(self.original_path)
+        cached_path = download_cache.get(self.original_path)
+        path = Path(tempfile.mkdtemp(dir=get_run_dir())) / cached_path.name
+        shutil.copyfile(cached_path, path)
+        return path
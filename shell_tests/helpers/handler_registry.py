@@ -0,0 +1,73 @@
+from collections import defaultdict
+from collections.abc import Mapping
+from threading import RLock
+from types import MappingProxyType
+from typing import TYPE_CHECKING
+
+from shell_tests.configs import MainConfig
+
+if TYPE_CHECKING:
+    from shell_tests.handlers.resource_handler import ResourceHandler
+    from shell_tests.handlers.sandbox_handler import SandboxHandler
+    from shell_tests.handlers.shell_handler import ShellHandler
+
+
+class HandlerRegistry:
+    """Handlers with indexes that are updated when handlers are changed.
+
+    Handlers are indexed by the config name, resources also by the sandboxes
+    they are configured in. The mappings are read-only views, handlers are
+    changed only through the registry.
+    """
+
+    def __init__(self, conf: MainConfig):
+        self._lock = RLock()
+        self._shells: dict[str, "ShellHandler"] = {}
+        self._resources: dict[str, "ResourceHandler"] = {}
+        self._sandboxes: dict[str, "SandboxHandler"] = {}
+        self._resources_by_sandbox: dict[str, list["ResourceHandler"]] = defaultdict(
+            list
+        )
+        self._sandbox_names_by_resource: dict[str, list[str]] = defaultdict(list)
+        for sandbox_conf in conf.iter_sandboxes_conf():
+            for resource_name in sandbox_conf.resource_names:
+                self._sandbox_names_by_resource[resource_name].append(sandbox_conf.name)
+
+    @property
+    def shells(self) -> Mapping[str, "ShellHandler"]:
+        return MappingProxyType(self._shells)
+
+    @property
+    def resources(self) -> Mapping[str, "ResourceHandler"]:
+        return MappingProxyType(self._resources)
+
+    @property
+    def sandboxes(self) -> Mapping[str, "SandboxHandler"]:
+        return MappingProxyType(self._sandboxes)
+
+    def add_shell(self, handler: "ShellHandler"):
+        with self._lock:
+            self._shells[handler.conf.name] = handler
+
+    def add_sandbox(self, handler: "SandboxHandler"):
+        with self._lock:
+            self._sandboxes[handler.conf.name] = handler
+
+    def add_resource(self, handler: "ResourceHandler"):
+        with self._lock:
+            self._resources[handler.conf.name] = handler
+            for sandbox_name in self._sandbox_names_by_resource[handler.conf.name]:
+                self._resources_by_sandbox[sandbox_name].append(handler)
+
+    def remove_resource(self, handler: "ResourceHandler"):
+        """Remove the resource, do nothing if it isn't registered."""
+        with self._lock:
+            if self._resources.get(handler.conf.name) is not handler:
+                return
+            del self._resources[handler.conf.name]
+            for sandbox_name in self._sandbox_names_by_resource[handler.conf.name]:
+                self._resources_by_sandbox[sandbox_name].remove(handler)
+
+    def get_resources_by_sandbox(self, sandbox_name: str) -> list["ResourceHandler"]:
+        with self._lock:
+            return list(self._resources_by_sandbox.get(sandbox_name, []))
@@ -1,5 +1,5 @@
+from collections.abc import Mapping
 from concurrent import futures as ft
-from typing import TypeVar
 
 from shell_tests.configs import MainConfig
 from shell_tests.handlers.cs_handler import CloudShellHandler
@@ -11,18 +11,16 @@ from shell_tests.handlers.shell_handler import ShellHandler
 from shell_tests.handlers.smb_handler import CloudShellSmbHandler
 from shell_tests.handlers.tftp_handler import TFTPHandler
 from shell_tests.handlers.vcenter_handler import VcenterHandler
-
-Handler = TypeVar("Handler")
-
-
-def _get_handlers_dict(handlers_lst: list[Handler]) -> dict[str, Handler]:
-    return {h.conf.name: h for h in handlers_lst}
+from shell_tests.helpers.cleanup_queue import CleanupQueue
+from shell_tests.helpers.handler_registry import HandlerRegistry
 
 
 class HandlerStorage:
     def __init__(self, cs_handler: CloudShellHandler, conf: MainConfig):
         self.cs_handler = cs_handler
         self.conf = conf
+        self.cleanup_queue = CleanupQueue()
+        self.registry = HandlerRegistry(conf)
 
         self._cs_smb_handler = None
         self._ftp_handler = None
@@ -90,6 +88,7 @@ class HandlerStorage:
                         exception = e
                     else:
                         self._shell_handlers.append(shell)
+                        self.registry.add_shell(shell)
 
             if exception:
                 self.finish()
@@ -97,12 +96,14 @@ class HandlerStorage:
         return self._shell_handlers
 
     @property
-    def shell_handlers_dict(self) -> dict[str, ShellHandler]:
-        return _get_handlers_dict(self.shell_handlers)
+    def shell_handlers_dict(self) -> Mapping[str, ShellHandler]:
+        _ = self.shell_handlers
+        return self.registry.shells
 
     @property
     def resource_handlers(self) -> list[ResourceHandler]:
         if self._resource_handlers is None:
+            shells = self.shell_handlers_dict
             self._resource_handlers = []
             exception = None
 
@@ -114,9 +115,9 @@ class HandlerStorage:
                         ResourceHandler.create,
                         conf,
                         self.cs_handler,
-                        self.shell_handlers_dict[conf.shell_name],
+                        shells[conf.shell_name],
                     )
-                    for conf in self.conf.resources_conf
+                    for conf in self.conf.iter_resources_conf()
                 }
 
                 for future in futures:
@@ -126,6 +127,7 @@ class HandlerStorage:
                         exception = e
                     else:
                         self._resource_handlers.append(resource)
+                        self.registry.add_resource(resource)
 
             if exception:
                 self.finish()
@@ -133,8 +135,9 @@ class HandlerStorage:
         return self._resource_handlers
 
     @property
-    def resource_handlers_dict(self) -> dict[str, ResourceHandler]:
-        return _get_handlers_dict(self.resource_handlers)
+    def resource_handlers_dict(self) -> Mapping[str, ResourceHandler]:
+        _ = self.resource_handlers
+        return self.registry.resources
 
     @property
     def sandbox_handlers(self) -> list[SandboxHandler]:
@@ -147,7 +150,7 @@ class HandlerStorage:
             ) as executor:
                 futures = {
                     executor.submit(SandboxHandler.create, conf, self.cs_handler)
-                    for conf in self.conf.sandboxes_conf
+                    for conf in self.conf.iter_sandboxes_conf()
                 }
 
                 for future in futures:
@@ -157,6 +160,7 @@ class HandlerStorage:
                         exception = e
                     else:
                         self._sandbox_handlers.append(sandbox)
+                        self.registry.add_sandbox(sandbox)
 
             if exception:
                 self.finish()
@@ -164,18 +168,25 @@ class HandlerStorage:
         return self._sandbox_handlers
 
     @property
-    def sandbox_handler_dict(self) -> dict[str, SandboxHandler]:
-        return _get_handlers_dict(self.sandbox_handlers)
+    def sandbox_handler_dict(self) -> Mapping[str, SandboxHandler]:
+        _ = self.sandbox_handlers
+        return self.registry.sandboxes
 
     def finish(self):
+        self.cleanup_queue.flush()
         if self._sandbox_handlers is not None:
             for sh in self.sandbox_handlers:
                 sh.finish()
         if self._resource_handlers is not None:
             for rh in self.resource_handlers:
                 rh.finish()
+                self.registry.remove_resource(rh)
         if self._shell_handlers is not None:
             for sh in self.shell_handlers:
                 sh.finish()
         if self._vcenter_handler is not None:
             self.vcenter_handler.finish()
+        if self._ftp_handler is not None:
+            self.ftp_handler.finish()
+        if self._scp_handler is not None:
+            self.scp_handler.finish()
@@ -2,7 +2,7 @@ import os
 import tempfile
 from contextlib import suppress
 from pathlib import Path
-from zipfile import ZipFile
+from zipfile import ZIP_DEFLATED, ZipFile
 
 from shell_tests.helpers.logger import logger
 from shell_tests.helpers.package_api import PYTHON_DRIVER_PATH
@@ -10,38 +10,51 @@ from shell_tests.helpers.package_api.models import App, Blueprint, MetaData
 
 
 class PackageApi:
-    def __init__(self, zip_path: Path):
-        self.zip_path = zip_path
+    """CloudShell package, documents are kept in memory until it's saved."""
+
+    def __init__(self):
+        self.zip_path: Path | None = None
+        self._documents: dict[str, str] = {}
         self._driver_added = False
 
     def finish(self):
-        with suppress(FileNotFoundError):
-            os.remove(self.zip_path)
+        if self.zip_path is not None:
+            with suppress(FileNotFoundError):
+                os.remove(self.zip_path)
+            self.zip_path = None
 
     def add_metadata(self, metadata: MetaData):
-        with ZipFile(self.zip_path, "a") as zf:
-            zf.writestr("metadata.xml", metadata.get_xml())
+        self._documents["metadata.xml"] = metadata.get_xml()
 
     def add_app(self, app: App):
         logger.info(f"Adding a new app {app.name} to the package")
-        with ZipFile(self.zip_path, "a") as zf:
-            zf.writestr(f"App Templates/{app.name}.xml", app.get_xml())
+        self._documents[f"App Templates/{app.name}.xml"] = app.get_xml()
 
     def add_blueprint(self, blueprint: Blueprint):
         self.add_python_driver()
         logger.info(f"Adding a new blueprint {blueprint.name} to the package")
-        with ZipFile(self.zip_path, "a") as zf:
-            zf.writestr(f"Topologies/{blueprint.name}.xml", blueprint.get_xml())
+        self._documents[f"Topologies/{blueprint.name}.xml"] = blueprint.get_xml()
 
     def add_python_driver(self):
         if not self._driver_added:
             logger.info("Add Python driver to the package")
-            with ZipFile(self.zip_path, "a") as zf:
-                zf.write(
-                    PYTHON_DRIVER_PATH, f"Topology Drivers/{PYTHON_DRIVER_PATH.name}"
-                )
             self._driver_added = True
 
+    def save(self) -> Path:
+        """Write the package to a temp zip file."""
+        self.finish()
+        with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as fo:
+            self.zip_path = Path(fo.name)
+            with ZipFile(fo, mode="w", compression=ZIP_DEFLATED) as zf:
+                for name, document in self._documents.items():
+                    zf.writestr(name, document)
+                if self._driver_added:
+                    zf.write(
+                        PYTHON_DRIVER_PATH,
+                        f"Topology Drivers/{PYTHON_DRIVER_PATH.name}",
+                    )
+        return self.zip_path
+
     def __enter__(self):
         return self
 
@@ -53,22 +66,6 @@ class PackageApi:
     @classmethod
     def create_package(cls, cs_version: str | None = None) -> "PackageApi":
         logger.info("Creating a new package")
-        path = None
-        try:
-            with tempfile.NamedTemporaryFile(delete=False) as fo:
-                path = fo.name
-            with ZipFile(path, mode="w"):
-                # creates empty zip file
-                pass
-        except Exception as e:
-            if path:
-                os.unlink(path)
-            raise e
-
-        package = cls(Path(path))
-        try:
-            package.add_metadata(MetaData(cs_version))
-        except Exception as e:
-            package.finish()
-            raise e
+        package = cls()
+        package.add_metadata(MetaData(cs_version))
         return package
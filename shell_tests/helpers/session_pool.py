@@ -0,0 +1,81 @@
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, suppress
+from threading import BoundedSemaphore, Lock
+from typing import Generic, TypeVar
+
+from shell_tests.helpers.logger import logger
+
+Session = TypeVar("Session")
+
+
+class SessionPool(Generic[Session]):
+    """Thread safe pool of sessions.
+
+    Idle sessions are checked with is_alive_fn only if they weren't used for
+    idle_timeout seconds. Sessions that raised a broken exception are closed.
+    """
+
+    def __init__(
+        self,
+        create_fn: Callable[[], Session],
+        is_alive_fn: Callable[[Session], bool],
+        close_fn: Callable[[Session], None],
+        size: int = 5,
+        idle_timeout: float = 30,
+        broken_exceptions: tuple[type[BaseException], ...] = (Exception,),
+    ):
+        self._create_fn = create_fn
+        self._is_alive_fn = is_alive_fn
+        self._close_fn = close_fn
+        self._idle_timeout = idle_timeout
+        self._broken_exceptions = broken_exceptions
+        self._semaphore = BoundedSemaphore(size)
+        self._lock = Lock()
+        self._idle_sessions: list[tuple[float, Session]] = []
+
+    def _close(self, session: Session):
+        with suppress(Exception):
+            self._close_fn(session)
+
+    def _get_idle_session(self) -> Session | None:
+        while True:
+            with self._lock:
+                if not self._idle_sessions:
+                    return None
+                last_used, session = self._idle_sessions.pop()
+            if time.monotonic() - last_used < self._idle_timeout:
+                return session
+            if self._is_alive_fn(session):
+                return session
+            logger.debug("Idle session is not alive, closing it")
+            self._close(session)
+
+    def _put_idle_session(self, session: Session):
+        with self._lock:
+            self._idle_sessions.append((time.monotonic(), session))
+
+    @contextmanager
+    def get(self) -> Iterator[Session]:
+        with self._semaphore:
+            session = self._get_idle_session()
+            if session is None:
+                session = self._create_fn()
+            try:
+                yield session
+            except BaseException as e:
+                if isinstance(e, self._broken_exceptions) or not isinstance(
+                    e, Exception
+                ):
+                    self._close(session)
+                else:
+                    self._put_idle_session(session)
+                raise
+            self._put_idle_session(session)
+
+    def close(self):
+        with self._lock:
+            sessions = [session for _, session in self._idle_sessions]
+            self._idle_sessions.clear()
+        for session in sessions:
+            self._close(session)
@@ -1,24 +1,171 @@
+import hashlib
+import json
 import zipfile
 from pathlib import Path
+from threading import Lock
 
 import yaml
 
+from shell_tests.helpers.config_helpers import (
+    ConfigCache,
+    get_cache_dir,
+    replace_file,
+)
 from shell_tests.helpers.logger import logger
 
+CHUNK_SIZE = 1024 * 1024
 
-def get_resource_model_from_shell_definition(shell_path: Path) -> str:
-    """Get resource family and model from shell-definition.yaml."""
-    with zipfile.ZipFile(shell_path) as zip_file:
-        data = yaml.safe_load(zip_file.read("shell-definition.yaml"))
 
-    node_type = next(iter(data["node_types"]))
-    model = node_type.rsplit(".", 1)[-1]
-    logger.debug(f"Model: {model} for the Shell {shell_path}")
-    return model
+def get_file_sha256(path: Path) -> str:
+    sha256 = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            sha256.update(chunk)
+    return sha256.hexdigest()
 
 
-def get_shell_name_from_shell_definition(shell_path: Path) -> str:
-    with zipfile.ZipFile(shell_path) as zip_file:
-        data = yaml.safe_load(zip_file.read("shell-definition.yaml"))
+class ShellPackage:
+    """Metadata of the Shell zip parsed from shell-definition.yaml.
 
-    return data["metadata"]["template_name"]
+    The definition is parsed once per zip content, packages are memoised in
+    the process and on disk by the zip sha256.
+    """
+
+    DEFINITION_NAME = "shell-definition.yaml"
+    REQUIREMENTS_NAME = "requirements.txt"
+
+    _cache = ConfigCache(get_cache_dir("shells"))
+    _packages: dict[str, "ShellPackage"] = {}
+    _lock = Lock()
+
+    def __init__(
+        self,
+        zip_hash: str,
+        template_name: str,
+        version: str,
+        node_types: list[str],
+        dependencies: list[str],
+        driver_hash: str | None,
+    ):
+        self.zip_hash = zip_hash
+        self.template_name = template_name
+        self.version = version
+        self.node_types = node_types
+        self.dependencies = dependencies
+        self.driver_hash = driver_hash
+
+    def __repr__(self) -> str:
+        return f"<ShellPackage {self.template_name} {self.version}>"
+
+    @property
+    def model(self) -> str:
+        return self.node_types[0].rsplit(".", 1)[-1]
+
+    @classmethod
+    def from_zip(cls, shell_path: Path) -> "ShellPackage":
+        zip_hash = get_file_sha256(shell_path)
+        with cls._lock:
+            package = cls._packages.get(zip_hash) or cls._load_cached(zip_hash)
+            if package is None:
+                package = cls._parse(shell_path, zip_hash)
+                cls._cache.save(zip_hash, vars(package))
+            cls._packages[zip_hash] = package
+        logger.debug(f"Model: {package.model} for the Shell {shell_path}")
+        return package
+
+    @classmethod
+    def _load_cached(cls, zip_hash: str) -> "ShellPackage | None":
+        data = cls._cache.load(zip_hash)
+        try:
+            return cls(**data) if data else None
+        except TypeError:
+            # cached by a version with other fields
+            return None
+
+    @classmethod
+    def _parse(cls, shell_path: Path, zip_hash: str) -> "ShellPackage":
+        with zipfile.ZipFile(shell_path) as zip_file:
+            data = yaml.safe_load(zip_file.read(cls.DEFINITION_NAME))
+            driver_path = cls._get_driver_path(data)
+            if driver_path is None:
+                driver_hash, dependencies = None, []
+            else:
+                driver_data = zip_file.read(driver_path)
+                driver_hash = hashlib.sha256(driver_data).hexdigest()
+                dependencies = cls._get_dependencies(zip_file.open(driver_path))
+
+        metadata = data["metadata"]
+        return cls(
+            zip_hash=zip_hash,
+            template_name=metadata["template_name"],
+            version=str(metadata.get("template_version", "")),
+            node_types=list(data["node_types"]),
+            dependencies=dependencies,
+            driver_hash=driver_hash,
+        )
+
+    @staticmethod
+    def _get_driver_path(data: dict) -> str | None:
+        for node_type in data["node_types"].values():
+            driver = (node_type.get("artifacts") or {}).get("driver")
+            if driver:
+                return driver["file"]
+        return None
+
+    @classmethod
+    def _get_dependencies(cls, driver_fo) -> list[str]:
+        with zipfile.ZipFile(driver_fo) as driver_zip:
+            try:
+                data = driver_zip.read(cls.REQUIREMENTS_NAME).decode()
+            except KeyError:
+                return []
+        lines = (line.split("#", 1)[0].strip() for line in data.splitlines())
+        return [line for line in lines if line]
+
+
+class InstalledShellsRecord:
+    """Hashes of the Shell zips that were installed on CloudShells.
+
+    Kept between runs so that a Shell that is still installed from a previous
+    run isn't uploaded again if the zip wasn't changed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = Lock()
+
+    def _load(self) -> dict[str, dict[str, str]]:
+        try:
+            return json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, data: dict[str, dict[str, str]]):
+        """Save the record, errors are logged, the Shell is just uploaded again."""
+        json_data = json.dumps(data, indent=2).encode()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            replace_file(self.path, lambda f: f.write(json_data))
+        except OSError as e:
+            logger.warning(f"Cannot save installed Shells to {self.path}, {e}")
+
+    def get(self, host: str, shell_name: str) -> str | None:
+        with self._lock:
+            return self._load().get(host, {}).get(shell_name)
+
+    def record(self, host: str, shell_name: str, zip_hash: str):
+        with self._lock:
+            data = self._load()
+            data.setdefault(host, {})[shell_name] = zip_hash
+            self._save(data)
+
+    def remove(self, host: str, shell_name: str):
+        with self._lock:
+            data = self._load()
+            if data.get(host, {}).pop(shell_name, None) is not None:
+                self._save(data)
+
+
+installed_shells = InstalledShellsRecord(
+    get_cache_dir("cloudshell") / "installed_shells.json"
+)
@@ -1,5 +1,8 @@
+import re
+import time
 from collections.abc import Iterable
 from datetime import datetime, timedelta
+from threading import Lock
 
 from smb.base import SharedFile
 
@@ -22,3 +25,79 @@ class FilterByFileNameInIterable:
 
     def __call__(self, smb_file: SharedFile) -> bool:
         return smb_file.filename in self._iterable
+
+
+def normalize_smb_path(path: str) -> str:
+    """SMB paths are case-insensitive and could use both slashes."""
+    return "\\".join(filter(None, re.split(r"[\\/]+", path.lower())))
+
+
+class ListingCache:
+    """Thread safe cache of directory listings with TTL.
+
+    Every invalidation bumps the generation. A listing is cached only if no
+    invalidation happened since its generation, so a listing that was taken
+    before a write can't be cached after the write.
+    """
+
+    def __init__(self, ttl: float = 30):
+        self._ttl = ttl
+        self._lock = Lock()
+        self._listings: dict[tuple[str, str], tuple[float, tuple[SharedFile, ...]]] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, share: str, path: str) -> tuple[SharedFile, ...] | None:
+        key = (share.lower(), normalize_smb_path(path))
+        with self._lock:
+            created, smb_files = self._listings.get(key, (None, None))
+            if created is not None and time.monotonic() - created < self._ttl:
+                self.hits += 1
+                return smb_files
+            self._listings.pop(key, None)
+            self.misses += 1
+            return None
+
+    @property
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def set(  # noqa: A003
+        self,
+        share: str,
+        path: str,
+        smb_files: Iterable[SharedFile],
+        generation: int | None = None,
+    ):
+        """Cache the listing if it isn't older than the last invalidation."""
+        key = (share.lower(), normalize_smb_path(path))
+        with self._lock:
+            if generation is None or generation == self._generation:
+                self._listings[key] = (time.monotonic(), tuple(smb_files))
+
+    def invalidate(self, share: str, path: str):
+        """Invalidate listings of the path and all its parent dirs."""
+        share = share.lower()
+        path = normalize_smb_path(path)
+        with self._lock:
+            self._generation += 1
+            for key in list(self._listings):
+                key_share, key_path = key
+                if key_share == share and (
+                    path == key_path or path.startswith(f"{key_path}\\") or not key_path
+                ):
+                    del self._listings[key]
+                    self.invalidations += 1
+
+    @property
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "size": len(self._listings),
+            }
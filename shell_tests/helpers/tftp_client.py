@@ -0,0 +1,217 @@
+"""Minimal TFTP read client with option negotiation.
+
+Supports blksize (RFC 2348), tsize (RFC 2349) and windowsize (RFC 7440).
+tftpy cannot negotiate windowsize and fails if the server acknowledges an
+option it doesn't know, so downloads are done here.
+"""
+import socket
+import struct
+import time
+from typing import BinaryIO
+
+from shell_tests.helpers.logger import logger
+
+RRQ, DATA, ACK, ERROR, OACK = 1, 3, 4, 5, 6
+FILE_NOT_FOUND_CODE = 1
+OPTION_REFUSED_CODE = 8
+DEFAULT_BLKSIZE = 512
+MAX_PACKET_SIZE = 65536 + 4
+
+
+class TftpClientError(Exception):
+    """Base Error."""
+
+
+class TftpServerError(TftpClientError):
+    def __init__(self, code: int, message: str):
+        self.code = code
+        self.message = message
+
+    def __str__(self):
+        return f"TFTP error {self.code} - {self.message}"
+
+
+class TftpTimeoutError(TftpClientError):
+    """Server doesn't answer."""
+
+
+class TransferInfo:
+    def __init__(self, blksize: int, windowsize: int, tsize: int | None):
+        self.blksize = blksize
+        self.windowsize = windowsize
+        self.tsize = tsize
+        self.size = 0
+        self.blocks = 0
+        self.duration = 0.0
+
+    def __repr__(self):
+        return (
+            f"TransferInfo(blksize={self.blksize}, windowsize={self.windowsize}, "
+            f"size={self.size}, blocks={self.blocks}, duration={self.duration:.3f})"
+        )
+
+
+def _pack_rrq(file_name: str, options: dict[str, int]) -> bytes:
+    parts = [file_name, "octet"]
+    for name, value in options.items():
+        parts.extend((name, str(value)))
+    return struct.pack("!H", RRQ) + b"".join(f"{p}\0".encode() for p in parts)
+
+
+def _pack_ack(block: int) -> bytes:
+    return struct.pack("!HH", ACK, block & 0xFFFF)
+
+
+def _pack_error(code: int, message: str) -> bytes:
+    return struct.pack("!HH", ERROR, code) + f"{message}\0".encode()
+
+
+def _parse_options(data: bytes) -> dict[str, int]:
+    parts = data.split(b"\0")[:-1]
+    return {
+        name.decode().lower(): int(value)
+        for name, value in zip(parts[::2], parts[1::2])
+    }
+
+
+class TftpClient:
+    """Downloads files from a TFTP server negotiating options.
+
+    Options that are None aren't requested. If the server refuses options the
+    transfer is restarted without them, if it ignores some options defaults
+    are used.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 69,
+        blksize: int | None = None,
+        windowsize: int | None = None,
+        tsize: bool = False,
+        timeout: float = 5,
+        retries: int = 3,
+    ):
+        self.host = host
+        self.port = port
+        self.options = {}
+        if blksize:
+            self.options["blksize"] = blksize
+        if windowsize:
+            self.options["windowsize"] = windowsize
+        if tsize:
+            self.options["tsize"] = 0
+        self.timeout = timeout
+        self.retries = retries
+
+    def download(self, file_name: str, file_obj: BinaryIO) -> TransferInfo:
+        return self._transfer(file_name, file_obj, self.options, False)
+
+    def get_file_size(self, file_name: str) -> int:
+        """Get the size from tsize or the size of the first block.
+
+        Without tsize it's 0 for an empty file and more than 0 for other files.
+        """
+        options = {**self.options, "tsize": 0}
+        info = self._transfer(file_name, None, options, True)
+        return info.tsize if info.tsize is not None else info.size
+
+    def _transfer(
+        self,
+        file_name: str,
+        file_obj: BinaryIO | None,
+        options: dict[str, int],
+        first_block_only: bool,
+    ) -> TransferInfo:
+        try:
+            return self._transfer_once(file_name, file_obj, options, first_block_only)
+        except TftpServerError as e:
+            if e.code != OPTION_REFUSED_CODE or not options:
+                raise
+            logger.debug(f"TFTP server refused options {options}, {e}")
+        return self._transfer_once(file_name, file_obj, {}, first_block_only)
+
+    def _transfer_once(
+        self,
+        file_name: str,
+        file_obj: BinaryIO | None,
+        options: dict[str, int],
+        first_block_only: bool,
+    ) -> TransferInfo:
+        start = time.monotonic()
+        info = TransferInfo(DEFAULT_BLKSIZE, 1, None)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(self.timeout)
+            last_sent = _pack_rrq(file_name, options)
+            sock.sendto(last_sent, (self.host, self.port))
+            server_addr = None
+            expected = 1  # next block we wait for, not wrapped
+            received_in_window = 0
+            acked_out_of_order = False
+            attempts = 0
+
+            while True:
+                try:
+                    packet, addr = sock.recvfrom(MAX_PACKET_SIZE)
+                except socket.timeout:
+                    attempts += 1
+                    if attempts > self.retries:
+                        raise TftpTimeoutError(f"No answer for {file_name}")
+                    sock.sendto(last_sent, server_addr or (self.host, self.port))
+                    received_in_window = 0
+                    continue
+                if server_addr is None:
+                    server_addr = addr  # server answers from a new port
+                elif addr != server_addr:
+                    continue
+                attempts = 0
+                opcode = struct.unpack("!H", packet[:2])[0]
+
+                if opcode == ERROR:
+                    code = struct.unpack("!H", packet[2:4])[0]
+                    message = packet[4:].split(b"\0", 1)[0].decode(errors="replace")
+                    raise TftpServerError(code, message)
+
+                elif opcode == OACK and expected == 1:
+                    oack = _parse_options(packet[2:])
+                    info.blksize = oack.get("blksize", DEFAULT_BLKSIZE)
+                    info.windowsize = oack.get("windowsize", 1)
+                    info.tsize = oack.get("tsize")
+                    if first_block_only and info.tsize is not None:
+                        sock.sendto(_pack_error(OPTION_REFUSED_CODE, "Got size"), addr)
+                        break
+                    last_sent = _pack_ack(0)
+                    sock.sendto(last_sent, addr)
+
+                elif opcode == DATA:
+                    block = struct.unpack("!H", packet[2:4])[0]
+                    if block == expected & 0xFFFF:
+                        data = packet[4:]
+                        if file_obj is not None:
+                            file_obj.write(data)
+                        info.size += len(data)
+                        info.blocks += 1
+                        expected += 1
+                        received_in_window += 1
+                        acked_out_of_order = False
+                        last_block = len(data) < info.blksize
+                        if first_block_only and not last_block:
+                            sock.sendto(_pack_error(0, "Got first block"), addr)
+                            break
+                        if last_block or received_in_window >= info.windowsize:
+                            last_sent = _pack_ack(expected - 1)
+                            sock.sendto(last_sent, addr)
+                            received_in_window = 0
+                        if last_block:
+                            break
+                    elif not acked_out_of_order:
+                        # a block or our ack is lost, ack the last in-order
+                        # block once to make the server restart the window
+                        last_sent = _pack_ack(expected - 1)
+                        sock.sendto(last_sent, addr)
+                        received_in_window = 0
+                        acked_out_of_order = True
+
+        info.duration = time.monotonic() - start
+        logger.debug(f"TFTP transfer of {file_name} finished, {info}")
+        return info
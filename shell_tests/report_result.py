@@ -1,3 +1,4 @@
+from datetime import datetime
 from itertools import chain
 
 from shell_tests.handlers.resource_handler import DeviceType
@@ -54,6 +55,7 @@ class ResourceReport:
         family: str,
         is_success: bool,
         test_result: str,
+        reachability_timeline: list[tuple[datetime, bool]] | None = None,
     ):
         self.name = resource_name
         self.ip = device_ip
@@ -61,6 +63,7 @@ class ResourceReport:
         self.family = family
         self.is_success = is_success
         self.test_result = test_result
+        self.reachability_timeline = reachability_timeline or []
 
     def __str__(self):
         result = (
@@ -68,6 +71,12 @@ class ResourceReport:
             f"Family: {self.family}\nTest for the device was "
             f"{success_str(self.is_success)}\n{self.test_result}"
         )
+        if self.reachability_timeline:
+            timeline = ", ".join(
+                f"{'up' if is_up else 'down'} {time:%H:%M:%S}"
+                for time, is_up in self.reachability_timeline
+            )
+            result = f"{result}\nDevice reachability: {timeline}"
         return result
 
 
@@ -102,18 +111,54 @@ class ServiceReport:
         return result
 
 
+class VenvReport:
+    def __init__(
+        self,
+        shell_name: str,
+        model: str,
+        build_time: float,
+        is_success: bool,
+        error: str = "",
+    ):
+        self.shell_name = shell_name
+        self.model = model
+        self.build_time = build_time
+        self.is_success = is_success
+        self.error = error
+
+    def __str__(self):
+        result = (
+            f"Shell: {self.shell_name}, Model: {self.model}, "
+            f"venv build time: {self.build_time:.1f}s, "
+            f"venv creation was {success_str(self.is_success)}"
+        )
+        if self.error:
+            result = f"{result}\n{self.error}"
+        return result
+
+
 class Reporting:
     def __init__(self):
         self.sandboxes_reports: list[SandboxReport] = []
+        self.venv_reports: list[VenvReport] = []
 
     @property
     def is_success(self) -> bool:
-        return all(sandbox.is_success for sandbox in self.sandboxes_reports)
+        return all(venv.is_success for venv in self.venv_reports) and all(
+            sandbox.is_success for sandbox in self.sandboxes_reports
+        )
 
     def __str__(self):
         join_str = f"\n\n{'-' * 100}\n\n"
         sandboxes_tests_result = join_str.join(map(str, self.sandboxes_reports))
-        return f"Tests was {success_str(self.is_success)}\n\n{sandboxes_tests_result}"
+        venv_result = ""
+        if self.venv_reports:
+            venv_result = "\n".join(map(str, self.venv_reports))
+            venv_result = f"Driver venvs:\n{venv_result}{join_str}"
+        return (
+            f"Tests was {success_str(self.is_success)}\n\n"
+            f"{venv_result}{sandboxes_tests_result}"
+        )
 
 
 def success_str(is_success: bool) -> str:
@@ -9,17 +9,22 @@ from shell_tests.configs import MainConfig
 from shell_tests.errors import BaseAutomationException
 from shell_tests.handlers.cs_handler import CloudShellHandler
 from shell_tests.handlers.do_handler import DoHandler
+from shell_tests.helpers.archive_helpers import ArchiveFormat
 from shell_tests.helpers.check_resource_is_alive import check_all_resources_is_alive
-from shell_tests.helpers.cs_helpers import set_debug_level_via_blueprint
+from shell_tests.helpers.cs_helpers import prewarm_venvs, set_debug_level_via_blueprint
+from shell_tests.helpers.device_monitor import DeviceMonitor
 from shell_tests.helpers.handler_storage import HandlerStorage
 from shell_tests.report_result import Reporting
 from shell_tests.run_tests_for_sandbox import RunTestsForSandbox
 
 
 class AutomatedTestsRunner:
-    def __init__(self, conf: MainConfig):
+    def __init__(
+        self, conf: MainConfig, logs_archive_format: ArchiveFormat | None = None
+    ):
         """Create CloudShell on Do and run tests."""
         self._conf = conf
+        self._logs_archive_format = logs_archive_format
 
     def run(self) -> Reporting:
         """Create CloudShell, prepare, and run tests for all resources."""
@@ -28,14 +33,21 @@ class AutomatedTestsRunner:
         context = DoHandler(self._conf) if self._conf.do_conf else nullcontext()
         with context:
             cs_handler = CloudShellHandler(self._conf.cs_conf)
-            set_debug_level_via_blueprint(cs_handler)
-            return self._run_cs_tests(cs_handler)
+            handler_storage = HandlerStorage(cs_handler, self._conf)
+            set_debug_level_via_blueprint(cs_handler, handler_storage.cs_smb_handler)
+            return self._run_cs_tests(handler_storage)
 
-    def _run_cs_tests(self, cs_handler: CloudShellHandler) -> Reporting:
+    def _run_cs_tests(self, handler_storage: HandlerStorage) -> Reporting:
         start_time = datetime.now()
-        handler_storage = HandlerStorage(cs_handler, self._conf)
+        report = Reporting()
         try:
-            report = self._run_tests_for_sandboxes(handler_storage)
+            report.venv_reports = prewarm_venvs(handler_storage)
+            device_monitor = DeviceMonitor(handler_storage.resource_handlers)
+            device_monitor.start()
+            try:
+                self._run_tests_for_sandboxes(handler_storage, report)
+            finally:
+                device_monitor.stop()
         finally:
             self._download_logs(handler_storage, start_time)
             handler_storage.finish()
@@ -49,10 +61,12 @@ class AutomatedTestsRunner:
                 Path("cs_logs"),
                 start_time,
                 {sh.reservation_id for sh in handler_storage.sandbox_handlers},
+                self._logs_archive_format,
             )
 
-    def _run_tests_for_sandboxes(self, handler_storage: HandlerStorage) -> Reporting:
-        report = Reporting()
+    def _run_tests_for_sandboxes(
+        self, handler_storage: HandlerStorage, report: Reporting
+    ):
         stop_flag = Event()
         run_tests_instances = {
             RunTestsForSandbox(sh, handler_storage, report, stop_flag)
@@ -69,7 +83,6 @@ class AutomatedTestsRunner:
                 stop_flag.set()
                 self._wait_for_futures(futures, stop_flag)
                 raise
-        return report
 
     @staticmethod
     def _wait_for_futures(futures: set[ft.Future], stop_flag: Event):
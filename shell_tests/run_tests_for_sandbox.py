@@ -107,4 +107,5 @@ class RunTestsForSandbox:
             resource_handler.family,
             is_success,
             test_result,
+            list(resource_handler.reachability_timeline),
         )
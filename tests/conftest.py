@@ -0,0 +1,41 @@
+from collections.abc import Callable
+
+import pytest
+
+BENCHMARK_RESULTS = pytest.StashKey[list[str]]()
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark", action="store_true", help="run the file handlers benchmarks"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "benchmark: slow benchmark, runs only with --benchmark"
+    )
+    config.stash[BENCHMARK_RESULTS] = []
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip_benchmark = pytest.mark.skip(reason="run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = config.stash[BENCHMARK_RESULTS]
+    if results:
+        terminalreporter.section("benchmarks")
+        for line in results:
+            terminalreporter.write_line(line)
+
+
+@pytest.fixture()
+def benchmark_report(request) -> Callable[[str], None]:
+    """Add a line to the benchmarks section of the terminal summary."""
+    return request.config.stash[BENCHMARK_RESULTS].append
@@ -0,0 +1,14 @@
+"""In-process stand-in servers for the file handlers."""
+from tests.servers.base import FileStorage, Link, generate_files
+from tests.servers.ftp_server import FtpServer
+from tests.servers.sftp_server import SftpServer
+from tests.servers.tftp_server import TftpServer
+
+__all__ = (
+    "FileStorage",
+    "Link",
+    "generate_files",
+    "FtpServer",
+    "SftpServer",
+    "TftpServer",
+)
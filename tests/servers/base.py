@@ -0,0 +1,65 @@
+import os
+import time
+from threading import Lock
+
+
+class Link:
+    """Emulates a slow link, latency in seconds, bandwidth in bytes/s."""
+
+    def __init__(self, latency: float = 0, bandwidth: float | None = None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+    def delay(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def transfer(self, size: int):
+        if self.bandwidth:
+            time.sleep(size / self.bandwidth)
+
+
+class FileStorage:
+    """Thread safe in-memory files of the stand-in server."""
+
+    def __init__(self, files: dict[str, bytes] | None = None):
+        self._files = dict(files or {})
+        self._lock = Lock()
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        return path.lstrip("/")
+
+    def get(self, path: str) -> bytes | None:
+        with self._lock:
+            return self._files.get(self._normalize(path))
+
+    def put(self, path: str, data: bytes):
+        with self._lock:
+            self._files[self._normalize(path)] = data
+
+    def remove(self, path: str) -> bool:
+        with self._lock:
+            return self._files.pop(self._normalize(path), None) is not None
+
+    def list_dir(self, dir_path: str) -> list[str]:
+        prefix = self._normalize(dir_path).rstrip("/")
+        prefix = f"{prefix}/" if prefix else ""
+        with self._lock:
+            names = list(self._files)
+        return [
+            name.removeprefix(prefix)
+            for name in names
+            if name.startswith(prefix) and "/" not in name.removeprefix(prefix)
+        ]
+
+    def __contains__(self, path: str) -> bool:
+        return self.get(path) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._files)
+
+
+def generate_files(sizes: dict[str, int]) -> dict[str, bytes]:
+    return {name: os.urandom(size) for name, size in sizes.items()}
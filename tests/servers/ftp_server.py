@@ -0,0 +1,97 @@
+import socket
+import socketserver
+from threading import Thread
+
+from tests.servers.base import FileStorage, Link
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _FtpRequestHandler(socketserver.StreamRequestHandler):
+    server: "FtpServer"
+
+    def _reply(self, line: str):
+        self.server.link.delay()
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def _open_data_connection(self) -> socket.socket | None:
+        if self._pasv_sock is None:
+            self._reply("425 Use PASV first")
+            return None
+        self._reply("150 Opening data connection")
+        conn, _ = self._pasv_sock.accept()
+        self._pasv_sock.close()
+        self._pasv_sock = None
+        return conn
+
+    def _send_data(self, data: bytes):
+        conn = self._open_data_connection()
+        if conn is None:
+            return
+        with conn:
+            for i in range(0, len(data), CHUNK_SIZE):
+                chunk = data[i : i + CHUNK_SIZE]
+                self.server.link.transfer(len(chunk))
+                conn.sendall(chunk)
+        self._reply("226 Transfer complete")
+
+    def handle(self):
+        self._pasv_sock = None
+        files = self.server.files
+        self._reply("220 Stand-in FTP server")
+        for line in self.rfile:
+            cmd, _, arg = line.decode().strip().partition(" ")
+            cmd = cmd.upper()
+            data = files.get(arg) if arg else None
+            if cmd == "USER":
+                self._reply("331 Password required")
+            elif cmd == "PASS":
+                self._reply("230 Logged in")
+            elif cmd in ("TYPE", "NOOP"):
+                self._reply("200 OK")
+            elif cmd == "QUIT":
+                self._reply("221 Bye")
+                break
+            elif cmd == "PASV":
+                self._pasv_sock = socket.create_server(("127.0.0.1", 0))
+                port = self._pasv_sock.getsockname()[1]
+                self._reply(
+                    f"227 Entering Passive Mode (127,0,0,1,{port >> 8},{port & 255})"
+                )
+            elif cmd == "SIZE" and data is not None:
+                self._reply(f"213 {len(data)}")
+            elif cmd == "RETR" and data is not None:
+                self._send_data(data)
+            elif cmd == "NLST":
+                self._send_data("\r\n".join(files.list_dir(arg)).encode() + b"\r\n")
+            elif cmd == "DELE" and files.remove(arg):
+                self._reply("250 Deleted")
+            elif cmd in ("SIZE", "RETR", "DELE"):
+                self._reply("550 No such file or directory.")
+            else:
+                self._reply("502 Command not implemented")
+
+
+class FtpServer(socketserver.ThreadingTCPServer):
+    """In-process FTP server on an ephemeral port, passive mode only."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, files: FileStorage, link: Link):
+        super().__init__(("127.0.0.1", 0), _FtpRequestHandler)
+        self.files = files
+        self.link = link
+        self._thread = Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
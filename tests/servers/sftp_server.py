@@ -0,0 +1,128 @@
+import socket
+from functools import lru_cache
+from threading import Event, Thread
+
+import paramiko
+
+from tests.servers.base import FileStorage, Link
+
+
+@lru_cache
+def _get_host_key() -> paramiko.RSAKey:
+    return paramiko.RSAKey.generate(2048)
+
+
+class _SshServer(paramiko.ServerInterface):
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED
+
+
+class _SftpHandle(paramiko.SFTPHandle):
+    def __init__(self, data: bytes, link: Link):
+        super().__init__()
+        self._data = data
+        self._link = link
+
+    def read(self, offset, length):
+        chunk = self._data[offset : offset + length]
+        self._link.transfer(len(chunk))
+        return chunk
+
+    def stat(self):
+        return _get_attributes(self._data)
+
+
+def _get_attributes(data: bytes) -> paramiko.SFTPAttributes:
+    attributes = paramiko.SFTPAttributes()
+    attributes.st_size = len(data)
+    attributes.st_mode = 0o100644
+    return attributes
+
+
+class _SftpServerInterface(paramiko.SFTPServerInterface):
+    def __init__(self, server, files: FileStorage, link: Link, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self._files = files
+        self._link = link
+
+    def stat(self, path):
+        self._link.delay()
+        data = self._files.get(path)
+        if data is None:
+            return paramiko.SFTP_NO_SUCH_FILE
+        return _get_attributes(data)
+
+    lstat = stat
+
+    def open(self, path, flags, attr):  # noqa: A003
+        self._link.delay()
+        data = self._files.get(path)
+        if data is None:
+            return paramiko.SFTP_NO_SUCH_FILE
+        return _SftpHandle(data, self._link)
+
+    def remove(self, path):
+        self._link.delay()
+        if not self._files.remove(path):
+            return paramiko.SFTP_NO_SUCH_FILE
+        return paramiko.SFTP_OK
+
+
+class SftpServer:
+    """In-process SFTP server on an ephemeral port, any password is accepted."""
+
+    def __init__(self, files: FileStorage, link: Link):
+        self.files = files
+        self.link = link
+        self._sock = socket.create_server(("127.0.0.1", 0))
+        self._transports: list[paramiko.Transport] = []
+        self._sock.settimeout(0.1)
+        self._stopped = Event()
+        self._thread = Thread(target=self._serve, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._sock.getsockname()[1]
+
+    def _serve(self):
+        while not self._stopped.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except socket.timeout:
+                continue
+            transport = paramiko.Transport(conn)
+            transport.add_server_key(_get_host_key())
+            transport.set_subsystem_handler(
+                "sftp",
+                paramiko.SFTPServer,
+                _SftpServerInterface,
+                self.files,
+                self.link,
+            )
+            transport.start_server(server=_SshServer())
+            self._transports.append(transport)
+
+    @property
+    def connections(self) -> int:
+        return len(self._transports)
+
+    def drop_connections(self):
+        """Close the transports as if the connections were lost."""
+        for transport in self._transports:
+            transport.close()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self._sock.close()
+        for transport in self._transports:
+            transport.close()
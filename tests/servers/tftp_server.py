@@ -0,0 +1,120 @@
+import socket
+import struct
+from threading import Event, Thread
+
+from tests.servers.base import FileStorage, Link
+
+RRQ, DATA, ACK, ERROR, OACK = 1, 3, 4, 5, 6
+ALL_OPTIONS = frozenset(("blksize", "windowsize", "tsize"))
+
+
+class TftpServer:
+    """In-process TFTP server on an ephemeral port, read requests only.
+
+    Supports blksize, windowsize and tsize options, the supported ones can
+    be limited. Blocks from drop_blocks are dropped once to emulate losses.
+    """
+
+    def __init__(
+        self,
+        files: FileStorage,
+        link: Link,
+        options: frozenset[str] = ALL_OPTIONS,
+        drop_blocks: set[int] | None = None,
+        timeout: float = 1,
+    ):
+        self.files = files
+        self.link = link
+        self.options = options
+        self.drop_blocks = set(drop_blocks or ())
+        self.timeout = timeout
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.settimeout(0.1)
+        self._stopped = Event()
+        self._thread = Thread(target=self._serve, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self._sock.getsockname()[1]
+
+    def _serve(self):
+        while not self._stopped.is_set():
+            try:
+                packet, client = self._sock.recvfrom(1024)
+            except socket.timeout:
+                continue
+            if struct.unpack("!H", packet[:2])[0] == RRQ:
+                Thread(target=self._send_file, args=(packet, client)).start()
+
+    def _send_file(self, packet: bytes, client: tuple[str, int]):
+        parts = packet[2:].split(b"\0")[:-1]
+        file_name = parts[0].decode()
+        requested = {
+            k.decode().lower(): int(v) for k, v in zip(parts[2::2], parts[3::2])
+        }
+        options = {k: v for k, v in requested.items() if k in self.options}
+        data = self.files.get(file_name)
+
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.bind(("127.0.0.1", 0))
+            sock.settimeout(self.timeout)
+            self.link.delay()
+            if data is None:
+                error = struct.pack("!HH", ERROR, 1) + b"File not found\0"
+                sock.sendto(error, client)
+                return
+
+            blksize = options.get("blksize", 512)
+            windowsize = options.get("windowsize", 1)
+            blocks = [data[i : i + blksize] for i in range(0, len(data) + 1, blksize)]
+            if "tsize" in options:
+                options["tsize"] = len(data)
+            if options:
+                oack = b"".join(f"{k}\0{v}\0".encode() for k, v in options.items())
+                sock.sendto(struct.pack("!H", OACK) + oack, client)
+                acked = self._wait_ack(sock, -1)
+                if acked is None:
+                    return
+            else:
+                acked = 0
+
+            while acked < len(blocks):
+                self.link.delay()
+                last = min(acked + windowsize, len(blocks))
+                for num in range(acked + 1, last + 1):
+                    block = blocks[num - 1]
+                    self.link.transfer(len(block))
+                    if num in self.drop_blocks:
+                        self.drop_blocks.discard(num)
+                        continue
+                    sock.sendto(struct.pack("!HH", DATA, num & 0xFFFF) + block, client)
+                new_acked = self._wait_ack(sock, acked)
+                if new_acked is None:
+                    return
+                acked = new_acked
+
+    @staticmethod
+    def _wait_ack(sock: socket.socket, acked: int) -> int | None:
+        """Wait for ACK, returns the acked block, previous one on timeout.
+
+        None means the client stopped the transfer.
+        """
+        try:
+            packet = sock.recv(1024)
+        except socket.timeout:
+            return max(acked, 0)
+        opcode, block = struct.unpack("!HH", packet[:4])
+        if opcode != ACK:
+            return None
+        # restore high bits of the wrapped block number
+        base = max(acked, 0)
+        return base + ((block - base) & 0xFFFF)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self._sock.close()
@@ -0,0 +1,43 @@
+from collections.abc import Callable
+
+import pytest
+
+from shell_tests.configs import HostWithUserConfig, TftpConfig
+from shell_tests.handlers.ftp_handler import FTPHandler
+from shell_tests.handlers.scp_handler import SCPHandler
+from shell_tests.handlers.tftp_handler import TFTPHandler
+
+from tests.servers import FileStorage, FtpServer, Link, SftpServer, TftpServer
+
+SERVER_CLASSES = {"ftp": FtpServer, "scp": SftpServer, "tftp": TftpServer}
+
+
+@pytest.fixture()
+def start_server() -> Callable:
+    """Start a stand-in server, returns the server and a handler for it.
+
+    Usage: start_server("ftp", {"name": b"data"}, latency=0.01, bandwidth=1e6)
+    """
+    servers = []
+    handlers = []
+
+    def _start_server(protocol: str, files: dict[str, bytes], **link_kwargs):
+        server = SERVER_CLASSES[protocol](FileStorage(files), Link(**link_kwargs))
+        server.start()
+        servers.append(server)
+        host = f"127.0.0.1:{server.port}"
+        if protocol == "ftp":
+            handler = FTPHandler(HostWithUserConfig(Host=host, User="u", Password="p"))
+        elif protocol == "scp":
+            handler = SCPHandler(HostWithUserConfig(Host=host, User="u", Password="p"))
+        else:
+            handler = TFTPHandler(TftpConfig(Host=host))
+        handlers.append(handler)
+        return server, handler
+
+    yield _start_server
+
+    for handler in handlers:
+        handler.finish()
+    for server in servers:
+        server.stop()
@@ -0,0 +1,105 @@
+import hashlib
+from io import BytesIO
+from typing import BinaryIO
+
+import pytest
+
+from shell_tests.configs import HostConfig
+from shell_tests.handlers import abc_remote_file_handler
+from shell_tests.handlers.abc_remote_file_handler import AbcRemoteFileHandler
+
+
+class FakeHandler(AbcRemoteFileHandler):
+    """Files appear on the server after the given number of checks."""
+
+    def __init__(self, conf: HostConfig, files: dict[str, bytes], delays: dict):
+        super().__init__(conf)
+        self.files = files
+        self.delays = delays
+        self.checks = []
+
+    @property
+    def session(self):
+        return None
+
+    def _get_existing_file_paths(self, file_paths: set[str]) -> set[str]:
+        self.checks.append(set(file_paths))
+        for file_path in file_paths:
+            self.delays[file_path] -= 1
+        return {path for path in file_paths if self.delays[path] < 0}
+
+    def _download_file(self, file_path: str, file_obj: BinaryIO):
+        if self.delays[file_path] >= 0:
+            raise FileNotFoundError(file_path)
+        file_obj.write(self.files[file_path])
+
+    def _get_file_size(self, file_path: str) -> int:
+        return len(self.files[file_path])
+
+    def _delete_file(self, file_path: str):
+        del self.files[file_path]
+
+
+@pytest.fixture()
+def sleeps(monkeypatch) -> list[float]:
+    sleeps = []
+    monkeypatch.setattr(abc_remote_file_handler.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def test_wait_for_files_backoff(sleeps):
+    conf = HostConfig(Host="host")
+    handler = FakeHandler(conf, {}, {"a": 0, "b": 3})
+
+    handler.wait_for_files(["a", "b"])
+
+    assert sleeps == [0.1, 0.2, 0.4]
+    assert handler.checks == [{"a", "b"}, {"b"}, {"b"}, {"b"}]
+
+
+def test_wait_for_file_deadline(sleeps, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(abc_remote_file_handler.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(
+        abc_remote_file_handler.time, "sleep", lambda s: now.__setitem__(0, now[0] + s)
+    )
+    conf = HostConfig(Host="host", **{"File Wait Timeout": 1})
+    handler = FakeHandler(conf, {}, {"a": 100})
+
+    with pytest.raises(FileNotFoundError, match="a"):
+        handler.wait_for_file("a")
+    assert now[0] == 1
+
+
+def test_read_file_waits_for_file(sleeps):
+    handler = FakeHandler(HostConfig(Host="host"), {"a": b"data"}, {"a": 1})
+
+    assert handler.read_file("a") == b"data"
+    assert sleeps == [0.1]
+
+
+class PartialWriteHandler(FakeHandler):
+    """The first download breaks after writing a part of the file."""
+
+    def _download_file(self, file_path: str, file_obj: BinaryIO):
+        if self.delays[file_path] >= 0:
+            file_obj.write(self.files[file_path][:2])
+            raise FileNotFoundError(file_path)
+        super()._download_file(file_path, file_obj)
+
+
+def test_download_file_after_partial_write(sleeps):
+    handler = PartialWriteHandler(HostConfig(Host="host"), {"a": b"data"}, {"a": 1})
+    file_obj = BytesIO(b"header")
+    file_obj.seek(0, 2)
+
+    sha256 = handler.download_file("a", file_obj)
+
+    assert file_obj.getvalue() == b"headerdata"
+    assert sha256 == hashlib.sha256(b"data").hexdigest()
+
+
+def test_download_file_only_hashes(sleeps):
+    handler = PartialWriteHandler(HostConfig(Host="host"), {"a": b"data"}, {"a": 1})
+
+    assert handler.download_file("a", None) == hashlib.sha256(b"data").hexdigest()
@@ -0,0 +1,114 @@
+"""Throughput and latency of the file handlers against stand-in servers.
+
+Skipped by default, run with --benchmark to see the results.
+"""
+import statistics
+import time
+from collections.abc import Callable
+from concurrent import futures as ft
+from io import BytesIO
+from threading import Timer
+
+import pytest
+
+from shell_tests.helpers.tftp_client import TftpClient
+
+from tests.servers import generate_files
+
+FILES_NUM = 16
+FILE_SIZE = 256 * 1024
+LINK = {"latency": 0.005, "bandwidth": 50 * 1024 * 1024}
+
+pytestmark = pytest.mark.benchmark
+
+
+def _benchmark(
+    report: Callable[[str], None],
+    name: str,
+    func: Callable,
+    args_list: list[tuple],
+    threads: int,
+):
+    latencies = []
+
+    def _run(args):
+        start = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ft.ThreadPoolExecutor(threads, thread_name_prefix="[benchmark]") as executor:
+        for future in [executor.submit(_run, args) for args in args_list]:
+            future.result()
+    total = time.perf_counter() - start
+
+    report(
+        f"{name} x{threads} threads: {len(args_list) / total:.1f} ops/s, "
+        f"latency p50 {statistics.median(latencies) * 1000:.1f}ms, "
+        f"max {max(latencies) * 1000:.1f}ms"
+    )
+
+
+def _get_files() -> dict[str, bytes]:
+    return generate_files({f"config-{i}": FILE_SIZE for i in range(FILES_NUM)})
+
+
+@pytest.mark.parametrize("threads", [1, 8])
+@pytest.mark.parametrize("protocol", ["ftp", "scp", "tftp"])
+def test_read_file(start_server, benchmark_report, protocol, threads):
+    files = _get_files()
+    _, handler = start_server(protocol, files, **LINK)
+
+    _benchmark(
+        benchmark_report,
+        f"{protocol} read_file",
+        handler.read_file,
+        [(n,) for n in files],
+        threads,
+    )
+
+
+@pytest.mark.parametrize("threads", [1, 8])
+@pytest.mark.parametrize("protocol", ["ftp", "scp"])
+def test_delete_file(start_server, benchmark_report, protocol, threads):
+    files = _get_files()
+    server, handler = start_server(protocol, files, **LINK)
+
+    _benchmark(
+        benchmark_report,
+        f"{protocol} delete_file",
+        handler.delete_file,
+        [(n,) for n in files],
+        threads,
+    )
+    assert len(server.files) == 0
+
+
+@pytest.mark.parametrize("threads", [1, 8])
+@pytest.mark.parametrize("protocol", ["ftp", "scp", "tftp"])
+def test_wait_for_file(start_server, benchmark_report, protocol, threads):
+    files = _get_files()
+    server, handler = start_server(protocol, {}, **LINK)
+    for name, data in files.items():
+        Timer(0.2, server.files.put, (name, data)).start()
+
+    _benchmark(
+        benchmark_report,
+        f"{protocol} wait_for_file",
+        handler.wait_for_file,
+        [(n,) for n in files],
+        threads,
+    )
+
+
+@pytest.mark.parametrize(("blksize", "windowsize"), [(None, None), (8192, 8)])
+def test_tftp_download(start_server, benchmark_report, blksize, windowsize):
+    files = generate_files({"config": FILE_SIZE})
+    server, _ = start_server("tftp", files, **LINK)
+    client = TftpClient("127.0.0.1", server.port, blksize, windowsize)
+
+    info = client.download("config", BytesIO())
+
+    benchmark_report(
+        f"tftp download blksize {blksize}, windowsize {windowsize}: {info}"
+    )
@@ -0,0 +1,148 @@
+import zipfile
+from pathlib import Path
+from unittest.mock import create_autospec
+
+import pytest
+import yaml
+from cloudshell.rest.api import PackagingRestApiClient
+from cloudshell.rest.exceptions import ShellNotFoundException
+
+from shell_tests.configs import CloudShellConfig, ShellConfig
+from shell_tests.handlers import cs_handler as cs_handler_module
+from shell_tests.handlers.cs_handler import CloudShellHandler
+from shell_tests.handlers.shell_handler import ShellHandler
+from shell_tests.helpers.config_helpers import ConfigCache
+from shell_tests.helpers.shell_helpers import InstalledShellsRecord, ShellPackage
+
+DEFINITION = {
+    "metadata": {"template_name": "Cisco IOS Shell", "template_version": "5.0.1"},
+    "node_types": {"vendor.switch.CiscoIOS": {}},
+}
+
+
+def _create_shell(path: Path, comment: str = "") -> Path:
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("shell-definition.yaml", yaml.safe_dump(DEFINITION) + comment)
+    return path
+
+
+@pytest.fixture()
+def installed_shells(tmp_path: Path, monkeypatch) -> InstalledShellsRecord:
+    monkeypatch.setattr(ShellPackage, "_cache", ConfigCache(tmp_path / "cache"))
+    monkeypatch.setattr(ShellPackage, "_packages", {})
+    record = InstalledShellsRecord(tmp_path / "installed_shells.json")
+    monkeypatch.setattr(cs_handler_module, "installed_shells", record)
+    return record
+
+
+@pytest.fixture()
+def rest_api() -> PackagingRestApiClient:
+    api = create_autospec(PackagingRestApiClient, instance=True)
+    api.get_shell.return_value = {"Name": "Cisco IOS Shell", "Version": "5.0.1"}
+    return api
+
+
+@pytest.fixture()
+def cs_handler(rest_api) -> CloudShellHandler:
+    conf = CloudShellConfig(Host="cs", User="admin", Password="admin")
+    handler = CloudShellHandler(conf)
+    handler._rest_api = rest_api
+    return handler
+
+
+def test_install_shell_skips_installed(
+    cs_handler, rest_api, installed_shells, tmp_path: Path
+):
+    shell_path = _create_shell(tmp_path / "shell.zip")
+
+    cs_handler.install_shell(shell_path, ShellPackage.from_zip(shell_path))
+    rest_api.add_shell.assert_called_once_with(str(shell_path))
+    assert installed_shells.get("cs", "Cisco IOS Shell") is not None
+
+    cs_handler.install_shell(shell_path, ShellPackage.from_zip(shell_path))
+    rest_api.add_shell.assert_called_once()
+    rest_api.get_shell.assert_called_once_with("Cisco IOS Shell")
+
+    changed_path = _create_shell(tmp_path / "changed.zip", "# changed")
+    rest_api.add_shell.side_effect = Exception(
+        "Shell named 'Cisco IOS Shell' already exists"
+    )
+    cs_handler.install_shell(changed_path, ShellPackage.from_zip(changed_path))
+    rest_api.update_shell.assert_called_once_with(str(changed_path), "Cisco IOS Shell")
+
+
+def test_install_shell_removed_from_cs(
+    cs_handler, rest_api, installed_shells, tmp_path: Path
+):
+    shell_path = _create_shell(tmp_path / "shell.zip")
+    cs_handler.install_shell(shell_path, ShellPackage.from_zip(shell_path))
+    rest_api.get_shell.side_effect = ShellNotFoundException()
+
+    cs_handler.install_shell(shell_path, ShellPackage.from_zip(shell_path))
+
+    assert rest_api.add_shell.call_count == 2
+
+
+def test_remove_shell_keeps_record_if_shell_is_used(
+    cs_handler, rest_api, installed_shells, tmp_path: Path
+):
+    shell_path = _create_shell(tmp_path / "shell.zip")
+    cs_handler.install_shell(shell_path, ShellPackage.from_zip(shell_path))
+    rest_api.delete_shell.side_effect = Exception("This shell is used")
+
+    with pytest.raises(Exception, match="This shell is used"):
+        cs_handler.remove_shell("Cisco IOS Shell")
+    assert installed_shells.get("cs", "Cisco IOS Shell") is not None
+
+    rest_api.delete_shell.side_effect = None
+    cs_handler.remove_shell("Cisco IOS Shell")
+    assert installed_shells.get("cs", "Cisco IOS Shell") is None
+
+
+def test_install_shell_if_record_is_not_saved(
+    cs_handler, rest_api, installed_shells, tmp_path: Path, monkeypatch
+):
+    # the record can't be saved, e.g. ~/.cache is read-only
+    (tmp_path / "file").touch()
+    record = InstalledShellsRecord(tmp_path / "file" / "installed_shells.json")
+    monkeypatch.setattr(cs_handler_module, "installed_shells", record)
+    shell_path = _create_shell(tmp_path / "shell.zip")
+
+    cs_handler.install_shell(shell_path, ShellPackage.from_zip(shell_path))
+    cs_handler.remove_shell("Cisco IOS Shell")
+
+    rest_api.add_shell.assert_called_once_with(str(shell_path))
+    assert record.get("cs", "Cisco IOS Shell") is None
+
+
+def _run_tests(rest_api, shell_conf: ShellConfig):
+    """Install and finish the Shell as a run-tests does."""
+    conf = CloudShellConfig(Host="cs", User="admin", Password="admin")
+    cs_handler = CloudShellHandler(conf)
+    cs_handler._rest_api = rest_api
+    ShellHandler.create(shell_conf, cs_handler).finish()
+
+
+def test_second_run_skips_unchanged_shell(rest_api, installed_shells, tmp_path: Path):
+    shell_path = _create_shell(tmp_path / "shell.zip")
+    shell_conf = ShellConfig(
+        **{"Name": "Cisco IOS", "Path": str(shell_path), "Keep Installed": True}
+    )
+
+    _run_tests(rest_api, shell_conf)
+    _run_tests(rest_api, shell_conf)
+
+    rest_api.add_shell.assert_called_once_with(str(shell_path))
+    rest_api.delete_shell.assert_not_called()
+
+
+def test_second_run_installs_removed_shell(rest_api, installed_shells, tmp_path: Path):
+    shell_path = _create_shell(tmp_path / "shell.zip")
+    shell_conf = ShellConfig(Name="Cisco IOS", Path=str(shell_path))
+    assert not shell_conf.keep_installed
+
+    _run_tests(rest_api, shell_conf)
+    _run_tests(rest_api, shell_conf)
+
+    assert rest_api.add_shell.call_count == 2
+    assert rest_api.delete_shell.call_count == 2
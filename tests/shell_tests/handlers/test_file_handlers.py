@@ -0,0 +1,46 @@
+from threading import Timer
+
+import pytest
+
+from tests.servers import generate_files
+
+PROTOCOLS = ["ftp", "scp", "tftp"]
+
+
+@pytest.mark.parametrize("protocol", PROTOCOLS)
+def test_read_file(start_server, protocol):
+    files = generate_files({"running": 100_000, "empty": 0})
+    _, handler = start_server(protocol, files)
+
+    assert handler.read_file("running") == files["running"]
+    assert handler.get_file_size("running") == 100_000
+    assert handler.exists("empty")
+    assert not handler.exists("missing")
+
+
+@pytest.mark.parametrize("protocol", PROTOCOLS)
+def test_wait_for_files(start_server, protocol):
+    server, handler = start_server(protocol, generate_files({"first": 10}))
+    Timer(0.3, server.files.put, ("second", b"data")).start()
+
+    handler.wait_for_files(["first", "second"], timeout=5)
+
+    assert handler.read_file("second") == b"data"
+
+
+@pytest.mark.parametrize("protocol", PROTOCOLS)
+def test_wait_for_file_timeout(start_server, protocol):
+    _, handler = start_server(protocol, {})
+
+    with pytest.raises(handler.FILE_NOT_FOUND_ERROR):
+        handler.wait_for_file("missing", timeout=0.3)
+
+
+@pytest.mark.parametrize("protocol", ["ftp", "scp"])
+def test_delete_files(start_server, protocol):
+    server, handler = start_server(protocol, generate_files({"a": 1, "b": 1, "c": 1}))
+
+    handler.delete_file("a")
+    handler.delete_files(["b", "c", "missing"])
+
+    assert len(server.files) == 0
@@ -0,0 +1,46 @@
+import time
+from concurrent import futures as ft
+
+from tests.servers import generate_files
+
+
+def _count_channels(handler) -> list:
+    channels = []
+    open_channel = handler._open_channel
+
+    def _open_channel():
+        channels.append(open_channel())
+        return channels[-1]
+
+    handler._open_channel = _open_channel
+    return channels
+
+
+def test_concurrent_reads_share_one_transport(start_server):
+    files = generate_files({f"file-{i}": 10_000 for i in range(20)})
+    server, handler = start_server("scp", files, latency=0.01)
+    channels = _count_channels(handler)
+
+    with ft.ThreadPoolExecutor(10) as executor:
+        data = dict(zip(files, executor.map(handler.read_file, files)))
+
+    assert data == files
+    assert server.connections == 1
+    assert 1 < len(channels) <= handler.POOL_SIZE
+
+
+def test_reconnect_after_transport_is_dropped(start_server):
+    server, handler = start_server("scp", {"file": b"data"})
+    channels = _count_channels(handler)
+    assert handler.read_file("file") == b"data"
+    transport = handler._transport
+
+    server.drop_connections()
+    deadline = time.monotonic() + 5
+    while transport.is_active() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert handler.read_file("file") == b"data"
+    assert handler._transport is not transport
+    assert server.connections == 2
+    assert len(channels) == 2
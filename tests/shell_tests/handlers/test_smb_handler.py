@@ -0,0 +1,206 @@
+import zipfile
+from concurrent import futures as ft
+from io import BytesIO
+from pathlib import Path
+from threading import Event, Timer
+from unittest.mock import Mock, create_autospec
+
+import pytest
+from smb.SMBConnection import OperationFailure
+
+from shell_tests.configs import CloudShellConfig
+from shell_tests.handlers.smb_handler import CloudShellSmbHandler, SmbHandler
+
+_PYPI_PATH = CloudShellSmbHandler._CS_PYPI_PATH
+
+
+def _shared_file(name: str, size: int) -> Mock:
+    smb_file = Mock(file_size=size, isDirectory=False)
+    smb_file.filename = name
+    return smb_file
+
+
+def _create_dependencies(path: Path, packages: dict[str, bytes]) -> Path:
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in packages.items():
+            zf.writestr(name, data)
+    return path
+
+
+@pytest.fixture
+def smb_mock(monkeypatch) -> SmbHandler:
+    smb_mock = create_autospec(SmbHandler, instance=True)
+    smb_mock.ls.return_value = [
+        _shared_file("PlaceHolder.txt", 0),
+        _shared_file("on_server.whl", 3),
+        _shared_file("other_size.whl", 1),
+    ]
+    uploaded = {}
+
+    def put_file_obj(r_file_path, file_obj, create_dirs=False):
+        uploaded[r_file_path.removeprefix(_PYPI_PATH)] = file_obj.read()
+
+    smb_mock.put_file_obj.side_effect = put_file_obj
+    smb_mock.uploaded = uploaded
+    monkeypatch.setattr(
+        CloudShellSmbHandler, "_create_smb_handler", lambda self: smb_mock
+    )
+    return smb_mock
+
+
+@pytest.fixture
+def cs_smb_handler(smb_mock) -> CloudShellSmbHandler:
+    conf = CloudShellConfig(
+        Host="localhost", User="user", Password="pass", **{"OS User": "u"}
+    )
+    return CloudShellSmbHandler(conf)
+
+
+def test_add_dependencies_skips_existing_packages(cs_smb_handler, smb_mock, tmp_path):
+    dependencies = _create_dependencies(
+        tmp_path / "dependencies.zip",
+        {"on_server.whl": b"abc", "other_size.whl": b"abc", "new.whl": b"new"},
+    )
+
+    cs_smb_handler.add_dependencies_to_offline_pypi(dependencies, "shell")
+
+    assert smb_mock.uploaded == {"other_size.whl": b"abc", "new.whl": b"new"}
+    smb_mock.ls.assert_called_once_with(_PYPI_PATH)
+
+
+def test_add_dependencies_dedupes_packages_between_shells(
+    cs_smb_handler, smb_mock, tmp_path
+):
+    first = _create_dependencies(tmp_path / "first.zip", {"shared.whl": b"shared"})
+    second = _create_dependencies(
+        tmp_path / "second.zip", {"shared.whl": b"shared", "own.whl": b"own"}
+    )
+
+    cs_smb_handler.add_dependencies_to_offline_pypi(first, "first")
+    smb_mock.uploaded.clear()
+    cs_smb_handler.add_dependencies_to_offline_pypi(
+        BytesIO(second.read_bytes()), "second"
+    )
+
+    assert smb_mock.uploaded == {"own.whl": b"own"}
+    smb_mock.ls.assert_called_once_with(_PYPI_PATH)
+
+
+def test_release_removes_only_added_packages_without_owners(
+    cs_smb_handler, smb_mock, tmp_path
+):
+    first = _create_dependencies(
+        tmp_path / "first.zip",
+        {"shared.whl": b"shared", "on_server.whl": b"abc", "other_size.whl": b"abc"},
+    )
+    second = _create_dependencies(
+        tmp_path / "second.zip", {"shared.whl": b"shared", "own.whl": b"own"}
+    )
+    cs_smb_handler.add_dependencies_to_offline_pypi(first, "first")
+    cs_smb_handler.add_dependencies_to_offline_pypi(second, "second")
+
+    cs_smb_handler.release_offline_pypi_packages("first")
+    smb_mock.remove_file.assert_not_called()
+
+    cs_smb_handler.release_offline_pypi_packages("second")
+    removed = {c.args[0] for c in smb_mock.remove_file.call_args_list}
+    assert removed == {f"{_PYPI_PATH}shared.whl", f"{_PYPI_PATH}own.whl"}
+
+    smb_mock.remove_file.reset_mock()
+    cs_smb_handler.release_offline_pypi_packages("second")
+    smb_mock.remove_file.assert_not_called()
+
+
+def test_failed_upload_is_not_released(cs_smb_handler, smb_mock, tmp_path):
+    dependencies = _create_dependencies(
+        tmp_path / "dependencies.zip", {"failed.whl": b"failed", "new.whl": b"new"}
+    )
+    put_file_obj = smb_mock.put_file_obj.side_effect
+
+    def fail_upload(r_file_path, file_obj, create_dirs=False):
+        if r_file_path.endswith("failed.whl"):
+            raise OSError("connection reset")
+        put_file_obj(r_file_path, file_obj, create_dirs)
+
+    smb_mock.put_file_obj.side_effect = fail_upload
+
+    with pytest.raises(OSError, match="connection reset"):
+        cs_smb_handler.add_dependencies_to_offline_pypi(dependencies, "shell")
+    cs_smb_handler.release_offline_pypi_packages("shell")
+
+    smb_mock.remove_file.assert_called_once_with(f"{_PYPI_PATH}new.whl")
+
+
+def test_release_ignores_already_removed_packages(cs_smb_handler, smb_mock, tmp_path):
+    dependencies = _create_dependencies(
+        tmp_path / "dependencies.zip", {"new.whl": b"new"}
+    )
+    cs_smb_handler.add_dependencies_to_offline_pypi(dependencies, "shell")
+    smb_mock.remove_file.side_effect = OperationFailure("Delete failed", [])
+
+    cs_smb_handler.release_offline_pypi_packages("shell")
+
+    smb_mock.ls.assert_called_with(_PYPI_PATH, use_cache=False)
+
+
+def test_add_dependencies_during_release_uploads_again(
+    cs_smb_handler, smb_mock, tmp_path
+):
+    dependencies = _create_dependencies(
+        tmp_path / "dependencies.zip", {"shared.whl": b"shared"}
+    )
+    cs_smb_handler.add_dependencies_to_offline_pypi(dependencies, "first")
+    put_file_obj = smb_mock.put_file_obj.side_effect
+    calls = []
+    removing = Event()
+    resume = Event()
+
+    def upload(r_file_path, file_obj, create_dirs=False):
+        calls.append("put")
+        put_file_obj(r_file_path, file_obj, create_dirs)
+
+    def remove_file(r_file_path):
+        removing.set()
+        resume.wait(5)
+        calls.append("remove")
+
+    smb_mock.put_file_obj.side_effect = upload
+    smb_mock.remove_file.side_effect = remove_file
+
+    with ft.ThreadPoolExecutor(1) as executor:
+        release = executor.submit(cs_smb_handler.release_offline_pypi_packages, "first")
+        assert removing.wait(5)
+        # the second shell adds the package while it's being removed
+        Timer(0.1, resume.set).start()
+        cs_smb_handler.add_dependencies_to_offline_pypi(dependencies, "second")
+        release.result()
+
+    assert calls == ["remove", "put"]
+    cs_smb_handler.release_offline_pypi_packages("second")
+    assert calls == ["remove", "put", "remove"]
+
+
+@pytest.mark.parametrize(
+    ("settings", "log_level"),
+    (
+        (
+            '<add key="DefaultPythonEnvrionmentVariables" value="LOG_LEVEL=DEBUG" />',
+            "DEBUG",
+        ),
+        (
+            '<add key="Other" value="1" />'
+            '<add key="DefaultPythonEnvrionmentVariables" value="LOG_LEVEL=INFO" />',
+            "INFO",
+        ),
+        ('<add key="Other" value="LOG_LEVEL=DEBUG" />', None),
+        ("", None),
+    ),
+)
+def test_get_execution_server_log_level(cs_smb_handler, smb_mock, settings, log_level):
+    config = f'<?xml version="1.0"?><appSettings>{settings}</appSettings>'
+    smb_mock.get_r_file.return_value = config.encode()
+
+    assert cs_smb_handler.get_execution_server_log_level() == log_level
+    r_file_path = smb_mock.get_r_file.call_args.args[0]
+    assert r_file_path.startswith(r"Program Files (x86)\\QualiSystems\\TestShell")
+    assert r_file_path.endswith(r"ExecutionServer\\customer.config")
@@ -0,0 +1,64 @@
+from pathlib import Path
+from unittest.mock import Mock, create_autospec
+from zipfile import ZipFile
+
+from shell_tests.configs import AppConfig, BlueprintConfig
+from shell_tests.handlers.cs_handler import CloudShellHandler
+from shell_tests.helpers.app_helpers import create_apps_and_blueprints
+
+
+def test_create_apps_and_blueprints():
+    conf = Mock(
+        apps_conf=[
+            AppConfig(
+                **{
+                    "Name": f"app-{i}",
+                    "CP Resource Name": "vcenter",
+                    "Deployment": "vCenter VM From Template",
+                }
+            )
+            for i in range(3)
+        ],
+        blueprints_conf=[
+            BlueprintConfig(Name="bp-1", Apps=["app-0", "app-1"]),
+            BlueprintConfig(Name="bp-2", Apps=["app-2"]),
+        ],
+    )
+    cp = Mock(model="VMware vCenter Cloud Provider 2G")
+    cp.name = "vcenter"
+    cs_handler = create_autospec(CloudShellHandler, instance=True)
+    handler_storage = Mock(
+        cs_handler=cs_handler, resource_handlers_dict={"vcenter": cp}
+    )
+    imported = []
+
+    def _import_package(path: Path):
+        with ZipFile(path) as zf:
+            imported.append(sorted(zf.namelist()))
+
+    cs_handler.import_package.side_effect = _import_package
+
+    create_apps_and_blueprints(conf, handler_storage)
+
+    assert imported == [
+        [
+            "App Templates/app-0.xml",
+            "App Templates/app-1.xml",
+            "App Templates/app-2.xml",
+            "Topologies/bp-1.xml",
+            "Topologies/bp-2.xml",
+            "Topology Drivers/Python Setup & Teardown.dll",
+            "metadata.xml",
+        ]
+    ]
+    path = cs_handler.import_package.call_args.args[0]
+    assert not path.exists()
+
+
+def test_create_apps_and_blueprints_without_apps():
+    conf = Mock(apps_conf=[], blueprints_conf=[])
+    handler_storage = Mock()
+
+    create_apps_and_blueprints(conf, handler_storage)
+
+    handler_storage.cs_handler.import_package.assert_not_called()
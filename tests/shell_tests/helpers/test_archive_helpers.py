@@ -0,0 +1,56 @@
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from shell_tests.helpers.archive_helpers import ArchiveFormat, open_archive
+
+
+def _fill_archive(path: Path, archive_format: ArchiveFormat) -> Path:
+    with open_archive(path, archive_format) as archive:
+        archive.add_dir("logs/shell_logs")
+        with archive.open_member("logs/shell_logs/full.log", 5) as fo:
+            fo.write(b"abc")
+            fo.write(b"deXXX")  # more than expected is dropped
+        with archive.open_member("logs/shell_logs/truncated.log", 4) as fo:
+            fo.write(b"ab")
+    return archive.path
+
+
+def test_tar_gz_archive(tmp_path: Path):
+    path = _fill_archive(tmp_path / "logs", ArchiveFormat.TAR_GZ)
+
+    assert path.name == "logs.tar.gz"
+    with tarfile.open(path) as tf:
+        assert tf.getmember("logs/shell_logs").isdir()
+        assert tf.extractfile("logs/shell_logs/full.log").read() == b"abcde"
+        assert tf.extractfile("logs/shell_logs/truncated.log").read() == b"ab\0\0"
+
+
+def test_zip_archive(tmp_path: Path):
+    path = _fill_archive(tmp_path / "logs", ArchiveFormat.ZIP)
+
+    assert path.name == "logs.zip"
+    with zipfile.ZipFile(path) as zf:
+        assert zf.getinfo("logs/shell_logs/").is_dir()
+        assert zf.read("logs/shell_logs/full.log") == b"abcde"
+        assert zf.read("logs/shell_logs/truncated.log") == b"ab"
+
+
+def test_tar_zst_falls_back_to_tar_gz(tmp_path: Path, monkeypatch):
+    from shell_tests.helpers import archive_helpers
+
+    monkeypatch.setattr(archive_helpers, "zstandard", None)
+    path = _fill_archive(tmp_path / "logs", ArchiveFormat.TAR_ZST)
+
+    assert path.name == "logs.tar.gz"
+    with tarfile.open(path) as tf:
+        assert tf.extractfile("logs/shell_logs/full.log").read() == b"abcde"
+
+
+@pytest.mark.parametrize("archive_format", list(ArchiveFormat))
+def test_archive_replaces_previous_one(tmp_path: Path, archive_format):
+    first = _fill_archive(tmp_path / "logs", archive_format)
+    second = _fill_archive(tmp_path / "logs", archive_format)
+    assert first == second
@@ -0,0 +1,121 @@
+import socket
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from shell_tests.configs import HostConfig, ResourceConfig, TftpConfig
+from shell_tests.errors import ResourceIsNotAliveError
+from shell_tests.helpers import check_resource_is_alive
+from shell_tests.helpers.check_resource_is_alive import (
+    HostProbe,
+    check_all_resources_is_alive,
+    probe_hosts,
+)
+
+from tests.servers import FileStorage, Link, TftpServer
+
+
+@pytest.fixture()
+def no_icmp(monkeypatch):
+    def _check_icmp(host: str, timeout: float) -> float:
+        raise OSError("no ICMP echo reply")
+
+    monkeypatch.setattr(check_resource_is_alive, "check_icmp", _check_icmp)
+
+
+@pytest.fixture()
+def open_port():
+    with socket.create_server(("127.0.0.1", 0)) as sock:
+        yield sock.getsockname()[1]
+
+
+@pytest.fixture()
+def closed_port() -> int:
+    with socket.create_server(("127.0.0.1", 0)) as sock:
+        return sock.getsockname()[1]
+
+
+@pytest.fixture()
+def tftp_port():
+    server = TftpServer(FileStorage(), Link())
+    server.start()
+    yield server.port
+    server.stop()
+
+
+def _slow_check(timeout: float) -> float:
+    time.sleep(timeout)
+    raise OSError("timed out")
+
+
+def test_probe_hosts(no_icmp, open_port, closed_port):
+    probes = [
+        HostProbe.tcp("device", "127.0.0.1", (closed_port, open_port)),
+        HostProbe.tcp("cs", "127.0.0.1", (open_port, closed_port), all_ports=True),
+        HostProbe("slow", "127.0.0.1", {"TCP 22": _slow_check}),
+    ]
+
+    start_time = time.monotonic()
+    device, cs, slow = probe_hosts(probes, timeout=0.5)
+
+    assert time.monotonic() - start_time < 1
+    assert device.is_alive
+    assert device.latency == device.latencies[f"TCP {open_port}"]
+    assert set(device.errors) == {"ICMP", f"TCP {closed_port}"}
+    assert not cs.is_alive
+    assert not slow.is_alive
+    assert slow.latency is None
+    assert f"TCP {open_port} " in str(device)
+    assert "slow (127.0.0.1) is not alive: ICMP failed" in str(slow)
+
+
+def test_probe_hosts_with_more_checks_than_workers(no_icmp, monkeypatch):
+    monkeypatch.setattr(check_resource_is_alive, "MAX_WORKERS", 2)
+
+    def _slow_port(timeout: float) -> float:
+        if timeout < 0.5:
+            raise OSError("timed out")
+        time.sleep(0.1)
+        return 0.1
+
+    probes = [
+        HostProbe(f"device-{i}", "127.0.0.1", {"TCP 22": _slow_port}) for i in range(8)
+    ]
+
+    results = probe_hosts(probes, timeout=0.5)
+
+    assert all(result.is_alive for result in results)
+
+
+def test_check_all_resources_is_alive(
+    no_icmp, open_port, closed_port, tftp_port, monkeypatch
+):
+    monkeypatch.setattr(check_resource_is_alive, "DEVICE_PORTS", (closed_port,))
+    conf = Mock(
+        ftp_conf=HostConfig(Host=f"127.0.0.1:{open_port}"),
+        scp_conf=HostConfig(Host=f"127.0.0.1:{closed_port}"),
+        tftp_conf=TftpConfig(Host=f"127.0.0.1:{tftp_port}"),
+        do_conf=None,
+        cs_conf=Mock(host="127.0.0.1", os_user="", os_password=""),
+    )
+    conf.iter_resources_conf.return_value = [
+        ResourceConfig(
+            **{"Name": "device", "Shell Name": "s", "Device IP": "127.0.0.1"}
+        ),
+        ResourceConfig(**{"Name": "without-device", "Shell Name": "s"}),
+        ResourceConfig(
+            **{
+                "Name": "custom-port",
+                "Shell Name": "s",
+                "Device IP": "127.0.0.1",
+                "Attributes": {"CLI TCP Port": str(open_port)},
+            }
+        ),
+    ]
+
+    with pytest.raises(ResourceIsNotAliveError) as exc_info:
+        check_all_resources_is_alive(conf, timeout=0.5)
+
+    failed = str(exc_info.value).splitlines()[1:]
+    assert [line.split(" ", 1)[0] for line in failed] == ["device", "SCP", "CloudShell"]
@@ -0,0 +1,48 @@
+from unittest.mock import create_autospec
+
+from shell_tests.handlers.ftp_handler import FTPHandler
+from shell_tests.handlers.scp_handler import SCPHandler
+from shell_tests.helpers.cleanup_queue import CleanupQueue
+
+
+def test_cleanup_queue_deletes_files_in_batches():
+    ftp_handler = create_autospec(FTPHandler, instance=True)
+    scp_handler = create_autospec(SCPHandler, instance=True)
+    queue = CleanupQueue()
+    queue.BATCH_DELAY = 60  # everything is deleted on flush
+
+    queue.add(ftp_handler, "running-1")
+    queue.add(scp_handler, "running-2")
+    queue.add(ftp_handler, "startup-1")
+    queue.flush()
+
+    ftp_handler.delete_files.assert_called_once_with(["running-1", "startup-1"])
+    scp_handler.delete_files.assert_called_once_with(["running-2"])
+    assert queue.deleted == 3
+
+
+def test_cleanup_queue_ignores_errors():
+    ftp_handler = create_autospec(FTPHandler, instance=True)
+    ftp_handler.delete_files.side_effect = [EOFError, None]
+    queue = CleanupQueue()
+    queue.MAX_BATCH_SIZE = 1
+
+    queue.add(ftp_handler, "running-1")
+    queue.add(ftp_handler, "running-2")
+    queue.flush()
+
+    assert ftp_handler.delete_files.call_count == 2
+    assert queue.deleted == 1
+
+
+def test_cleanup_queue_can_be_reused_after_flush():
+    ftp_handler = create_autospec(FTPHandler, instance=True)
+    queue = CleanupQueue()
+    queue.flush()  # nothing to flush
+
+    queue.add(ftp_handler, "running-1")
+    queue.flush()
+    queue.add(ftp_handler, "running-2")
+    queue.flush()
+
+    assert queue.deleted == 2
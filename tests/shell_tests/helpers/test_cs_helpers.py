@@ -0,0 +1,111 @@
+from unittest.mock import Mock, create_autospec
+
+import pytest
+
+from shell_tests.configs import ResourceConfig
+from shell_tests.errors import DependenciesBrokenError
+from shell_tests.handlers.cs_handler import CloudShellHandler
+from shell_tests.handlers.resource_handler import ResourceHandler
+from shell_tests.handlers.sandbox_handler import SandboxHandler
+from shell_tests.handlers.smb_handler import CloudShellSmbHandler
+from shell_tests.helpers import cs_helpers
+from shell_tests.helpers.cs_helpers import (
+    prewarm_venvs,
+    set_debug_level_via_blueprint,
+    set_debug_log_level,
+)
+from shell_tests.report_result import Reporting, VenvReport
+
+
+def _create_resource(name: str, model: str, driver_hash: str) -> ResourceHandler:
+    resource = create_autospec(ResourceHandler, instance=True)
+    resource.name = name
+    resource.model = model
+    resource.driver_hash = driver_hash
+    resource.conf = ResourceConfig(**{"Name": name, "Shell Name": f"{model} Shell"})
+    return resource
+
+
+@pytest.fixture()
+def sandbox(monkeypatch) -> SandboxHandler:
+    sandbox = create_autospec(SandboxHandler, instance=True)
+    monkeypatch.setattr(cs_helpers.SandboxHandler, "create", Mock(return_value=sandbox))
+    return sandbox
+
+
+def test_prewarm_venvs(sandbox):
+    resources = [
+        _create_resource("ios-1", "CiscoIOS", "a"),
+        _create_resource("ios-2", "CiscoIOS", "a"),
+        _create_resource("ios-new", "CiscoIOS", "b"),
+        _create_resource("junos", "Junos", "c"),
+    ]
+    resources[2].health_check.side_effect = Exception("Device is not reachable")
+    resources[3].health_check.side_effect = DependenciesBrokenError("no package")
+    handler_storage = Mock(resource_handlers=resources)
+
+    venv_reports = prewarm_venvs(handler_storage)
+
+    assert [r.model for r in venv_reports] == ["CiscoIOS", "CiscoIOS", "Junos"]
+    assert [r.is_success for r in venv_reports] == [True, True, False]
+    assert venv_reports[0].shell_name == "CiscoIOS Shell"
+    assert all(r.build_time >= 0 for r in venv_reports)
+    resources[0].health_check.assert_not_called()
+    resources[1].health_check.assert_called_once_with()
+    assert sandbox.remove_resource_from_reservation.call_count == 3
+    sandbox.finish.assert_called_once_with(wait=False)
+
+    report = Reporting()
+    report.venv_reports = venv_reports
+    assert not report.is_success
+    assert str(report).startswith("Tests was unsuccessful")
+    assert "Model: Junos, venv build time: " in str(report)
+
+
+def test_prewarm_venvs_without_resources(sandbox):
+    assert prewarm_venvs(Mock(resource_handlers=[])) == []
+    cs_helpers.SandboxHandler.create.assert_not_called()
+
+
+def test_set_debug_log_level_uses_venv_reports(sandbox):
+    resources = [
+        _create_resource("ios", "CiscoIOS", "a"),
+        _create_resource("junos", "Junos", "b"),
+    ]
+    cs_smb_handler = create_autospec(CloudShellSmbHandler, instance=True)
+    cs_smb_handler.get_venv_names.return_value = ["CiscoIOS_1", "CiscoIOS_2"]
+    cs_smb_handler.get_qs_config.return_value = b"LOG_LEVEL='INFO'"
+    handler_storage = Mock(resource_handlers=resources, cs_smb_handler=cs_smb_handler)
+    handler_storage.conf.shells_conf = []
+    venv_reports = [
+        VenvReport("CiscoIOS Shell", "CiscoIOS", 1, True),
+        VenvReport("Junos Shell", "Junos", 1, False, "Dependencies are broken"),
+    ]
+
+    set_debug_log_level(handler_storage, venv_reports)
+
+    cs_helpers.SandboxHandler.create.assert_not_called()
+    resources[0].health_check.assert_not_called()
+    cs_smb_handler.put_qs_config.assert_called_once_with(
+        "CiscoIOS_2", b"LOG_LEVEL='DEBUG'"
+    )
+
+
+@pytest.mark.parametrize(
+    ("log_level", "is_changed"),
+    (("DEBUG", False), ("INFO", True), (None, True), (OSError("no SMB"), True)),
+)
+def test_set_debug_level_via_blueprint(log_level, is_changed):
+    cs_handler = create_autospec(CloudShellHandler, instance=True)
+    cs_handler.create_topology_reservation.return_value = "rid"
+    cs_smb_handler = create_autospec(CloudShellSmbHandler, instance=True)
+    cs_smb_handler.get_execution_server_log_level.side_effect = [log_level]
+
+    set_debug_level_via_blueprint(cs_handler, cs_smb_handler)
+
+    assert cs_handler.execute_reservation_command.called is is_changed
+    if is_changed:
+        cs_handler.end_reservation.assert_called_once_with("rid", "scripts", wait=False)
+    else:
+        cs_handler.import_package.assert_not_called()
+        cs_handler.create_topology_reservation.assert_not_called()
@@ -0,0 +1,131 @@
+import struct
+import zipfile
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+from shell_tests.helpers import dependencies_helpers
+from shell_tests.helpers.dependencies_helpers import patch_dependencies
+
+LOGGING_WHL = "cloudshell_logging-1.2.0-py3-none-any.whl"
+QS_CONFIG = b"[Logging]\nLOG_LEVEL='INFO'\n"
+
+
+class _NonSeekable(BytesIO):
+    """Zip written to it uses data descriptors."""
+
+    def seekable(self):
+        return False
+
+
+def _create_logging_whl() -> bytes:
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("cloudshell/logging/__init__.py", "")
+        zf.writestr("cloudshell/logging/qs_config.ini", QS_CONFIG)
+    return buffer.getvalue()
+
+
+@pytest.fixture()
+def dependencies_path(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.setattr(
+        dependencies_helpers, "get_cache_dir", lambda name: tmp_path / "cache" / name
+    )
+    buffer = _NonSeekable()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("cloudshell_core-1.0.0.zip", b"core" * 1000)
+        zf.writestr(LOGGING_WHL, _create_logging_whl())
+        zf.writestr("readme.txt", b"stored", compress_type=zipfile.ZIP_STORED)
+    path = tmp_path / "dependencies.zip"
+    path.write_bytes(buffer.getvalue())
+    return path
+
+
+def _read_raw_members(path: Path) -> dict[str, bytes]:
+    data = path.read_bytes()
+    with zipfile.ZipFile(path) as zf:
+        return {
+            info.filename: data[
+                info.header_offset : info.header_offset + info.compress_size + 100
+            ].split(info.filename.encode(), 1)[1][: info.compress_size]
+            for info in zf.infolist()
+        }
+
+
+def test_patch_dependencies(dependencies_path: Path):
+    raw_members = _read_raw_members(dependencies_path)
+
+    patch_dependencies(dependencies_path)
+
+    with zipfile.ZipFile(dependencies_path) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == list(raw_members)
+        with zipfile.ZipFile(BytesIO(zf.read(LOGGING_WHL))) as logging_zip:
+            assert logging_zip.testzip() is None
+            config = logging_zip.read("cloudshell/logging/qs_config.ini")
+        assert config == b"[Logging]\nLOG_LEVEL='DEBUG'\n"
+        assert zf.read("readme.txt") == b"stored"
+
+    new_raw_members = _read_raw_members(dependencies_path)
+    for name in ("cloudshell_core-1.0.0.zip", "readme.txt"):
+        assert new_raw_members[name] == raw_members[name]
+    assert list(dependencies_path.parent.glob("tmp*")) == []
+
+
+def test_patch_dependencies_uses_cache(dependencies_path: Path, monkeypatch):
+    original_data = dependencies_path.read_bytes()
+    patch_dependencies(dependencies_path)
+    patched_data = dependencies_path.read_bytes()
+
+    def _copy(*args, **kwargs):
+        raise AssertionError("Dependencies shouldn't be patched again")
+
+    monkeypatch.setattr(dependencies_helpers, "copy_zip_with_replacement", _copy)
+    dependencies_path.write_bytes(original_data)
+    patch_dependencies(dependencies_path)
+
+    assert dependencies_path.read_bytes() == patched_data
+
+
+def test_patch_dependencies_with_unusable_cache(
+    dependencies_path: Path, tmp_path: Path, monkeypatch
+):
+    # the cache dir can't be created, e.g. ~/.cache is read-only
+    (tmp_path / "file").touch()
+    monkeypatch.setattr(
+        dependencies_helpers, "get_cache_dir", lambda name: tmp_path / "file" / name
+    )
+
+    patch_dependencies(dependencies_path)
+
+    with zipfile.ZipFile(dependencies_path) as zf:
+        with zipfile.ZipFile(BytesIO(zf.read(LOGGING_WHL))) as logging_zip:
+            config = logging_zip.read("cloudshell/logging/qs_config.ini")
+    assert config == b"[Logging]\nLOG_LEVEL='DEBUG'\n"
+
+
+def test_strip_zip64_extra():
+    zip64 = struct.pack("<HHQ", 1, 8, 2**33)
+    other = struct.pack("<HH4s", 0x5455, 4, b"time")
+
+    assert dependencies_helpers._strip_zip64_extra(other + zip64 + other) == (
+        other + other
+    )
+
+
+def test_copy_zip_warns_on_duplicate_names():
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf, pytest.warns(UserWarning):
+        zf.writestr("name.txt", b"first")
+        zf.writestr("name.txt", b"second")
+
+    dst = BytesIO()
+    with zipfile.ZipFile(buffer) as zf, pytest.warns(
+        UserWarning, match="Duplicate name: 'name.txt'"
+    ):
+        dependencies_helpers.copy_zip_with_replacement(zf, dst, {})
+
+    with zipfile.ZipFile(dst) as zf:
+        assert zf.testzip() is None
+        assert [info.filename for info in zf.infolist()] == ["name.txt"] * 2
@@ -0,0 +1,105 @@
+import socket
+from threading import Timer
+from unittest.mock import Mock
+
+import pytest
+
+from shell_tests.configs import ResourceConfig
+from shell_tests.errors import DeviceIsNotReachableError
+from shell_tests.handlers.resource_handler import DeviceType, ResourceHandler
+from shell_tests.helpers import check_resource_is_alive
+from shell_tests.helpers.device_monitor import DeviceMonitor
+from shell_tests.report_result import ResourceReport
+
+
+@pytest.fixture(autouse=True)
+def no_icmp(monkeypatch):
+    def _check_icmp(host: str, timeout: float) -> float:
+        raise OSError("no ICMP echo reply")
+
+    monkeypatch.setattr(check_resource_is_alive, "check_icmp", _check_icmp)
+
+
+def _create_resource(
+    name: str, device_ip: str | None, cli_port: int | None = None
+) -> ResourceHandler:
+    attributes = {"CLI TCP Port": str(cli_port)} if cli_port else {}
+    conf = ResourceConfig(
+        **{
+            "Name": name,
+            "Shell Name": "shell",
+            "Device IP": device_ip,
+            "Attributes": attributes,
+        }
+    )
+    return ResourceHandler(conf, Mock(), Mock())
+
+
+def test_device_monitor_marks_devices():
+    server = socket.create_server(("127.0.0.1", 0))
+    port = server.getsockname()[1]
+    resource = _create_resource("device", "127.0.0.1", port)
+    same_device = _create_resource("same-device", "127.0.0.1", port)
+    without_device = _create_resource("without-device", None)
+    monitor = DeviceMonitor([resource, same_device, without_device])
+    monitor.PROBE_TIMEOUT = 0.5
+
+    monitor.probe()
+    server.close()
+    monitor.probe()
+    assert resource.reachability_timeline == []
+
+    monitor.probe()
+    assert [is_up for _, is_up in resource.reachability_timeline] == [False]
+    assert [is_up for _, is_up in same_device.reachability_timeline] == [False]
+    assert without_device.reachability_timeline == []
+
+    server = socket.create_server(("127.0.0.1", port))
+    monitor.probe()
+    server.close()
+    assert [is_up for _, is_up in resource.reachability_timeline] == [False, True]
+
+    report = ResourceReport(
+        "device",
+        "127.0.0.1",
+        DeviceType.SIMULATOR,
+        "CS_Switch",
+        True,
+        "",
+        resource.reachability_timeline,
+    )
+    assert "Device reachability: down " in str(report)
+
+
+def test_device_monitor_does_not_ping(monkeypatch):
+    check_icmp = Mock(return_value=0.1)
+    monkeypatch.setattr(check_resource_is_alive, "check_icmp", check_icmp)
+    with socket.create_server(("127.0.0.1", 0)) as server:
+        port = server.getsockname()[1]
+        resource = _create_resource("device", "127.0.0.1", port)
+        monitor = DeviceMonitor([resource])
+
+        monitor.probe()
+
+    check_icmp.assert_not_called()
+    assert resource.reachability_timeline == []
+
+    # without ports ICMP is the only check
+    probe = check_resource_is_alive.HostProbe("device", "127.0.0.1", {}, icmp=False)
+    assert list(probe.get_checks()) == ["ICMP"]
+
+
+def test_commands_wait_for_the_device():
+    resource = _create_resource("device", "127.0.0.1")
+    resource.sandbox_handler = Mock()
+    resource.UNREACHABLE_WAIT = 0.1
+    resource.set_reachable(False)
+
+    with pytest.raises(DeviceIsNotReachableError):
+        resource.health_check()
+    resource.sandbox_handler.execute_resource_command.assert_not_called()
+
+    resource.UNREACHABLE_WAIT = 5
+    Timer(0.1, resource.set_reachable, (True,)).start()
+    resource.health_check()
+    resource.sandbox_handler.execute_resource_command.assert_called_once()
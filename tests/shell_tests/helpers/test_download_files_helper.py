@@ -0,0 +1,117 @@
+import hashlib
+import json
+import threading
+from concurrent import futures as ft
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from shell_tests.helpers import download_files_helper
+from shell_tests.helpers.download_files_helper import DownloadCache, DownloadFile
+
+FILES = {"/shell.zip": b"shell" * 100, "/dependencies.zip": b"deps" * 100}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        data = FILES[self.path]
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        self.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def http_url():
+    _Handler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_download_cache_uses_conditional_get(http_url, tmp_path: Path):
+    url = f"{http_url}/shell.zip"
+    path = DownloadCache(tmp_path).get(url)
+
+    assert path.name == "shell.zip"
+    assert path.read_bytes() == FILES["/shell.zip"]
+
+    # next run sends ETag and gets 304
+    assert DownloadCache(tmp_path).get(url) == path
+    assert [etag is not None for _, etag in _Handler.requests] == [False, True]
+
+
+def test_download_cache_downloads_url_once(http_url, tmp_path: Path):
+    cache = DownloadCache(tmp_path)
+    urls = [f"{http_url}/shell.zip", f"{http_url}/dependencies.zip"]
+
+    cache.prefetch(urls * 2)
+    paths = [cache.get(url) for url in urls]
+
+    assert [p.read_bytes() for p in paths] == list(FILES.values())
+    assert len(_Handler.requests) == 2
+
+
+def test_download_caches_of_concurrent_runs_save_index(tmp_path: Path, monkeypatch):
+    warning = Mock()
+    monkeypatch.setattr(download_files_helper.logger, "warning", warning)
+    caches = [DownloadCache(tmp_path) for _ in range(4)]
+    entry = {"sha256": "abc", "name": "shell.zip", "size": 1}
+
+    with ft.ThreadPoolExecutor(8) as executor:
+        futures = [
+            executor.submit(cache._update_entry, f"url-{i}", dict(entry))
+            for i in range(50)
+            for cache in caches
+        ]
+    for future in futures:
+        future.result()
+
+    warning.assert_not_called()
+    assert json.loads((tmp_path / DownloadCache.INDEX_NAME).read_text())
+    assert [path.name for path in tmp_path.iterdir()] == [DownloadCache.INDEX_NAME]
+
+
+def test_download_cache_evicts_least_recently_used(http_url, tmp_path: Path):
+    DownloadCache(tmp_path).get(f"{http_url}/shell.zip")
+    shell_path = DownloadCache(tmp_path).get(f"{http_url}/shell.zip")
+    cache = DownloadCache(tmp_path, max_size=len(FILES["/dependencies.zip"]))
+
+    deps_path = cache.get(f"{http_url}/dependencies.zip")
+
+    assert deps_path.exists()
+    assert not shell_path.exists()
+
+
+def test_download_file_is_a_copy_of_the_cached_one(
+    http_url, tmp_path: Path, monkeypatch
+):
+    cache = DownloadCache(tmp_path / "cache")
+    monkeypatch.setattr(download_files_helper, "download_cache", cache)
+    url = f"{http_url}/dependencies.zip"
+
+    first = DownloadFile(url).path
+    first.write_bytes(b"patched")
+    second = DownloadFile(url).path
+
+    assert first != second
+    assert second.read_bytes() == FILES["/dependencies.zip"]
+    assert cache.get(url).read_bytes() == FILES["/dependencies.zip"]
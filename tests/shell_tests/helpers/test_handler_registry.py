@@ -0,0 +1,89 @@
+from unittest.mock import Mock
+
+import pytest
+
+from shell_tests.configs import ResourceConfig, SandboxConfig
+from shell_tests.helpers.handler_registry import HandlerRegistry
+from shell_tests.helpers.handler_storage import HandlerStorage
+
+
+def _resource(name: str, shell_name: str) -> Mock:
+    conf = ResourceConfig(Name=name, **{"Shell Name": shell_name})
+    handler = Mock(conf=conf)
+    handler.name = name
+    return handler
+
+
+@pytest.fixture()
+def conf() -> Mock:
+    conf = Mock()
+    conf.iter_sandboxes_conf.return_value = [
+        SandboxConfig(Name="sandbox-1", Resources=["cisco-1", "juniper-1"]),
+        SandboxConfig(Name="sandbox-2", Resources=["cisco-1", "cisco-2"]),
+    ]
+    return conf
+
+
+@pytest.fixture()
+def registry(conf) -> HandlerRegistry:
+    return HandlerRegistry(conf)
+
+
+def test_registry_indexes(registry: HandlerRegistry):
+    cisco1 = _resource("cisco-1", "Cisco")
+    cisco2 = _resource("cisco-2", "Cisco")
+    juniper1 = _resource("juniper-1", "Juniper")
+    for handler in (cisco1, cisco2, juniper1):
+        registry.add_resource(handler)
+
+    assert registry.resources["cisco-2"] is cisco2
+    assert registry.get_resources_by_sandbox("sandbox-1") == [cisco1, juniper1]
+    assert registry.get_resources_by_sandbox("sandbox-2") == [cisco1, cisco2]
+
+
+def test_registry_updates_indexes(registry: HandlerRegistry):
+    cisco1 = _resource("cisco-1", "Cisco")
+    cisco2 = _resource("cisco-2", "Cisco")
+    registry.add_resource(cisco1)
+    registry.add_resource(cisco2)
+
+    registry.remove_resource(cisco2)
+
+    assert registry.resources == {"cisco-1": cisco1}
+    assert registry.get_resources_by_sandbox("sandbox-2") == [cisco1]
+
+
+def test_registry_removes_resource_once(registry: HandlerRegistry):
+    cisco1 = _resource("cisco-1", "Cisco")
+    registry.add_resource(cisco1)
+
+    registry.remove_resource(cisco1)
+    registry.remove_resource(cisco1)
+
+    assert registry.resources == {}
+    assert registry.get_resources_by_sandbox("sandbox-1") == []
+
+
+def test_handler_storage_finish_twice(conf):
+    storage = HandlerStorage(Mock(), conf)
+    registry = storage.registry
+    cisco1 = _resource("cisco-1", "Cisco")
+    storage._resource_handlers = [cisco1]
+    registry.add_resource(cisco1)
+
+    # a failed setup finishes the storage and then the runner finishes it again
+    storage.finish()
+    storage.finish()
+
+    assert cisco1.finish.call_count == 2
+    assert registry.resources == {}
+
+
+def test_registry_mappings_are_read_only(registry: HandlerRegistry):
+    registry.add_resource(_resource("cisco-1", "Cisco"))
+
+    with pytest.raises(TypeError):
+        registry.resources["cisco-2"] = _resource("cisco-2", "Cisco")
+    with pytest.raises(TypeError):
+        registry.shells["shell"] = Mock()
+    assert list(registry.resources) == ["cisco-1"]
@@ -0,0 +1,101 @@
+import time
+from concurrent import futures as ft
+from threading import Lock
+from unittest.mock import Mock
+
+import pytest
+
+from shell_tests.helpers.session_pool import SessionPool
+
+
+class BrokenSessionError(Exception):
+    pass
+
+
+@pytest.fixture
+def pool_fns():
+    return Mock(), Mock(return_value=True), Mock()
+
+
+def _create_pool(pool_fns, **kwargs) -> SessionPool:
+    create_fn, is_alive_fn, close_fn = pool_fns
+    create_fn.side_effect = lambda: object()
+    return SessionPool(
+        create_fn,
+        is_alive_fn,
+        close_fn,
+        broken_exceptions=(BrokenSessionError,),
+        **kwargs,
+    )
+
+
+def test_session_is_reused_without_liveness_check(pool_fns):
+    create_fn, is_alive_fn, _ = pool_fns
+    pool = _create_pool(pool_fns)
+
+    with pool.get() as first:
+        pass
+    with pool.get() as second:
+        pass
+
+    assert first is second
+    create_fn.assert_called_once()
+    is_alive_fn.assert_not_called()
+
+
+def test_idle_session_is_checked_and_replaced(pool_fns, monkeypatch):
+    create_fn, is_alive_fn, close_fn = pool_fns
+    is_alive_fn.return_value = False
+    pool = _create_pool(pool_fns, idle_timeout=10)
+    with pool.get() as first:
+        pass
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    with pool.get() as second:
+        pass
+
+    assert first is not second
+    is_alive_fn.assert_called_once_with(first)
+    close_fn.assert_called_once_with(first)
+
+
+def test_broken_session_is_closed(pool_fns):
+    _, _, close_fn = pool_fns
+    pool = _create_pool(pool_fns)
+
+    with pytest.raises(BrokenSessionError):
+        with pool.get() as first:
+            raise BrokenSessionError
+    with pytest.raises(ValueError):
+        with pool.get() as second:
+            raise ValueError
+    with pool.get() as third:
+        pass
+
+    close_fn.assert_called_once_with(first)
+    assert second is third
+
+
+def test_pool_size_limits_concurrent_sessions(pool_fns):
+    create_fn, _, _ = pool_fns
+    pool = _create_pool(pool_fns, size=2)
+    lock = Lock()
+    in_use = set()
+    max_in_use = 0
+
+    def use_session():
+        nonlocal max_in_use
+        with pool.get() as session:
+            with lock:
+                in_use.add(session)
+                max_in_use = max(max_in_use, len(in_use))
+            time.sleep(0.01)
+            with lock:
+                in_use.discard(session)
+
+    with ft.ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda _: use_session(), range(16)))
+
+    assert max_in_use == 2
+    assert create_fn.call_count == 2
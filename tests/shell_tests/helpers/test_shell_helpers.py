@@ -0,0 +1,115 @@
+import hashlib
+import zipfile
+from concurrent import futures as ft
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+import yaml
+
+from shell_tests.helpers import config_helpers
+from shell_tests.helpers.config_helpers import ConfigCache
+from shell_tests.helpers.shell_helpers import ShellPackage
+
+DEFINITION = {
+    "tosca_definitions_version": "tosca_simple_yaml_1_0",
+    "metadata": {"template_name": "Cisco IOS Shell", "template_version": "5.0.1"},
+    "node_types": {
+        "vendor.switch.CiscoIOS": {
+            "derived_from": "cloudshell.nodes.Switch",
+            "artifacts": {
+                "driver": {
+                    "file": "CiscoIOSDriver.zip",
+                    "type": "tosca.artifacts.File",
+                }
+            },
+        }
+    },
+}
+
+
+def _create_driver() -> bytes:
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("driver.py", "class Driver: ...")
+        zf.writestr(
+            "requirements.txt",
+            "cloudshell-networking-cisco-ios>=5.0,<5.1\n\n# comment\nsix  # why\n",
+        )
+    return buffer.getvalue()
+
+
+@pytest.fixture()
+def shell_path(tmp_path: Path) -> Path:
+    path = tmp_path / "shell.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("shell-definition.yaml", yaml.safe_dump(DEFINITION))
+        zf.writestr("CiscoIOSDriver.zip", _create_driver())
+    return path
+
+
+@pytest.fixture()
+def package_cache(tmp_path: Path, monkeypatch) -> ConfigCache:
+    cache = ConfigCache(tmp_path / "cache")
+    monkeypatch.setattr(ShellPackage, "_cache", cache)
+    monkeypatch.setattr(ShellPackage, "_packages", {})
+    return cache
+
+
+def test_shell_package(shell_path: Path, package_cache):
+    package = ShellPackage.from_zip(shell_path)
+
+    assert package.model == "CiscoIOS"
+    assert package.template_name == "Cisco IOS Shell"
+    assert package.version == "5.0.1"
+    assert package.node_types == ["vendor.switch.CiscoIOS"]
+    assert package.dependencies == ["cloudshell-networking-cisco-ios>=5.0,<5.1", "six"]
+    assert package.driver_hash == hashlib.sha256(_create_driver()).hexdigest()
+    assert package.zip_hash == hashlib.sha256(shell_path.read_bytes()).hexdigest()
+
+
+def test_shell_package_is_parsed_once(shell_path: Path, package_cache, monkeypatch):
+    package = ShellPackage.from_zip(shell_path)
+    copied_path = shell_path.with_name("copied.zip")
+    copied_path.write_bytes(shell_path.read_bytes())
+
+    def _parse(*args, **kwargs):
+        raise AssertionError("Shell definition shouldn't be parsed")
+
+    monkeypatch.setattr(ShellPackage, "_parse", _parse)
+    assert ShellPackage.from_zip(copied_path) is package
+
+    # a new process gets the package from the disk cache
+    monkeypatch.setattr(ShellPackage, "_packages", {})
+    cached_package = ShellPackage.from_zip(shell_path)
+    assert cached_package is not package
+    assert vars(cached_package) == vars(package)
+
+
+def test_shell_package_with_unusable_cache(shell_path: Path, tmp_path, monkeypatch):
+    # the cache dir can't be created, e.g. ~/.cache is read-only
+    (tmp_path / "file").touch()
+    monkeypatch.setattr(ShellPackage, "_cache", ConfigCache(tmp_path / "file" / "c"))
+    monkeypatch.setattr(ShellPackage, "_packages", {})
+
+    assert ShellPackage.from_zip(shell_path).model == "CiscoIOS"
+
+
+def test_config_cache_concurrent_saves(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(ConfigCache, "MAX_FILES", 2)
+    warning = Mock()
+    monkeypatch.setattr(config_helpers.logger, "warning", warning)
+    cache = ConfigCache(tmp_path / "cache")
+    keys = [f"key-{i % 4}" for i in range(200)]
+
+    with ft.ThreadPoolExecutor(8) as executor:
+        futures = [executor.submit(cache.save, key, {"key": key}) for key in keys]
+    for future in futures:
+        future.result()
+
+    warning.assert_not_called()
+    cached = list((tmp_path / "cache").iterdir())
+    assert len(cached) == 2
+    assert all(path.suffix == ".pickle" for path in cached)
+    assert all(cache.load(path.stem) == {"key": path.stem} for path in cached)
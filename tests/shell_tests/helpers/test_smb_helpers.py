@@ -0,0 +1,99 @@
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from shell_tests.handlers.smb_handler import SmbHandler
+from shell_tests.helpers.smb_helpers import ListingCache, normalize_smb_path
+
+
+def _shared_file(name: str) -> Mock:
+    smb_file = Mock(isDirectory=False)
+    smb_file.filename = name
+    return smb_file
+
+
+@pytest.fixture
+def smb_handler(monkeypatch) -> SmbHandler:
+    session = Mock()
+    session.listPath.return_value = [
+        _shared_file("."),
+        _shared_file(".."),
+        _shared_file("file.txt"),
+    ]
+    monkeypatch.setattr(SmbHandler, "session", session)
+    return SmbHandler("user", "pass", "localhost", "server", "C$")
+
+
+def test_normalize_smb_path():
+    assert normalize_smb_path(r"Program Files\\Dir\\") == r"program files\dir"
+    assert normalize_smb_path("ProgramData/Dir") == r"programdata\dir"
+
+
+def test_ls_is_cached(smb_handler):
+    assert [f.filename for f in smb_handler.ls(r"Dir\\")] == ["file.txt"]
+    assert [f.filename for f in smb_handler.ls("dir")] == ["file.txt"]
+
+    smb_handler.session.listPath.assert_called_once_with("C$", r"Dir\\")
+    assert smb_handler.listing_cache.stats == {
+        "hits": 1,
+        "misses": 1,
+        "invalidations": 0,
+        "size": 1,
+    }
+
+
+def test_ls_without_cache(smb_handler):
+    list(smb_handler.ls("Dir"))
+    list(smb_handler.ls("Dir", use_cache=False))
+
+    assert smb_handler.session.listPath.call_count == 2
+
+
+def test_writes_and_deletes_invalidate_parent_dirs(smb_handler):
+    list(smb_handler.ls("Dir"))
+    list(smb_handler.ls(r"Dir\Sub"))
+    list(smb_handler.ls("Other"))
+
+    smb_handler.put_file_obj(r"Dir\Sub\file.txt", Mock())
+    assert smb_handler.listing_cache.stats["invalidations"] == 2
+
+    list(smb_handler.ls("Other"))
+    smb_handler.remove_file(r"Other\file.txt")
+    list(smb_handler.ls("Other"))
+    assert smb_handler.session.listPath.call_count == 4
+
+
+def test_listing_during_write_is_not_cached(smb_handler):
+    def store_file(share, path, file_obj):
+        # listing of another thread while the file is uploading
+        list(smb_handler.ls("Dir"))
+
+    smb_handler.session.storeFile.side_effect = store_file
+    smb_handler.put_file_obj(r"Dir\file.txt", Mock())
+
+    assert smb_handler.listing_cache.get("C$", "Dir") is None
+
+
+def test_listing_taken_before_write_is_not_cached(smb_handler):
+    list_path = smb_handler.session.listPath.return_value
+
+    def list_path_with_write(share, path):
+        # another thread writes the file while the dir is listing
+        smb_handler.put_file_obj(r"Dir\file.txt", Mock())
+        return list_path
+
+    smb_handler.session.listPath.side_effect = list_path_with_write
+    list(smb_handler.ls("Dir"))
+
+    assert smb_handler.listing_cache.get("C$", "Dir") is None
+
+
+def test_listing_cache_ttl(monkeypatch):
+    cache = ListingCache(ttl=10)
+    cache.set("C$", "dir", [_shared_file("file.txt")])
+    assert cache.get("C$", "dir")
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert cache.get("C$", "dir") is None
@@ -0,0 +1,66 @@
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+import tftpy
+
+from shell_tests.helpers.tftp_client import TftpClient, TftpServerError
+
+from tests.servers import FileStorage, Link, TftpServer
+
+DATA = bytes(range(256)) * 2000  # 512000 bytes
+
+
+@pytest.fixture()
+def tftpy_server(tmp_path: Path):
+    """Server that supports blksize and tsize but not windowsize."""
+    (tmp_path / "config.bin").write_bytes(DATA)
+    (tmp_path / "empty.bin").write_bytes(b"")
+    server = tftpy.TftpServer(str(tmp_path))
+    thread = threading.Thread(target=server.listen, args=("127.0.0.1", 0, 0.1))
+    thread.start()
+    while not server.listenport:
+        time.sleep(0.01)
+    yield server.listenport
+    server.stop(now=True)
+    thread.join()
+
+
+@pytest.fixture()
+def windowed_server():
+    """Stand-in server that supports windowsize and drops a block."""
+    server = TftpServer(FileStorage({"config.bin": DATA}), Link(), drop_blocks={5})
+    server.start()
+    yield server.port
+    server.stop()
+
+
+def test_download_negotiates_blksize(tftpy_server):
+    client = TftpClient("127.0.0.1", tftpy_server, 1468, 8, tsize=True)
+    b_io = BytesIO()
+
+    info = client.download("config.bin", b_io)
+
+    assert b_io.getvalue() == DATA
+    assert (info.blksize, info.windowsize, info.tsize) == (1468, 1, len(DATA))
+
+
+def test_download_with_window_recovers_lost_block(windowed_server):
+    client = TftpClient("127.0.0.1", windowed_server, 1024, 4, timeout=1)
+    b_io = BytesIO()
+
+    info = client.download("config.bin", b_io)
+
+    assert b_io.getvalue() == DATA
+    assert info.windowsize == 4
+
+
+def test_get_file_size(tftpy_server):
+    client = TftpClient("127.0.0.1", tftpy_server)
+
+    assert client.get_file_size("config.bin") == len(DATA)
+    assert client.get_file_size("empty.bin") == 0
+    with pytest.raises(TftpServerError, match="File not found"):
+        client.get_file_size("missing.bin")
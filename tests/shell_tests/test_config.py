@@ -1,6 +1,8 @@
 import pytest
+from pydantic import ValidationError
 
-from shell_tests.configs import MainConfig
+from shell_tests import configs
+from shell_tests.configs import MainConfig, ResourceMatrixConfig
 
 from tests.base import CONFIGS_DIR
 
@@ -32,3 +34,100 @@ def test_tests_config_shared_between_resource_and_shell(conf: MainConfig):
             assert (
                 resource_conf.tests_conf.run_tests is False
             ), "Should use run_tests from Shell definition"
+
+
+def test_config_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(configs, "get_cache_dir", lambda name: tmp_path / name)
+    path = CONFIGS_DIR / "test_tests_conf_in_shell_and_resource.yaml"
+    conf = MainConfig.from_yaml(path, use_cache=True)
+
+    def _load(*args, **kwargs):
+        raise AssertionError("YAML shouldn't be parsed")
+
+    monkeypatch.setattr(configs.yaml, "load", _load)
+    cached_conf = MainConfig.from_yaml(path, use_cache=True)
+
+    assert cached_conf == conf
+    assert cached_conf is not conf
+
+
+def test_resource_matrix():
+    conf = MainConfig.from_yaml(CONFIGS_DIR / "test_resource_matrix.yaml")
+
+    resources_conf = list(conf.iter_resources_conf())
+    assert [(c.name, c.device_ip) for c in resources_conf] == [
+        ("Cisco", None),
+        ("cisco-1", "10.0.0.254"),
+        ("cisco-2", "10.0.0.255"),
+        ("cisco-3", "10.0.1.0"),
+        ("cisco-4", "10.0.1.1"),
+        ("cisco-5", "10.0.1.2"),
+        ("juniper-10.1.0.1", "10.1.0.1"),
+        ("juniper-10.1.0.2", "10.1.0.2"),
+    ]
+    assert resources_conf[1].attributes == {"User": "admin"}
+    assert resources_conf[1].tests_conf.expected_failures == {
+        "TestSaveConfig.test_save_running_config": "exception msg 1"
+    }
+    assert [(c.name, c.resource_names) for c in conf.iter_sandboxes_conf()] == [
+        ("First", ["Cisco"]),
+        ("load-1", ["cisco-1", "cisco-2"]),
+        ("load-2", ["cisco-3", "cisco-4"]),
+        ("load-3", ["cisco-5"]),
+    ]
+
+
+@pytest.mark.parametrize(
+    "matrix, error",
+    [
+        ({"Template": {"Name": "r", "Shell Name": "s"}}, "{index} or {ip}"),
+        ({"Template": {"Name": "r-{index}", "Shell Name": "s"}}, "Device IP"),
+        ({"Template": {"Shell Name": "s"}}, "Name of the template is required"),
+        ({"Template": {"Name": "r-{index}-{x}", "Shell Name": "s"}}, "only"),
+        ({"Template": {"Name": "r-{}", "Shell Name": "s"}}, "only"),
+        (
+            {
+                "Template": {"Name": "r-{ip}", "Shell Name": "s"},
+                "Device IPs": ["10.0.0.1", "10.0.0.2"],
+                "Sandbox Size": 1,
+                "Sandbox": {"Name": "sb"},
+            },
+            "more than one sandbox",
+        ),
+        (
+            {
+                "Template": {"Name": "r-{ip}", "Shell Name": "s"},
+                "Device IPs": ["10.0.0.1"],
+                "Sandbox": {"Name": "sb-{ip}"},
+            },
+            "only",
+        ),
+        (
+            {
+                "Template": {
+                    "Name": "r-{ip}",
+                    "Shell Name": "s",
+                    "Networking App": "a",
+                },
+                "Device IPs": ["10.0.0.1"],
+            },
+            "Networking App",
+        ),
+    ],
+)
+def test_resource_matrix_validation(matrix: dict, error: str):
+    with pytest.raises(ValidationError, match=error):
+        ResourceMatrixConfig.parse_obj(matrix)
+
+
+def test_resource_matrix_with_one_sandbox():
+    matrix = ResourceMatrixConfig.parse_obj(
+        {
+            "Template": {"Name": "r-{index}", "Shell Name": "s"},
+            "Device IPs": ["10.0.0.1", "10.0.0.2"],
+            "Sandbox Size": 2,
+            "Sandbox": {"Name": "sb"},
+        }
+    )
+
+    assert [c.name for c in matrix.iter_sandboxes_conf()] == ["sb"]